@@ -11,13 +11,42 @@ def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    # Proveedor JSON rápido (orjson con fallback a stdlib)
+    from app.utils import json_provider
+    json_provider.init_app(app)
+    
     db.init_app(app)
     jwt.init_app(app)
     CORS(app)
     
     # ⚠️ IMPORTAR TODOS LOS MODELOS AQUÍ (ANTES DE REGISTRAR BLUEPRINTS)
     with app.app_context():
-        from app.models import user, asset, audit, checklist  # ← AÑADIR checklist
+        from app.models import user, asset, audit, checklist, meta, rollup, finding, change, snapshot, idempotency  # ← AÑADIR checklist
+    
+    # Registro de consultas lentas (solo si SLOW_QUERY_LOG_ENABLED)
+    from app.utils import slow_query
+    slow_query.init_app(app)
+    
+    # Trazas de peticiones, etapas y SQL (solo si TRACING_ENABLED); su after_request
+    # se registra antes que el de compresión para ejecutarse sobre la respuesta final
+    from app.utils import tracing
+    tracing.init_app(app)
+    
+    # Caché en memoria con TTL e invalidación al hacer commit
+    from app.utils import cache
+    cache.init_app(app)
+    
+    # Acciones diferidas hasta el commit (on_commit)
+    from app.utils import transaction
+    transaction.init_app(app)
+    
+    # Respuestas guardadas por Idempotency-Key (reintentos de POST)
+    from app.utils import idempotency
+    idempotency.init_app(app)
+    
+    # Compresión gzip/brotli de respuestas grandes
+    from app.utils import compression
+    compression.init_app(app)
     
     # Registrar blueprints
     from app.routes.r_auth import auth_bp
@@ -26,6 +55,11 @@ def create_app(config_name='default'):
     from app.routes.r_checklists import checklists_bp
     from app.routes.r_reports import reports_bp
     from app.routes.r_users import users_bp
+    from app.routes.r_admin import admin_bp
+    from app.routes.r_stats import stats_bp
+    from app.routes.r_findings import findings_bp
+    from app.routes.r_analytics import analytics_bp
+    from app.routes.r_health import health_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(assets_bp, url_prefix='/api/assets')
@@ -33,5 +67,24 @@ def create_app(config_name='default'):
     app.register_blueprint(checklists_bp, url_prefix='/api/checklists')
     app.register_blueprint(reports_bp, url_prefix='/api/reports')
     app.register_blueprint(users_bp, url_prefix='/api/users')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(stats_bp, url_prefix='/api/stats')
+    app.register_blueprint(findings_bp, url_prefix='/api/findings')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(health_bp)  # /healthz y /readyz en la raíz (sondas)
+    
+    # Receptores de señales de dominio (rollups, índices y registro de cambios)
+    from app.services import compliance_rollup, findings_index, change_log
+    compliance_rollup.init_app(app)
+    findings_index.init_app(app)
+    change_log.init_app(app)
+    
+    # Almacén de reportes y pre-renderizado al completar auditorías
+    from app.services import report_prerender
+    report_prerender.init_app(app)
+    
+    # Precarga opcional de motores de reportes (REPORTS_PRELOAD)
+    from app.services import report_registry
+    report_registry.init_app(app)
     
     return app
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Inicialización única de la base de datos: tablas, usuario admin por defecto y
+plantillas de checklist. La usan ``run.py`` (servidor de desarrollo) y el
+proceso maestro de ``flask serve`` antes de arrancar los workers.
+
+Arranque rápido: se guarda en ``app_meta`` una huella del esquema (calculada de
+los modelos, sin consultar la BD) y la versión de los seeds. Si coinciden con
+lo guardado, basta una consulta para arrancar y se omiten el DDL y el sembrado.
+
+El índice de hallazgos se rellena una vez con las respuestas que ya existían
+(instalaciones anteriores a la tabla ``findings``); después lo mantienen las señales.
+"""
+import hashlib
+
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app import db
+
+SCHEMA_KEY = 'schema_fingerprint'
+SEED_KEY = 'seed_version'
+FINDINGS_KEY = 'findings_index'
+
+
+def create_default_user():
+    """Crear usuario admin por defecto"""
+    from app.models.user import User
+
+    existing_admin = User.query.filter_by(email='admin@cyberlynx.com').first()
+
+    if not existing_admin:
+        admin = User(
+            name='Administrator',
+            email='admin@cyberlynx.com',
+            role='admin'
+        )
+        admin.set_password('admin123')
+
+        db.session.add(admin)
+        db.session.commit()
+        print('👤 Usuario admin creado: admin@cyberlynx.com / admin123')
+    else:
+        print('👤 Usuario admin ya existe')
+
+
+def seed_checklists():
+    """Sembrar plantillas de checklist"""
+    from app.seeds.seed_checklists import seed_checklist_templates
+    seed_checklist_templates()
+
+
+def schema_fingerprint():
+    """Huella determinista de tablas, columnas, índices y claves foráneas de los modelos"""
+    parts = []
+    for table in db.metadata.sorted_tables:
+        parts.append(f'T:{table.name}')
+        for column in table.columns:
+            parts.append(f'C:{column.name}:{column.type}:{column.nullable}:{column.primary_key}')
+        for index in sorted(table.indexes, key=lambda i: i.name or ''):
+            parts.append(f'I:{index.name}:{",".join(c.name for c in index.columns)}:{index.unique}')
+        for fk in sorted(table.foreign_keys, key=lambda f: f.target_fullname):
+            parts.append(f'F:{fk.parent.name}:{fk.target_fullname}')
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def seed_version():
+    from app.seeds.seed_checklists import seed_version as packs_version
+    return packs_version()
+
+
+def read_boot_markers():
+    """Marcadores guardados en app_meta, o None si la tabla aún no existe"""
+    from app.models.meta import AppMeta
+
+    try:
+        return AppMeta.get_values([SCHEMA_KEY, SEED_KEY, FINDINGS_KEY])
+    except (OperationalError, ProgrammingError):
+        db.session.rollback()
+        return None
+
+
+def ensure_schema():
+    """Crea tablas nuevas y los índices que falten en tablas ya existentes"""
+    db.create_all()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+def initialize_database(force=False):
+    """
+    Crea tablas, admin por defecto y plantillas (requiere app context).
+    Sin ``force`` se omite todo lo que no haya cambiado desde el último arranque.
+    """
+    from app.models.meta import AppMeta
+
+    current_schema = schema_fingerprint()
+    current_seed = seed_version()
+    stored = read_boot_markers()
+
+    if not force and stored and stored.get(SCHEMA_KEY) == current_schema \
+            and stored.get(SEED_KEY) == current_seed and stored.get(FINDINGS_KEY):
+        print('⚡ Schema and seeds up to date, skipping initialization')
+        return False
+
+    # 1. Crear tablas e índices
+    if force or not stored or stored.get(SCHEMA_KEY) != current_schema:
+        from app.services import change_log
+        ensure_schema()
+        change_log.ensure_clock()
+        print('✅ Database tables created')
+
+    # 2 y 3. Usuario admin y templates de checklist
+    if force or not stored or stored.get(SEED_KEY) != current_seed:
+        create_default_user()
+
+        try:
+            seed_checklists()
+        except Exception as e:
+            db.session.rollback()
+            print(f'⚠️  Error seeding checklists: {str(e)}')
+            # Sin marcador de seeds: se reintentará en el próximo arranque
+            current_seed = None
+
+    # 4. Índice de hallazgos de las respuestas previas a su existencia
+    if force or not stored or not stored.get(FINDINGS_KEY):
+        from app.services import findings_index
+        total = findings_index.rebuild()
+        AppMeta.set_value(FINDINGS_KEY, '1')
+        print(f'✅ Findings index backfilled: {total} findings')
+
+    AppMeta.set_value(SCHEMA_KEY, current_schema)
+    if current_seed is not None:
+        AppMeta.set_value(SEED_KEY, current_seed)
+    db.session.commit()
+    return True
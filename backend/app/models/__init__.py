@@ -4,9 +4,16 @@ from app.models.audit import Audit, audit_assets
 from app.models.checklist import (
     ChecklistTemplate,
     ChecklistQuestion,
+    ChecklistQuestionKey,
     AuditChecklist,
     ChecklistResponse
 )
+from app.models.meta import AppMeta
+from app.models.rollup import ComplianceDailyRollup, ComplianceRollupEntry
+from app.models.finding import Finding
+from app.models.change import AuditChange, ChangeClock
+from app.models.snapshot import ReportSnapshot
+from app.models.idempotency import IdempotencyRecord
 
 __all__ = [
     'User',
@@ -15,6 +22,15 @@ __all__ = [
     'audit_assets',
     'ChecklistTemplate',
     'ChecklistQuestion',
+    'ChecklistQuestionKey',
     'AuditChecklist',
-    'ChecklistResponse'
+    'ChecklistResponse',
+    'AppMeta',
+    'ComplianceDailyRollup',
+    'ComplianceRollupEntry',
+    'Finding',
+    'AuditChange',
+    'ChangeClock',
+    'ReportSnapshot',
+    'IdempotencyRecord'
 ]
\ No newline at end of file
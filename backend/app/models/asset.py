@@ -1,8 +1,11 @@
 from app import db
+from app.models.mixins import JSONSerializableMixin
 from datetime import datetime
 
-class Asset(db.Model):
+class Asset(JSONSerializableMixin, db.Model):
     __tablename__ = 'assets'  # ← CAMBIO: plural en inglés
+    __json_fields__ = ('id', 'name', 'type', 'location', 'status', 'description',
+                       'created_at', 'updated_at', 'created_by')
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -42,5 +45,19 @@ class Asset(db.Model):
     def get_valid_statuses():
         return ['Active', 'Inactive', 'Maintenance']
     
+    @staticmethod
+    def filter_clauses(name='', type='', status='', location=''):
+        """Condiciones de búsqueda de activos (listado y asignación por filtros)"""
+        clauses = []
+        if name:
+            clauses.append(Asset.name.ilike(f'%{name}%'))
+        if type and type in Asset.get_valid_types():
+            clauses.append(Asset.type == type)
+        if status and status in Asset.get_valid_statuses():
+            clauses.append(Asset.status == status)
+        if location:
+            clauses.append(Asset.location.ilike(f'%{location}%'))
+        return clauses
+    
     def __repr__(self):
         return f'<Asset {self.name}>'
\ No newline at end of file
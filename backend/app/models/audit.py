@@ -1,14 +1,19 @@
 from app import db
+from app.models.mixins import JSONSerializableMixin
 from datetime import datetime
 
 # Tabla de relación muchos a muchos
 audit_assets = db.Table('audit_assets',
     db.Column('audit_id', db.Integer, db.ForeignKey('audits.id'), primary_key=True),
-    db.Column('asset_id', db.Integer, db.ForeignKey('assets.id'), primary_key=True)
+    db.Column('asset_id', db.Integer, db.ForeignKey('assets.id'), primary_key=True),
+    # La PK empieza por audit_id: las búsquedas por activo (historial) necesitan su propio índice
+    db.Index('ix_audit_assets_asset', 'asset_id', 'audit_id')
 )
 
-class Audit(db.Model):
+class Audit(JSONSerializableMixin, db.Model):
     __tablename__ = 'audits'  # ← Plural en inglés
+    __json_fields__ = ('id', 'name', 'description', 'status', 'created_at',
+                       'started_at', 'completed_at', 'created_by')
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -25,10 +30,21 @@ class Audit(db.Model):
     
     # Relationships
     creator = db.relationship('User', backref='created_audits')
+    # Dinámica: las auditorías de red pueden tener decenas de miles de activos,
+    # se consultan paginados (app.services.audit_assets) y nunca se cargan enteros
     assets = db.relationship('Asset', 
                            secondary=audit_assets, 
+                           lazy='dynamic',
                            backref=db.backref('audits', lazy='dynamic'))
     
+    # Nº de activos calculado en la misma consulta que la auditoría (subconsulta correlacionada)
+    assets_count = db.column_property(
+        db.select(db.func.count(audit_assets.c.asset_id))
+        .where(audit_assets.c.audit_id == id)
+        .correlate_except(audit_assets)
+        .scalar_subquery()
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -39,10 +55,14 @@ class Audit(db.Model):
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'created_by': self.created_by,
-            'assets_count': len(self.assets),
-            'assigned_assets': [asset.id for asset in self.assets]  # ← AÑADIR: IDs de assets asignados
+            'assets_count': self.assets_count or 0
         }
     
+    def __json__(self):
+        data = super().__json__()
+        data['assets_count'] = self.assets_count or 0
+        return data
+    
     @staticmethod
     def get_valid_statuses():
         return ['Created', 'In_Progress', 'Completed']
@@ -56,6 +76,7 @@ class Audit(db.Model):
         """
         from app.models.checklist import AuditChecklist
 
+        previous_status = self.status
         checklists = AuditChecklist.query.filter_by(audit_id=self.id).all()
 
         if not checklists:
@@ -78,5 +99,11 @@ class Audit(db.Model):
                     self.status = 'In_Progress'
                     self.completed_at = None
 
+        if self.status != previous_status:
+            from flask import current_app
+            from app import signals
+            signals.audit_status_changed.send(current_app._get_current_object(),
+                                              audit=self, previous_status=previous_status)
+
     def __repr__(self):
         return f'<Audit {self.name}>'
\ No newline at end of file
@@ -0,0 +1,43 @@
+from app import db
+from datetime import datetime
+
+class AuditChange(db.Model):
+    """
+    Registro de cambios por auditoría para sincronización incremental.
+    ``seq`` sirve de cursor y se asigna al hacer commit (ver ``ChangeClock``), así que
+    sigue el orden de los commits; las eliminaciones quedan como tombstones.
+    Sin claves foráneas: las filas sobreviven a la eliminación de lo que describen.
+    """
+    __tablename__ = 'audit_changes'
+
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    audit_id = db.Column(db.Integer, nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # audit, checklist, response
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # upsert, delete
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_audit_changes_audit_seq', 'audit_id', 'seq'),
+        db.Index('ix_audit_changes_created', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<AuditChange {self.seq} {self.entity}:{self.entity_id} {self.op}>'
+
+
+class ChangeClock(db.Model):
+    """
+    Reloj del registro de cambios (una sola fila). Cada transacción reserva sus seq
+    con un UPDATE de esta fila justo antes del commit; el bloqueo de fila dura hasta
+    el commit, así que un seq nunca se hace visible antes que otro menor.
+    """
+    __tablename__ = 'audit_change_clock'
+
+    id = db.Column(db.Integer, primary_key=True)
+    last_seq = db.Column(db.Integer, nullable=False, default=0)
+    # Entradas con seq <= pruned_seq eliminadas por retención: cursores anteriores caducan
+    pruned_seq = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ChangeClock {self.last_seq} pruned={self.pruned_seq}>'
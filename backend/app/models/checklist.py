@@ -1,4 +1,5 @@
 from app import db
+from app.models.mixins import JSONSerializableMixin
 from datetime import datetime
 
 class ChecklistTemplate(db.Model):
@@ -35,14 +36,49 @@ class ChecklistTemplate(db.Model):
             'Physical_Security',
             'Incident_Response'
         ]
-    
+
+    @staticmethod
+    def version_marker(template_id=None):
+        """
+        Marcador barato de versión de las plantillas (una o todas), usado para ETags.
+        Devuelve None si se pide una plantilla que no existe.
+        """
+        from app.models.meta import AppMeta
+
+        # Versión que escriben los paquetes de plantillas al editar filas existentes
+        pack_version = db.select(AppMeta.value)\
+            .where(AppMeta.key == 'templates_version').scalar_subquery()
+
+        templates = db.session.query(
+            db.func.count(ChecklistTemplate.id),
+            db.func.max(ChecklistTemplate.created_at),
+            db.func.sum(db.case((ChecklistTemplate.active.is_(True), 1), else_=0)),
+            pack_version
+        )
+        questions = db.session.query(
+            db.func.count(ChecklistQuestion.id),
+            db.func.max(ChecklistQuestion.id),
+            db.func.max(ChecklistQuestion.created_at)
+        )
+
+        if template_id is not None:
+            templates = templates.filter(ChecklistTemplate.id == template_id)
+            questions = questions.filter(ChecklistQuestion.template_id == template_id)
+
+        template_row = templates.one()
+        if template_id is not None and template_row[0] == 0:
+            return None
+
+        return tuple(template_row) + tuple(questions.one())
+
     def __repr__(self):
         return f'<ChecklistTemplate {self.name}>'
 
 
-class ChecklistQuestion(db.Model):
+class ChecklistQuestion(JSONSerializableMixin, db.Model):
     """Preguntas individuales de cada template"""
     __tablename__ = 'checklist_questions'
+    __json_fields__ = ('id', 'template_id', 'question_text', 'order', 'severity', 'created_at')
     
     id = db.Column(db.Integer, primary_key=True)
     template_id = db.Column(db.Integer, db.ForeignKey('checklist_templates.id'), nullable=False)
@@ -69,6 +105,26 @@ class ChecklistQuestion(db.Model):
         return f'<ChecklistQuestion {self.id}>'
 
 
+class ChecklistQuestionKey(db.Model):
+    """
+    Clave estable de una pregunta dentro de su plantilla (campo ``key`` de los paquetes,
+    ver app/seeds/template_packs.py). Tabla aparte porque el arranque no añade columnas
+    a tablas existentes; las preguntas creadas a mano no tienen clave.
+    """
+    __tablename__ = 'checklist_question_keys'
+
+    question_id = db.Column(db.Integer, db.ForeignKey('checklist_questions.id'), primary_key=True)
+    template_id = db.Column(db.Integer, db.ForeignKey('checklist_templates.id'), nullable=False)
+    key = db.Column(db.String(100), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('template_id', 'key', name='uq_checklist_question_key'),
+    )
+
+    def __repr__(self):
+        return f'<ChecklistQuestionKey {self.template_id}:{self.key}>'
+
+
 class AuditChecklist(db.Model):
     """Instancia de checklist ejecutada en una auditoría"""
     __tablename__ = 'audit_checklists'
@@ -103,9 +159,11 @@ class AuditChecklist(db.Model):
         return f'<AuditChecklist audit={self.audit_id} template={self.template_id}>'
 
 
-class ChecklistResponse(db.Model):
+class ChecklistResponse(JSONSerializableMixin, db.Model):
     """Respuestas individuales a cada pregunta"""
     __tablename__ = 'checklist_responses'
+    __json_fields__ = ('id', 'audit_checklist_id', 'question_id', 'answer', 'notes',
+                       'answered_at', 'answered_by')
     
     id = db.Column(db.Integer, primary_key=True)
     audit_checklist_id = db.Column(db.Integer, db.ForeignKey('audit_checklists.id'), nullable=False)
@@ -132,6 +190,12 @@ class ChecklistResponse(db.Model):
             'answered_by': self.answered_by
         }
     
+    def __json__(self):
+        data = super().__json__()
+        data['question_text'] = self.question.question_text
+        data['severity'] = self.question.severity
+        return data
+    
     @staticmethod
     def get_valid_answers():
         return ['Yes', 'No', 'N/A']
@@ -0,0 +1,36 @@
+from app import db
+from app.models.mixins import JSONSerializableMixin
+
+class Finding(JSONSerializableMixin, db.Model):
+    """
+    Índice de hallazgos: una fila por respuesta 'No'. Se mantiene al responder
+    (app/services/findings_index.py), se rellena una vez al arrancar (app/bootstrap.py)
+    y se reconstruye con ``flask rebuild-findings``.
+    """
+    __tablename__ = 'findings'
+    __json_fields__ = ('id', 'response_id', 'audit_id', 'audit_checklist_id', 'question_id',
+                       'severity', 'category', 'answered_at')
+
+    id = db.Column(db.Integer, primary_key=True)
+    response_id = db.Column(db.Integer, db.ForeignKey('checklist_responses.id'), nullable=False, unique=True)
+    audit_id = db.Column(db.Integer, db.ForeignKey('audits.id'), nullable=False)
+    audit_checklist_id = db.Column(db.Integer, db.ForeignKey('audit_checklists.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('checklist_questions.id'), nullable=False)
+
+    # Copias desnormalizadas para filtrar sin joins
+    severity = db.Column(db.String(20), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    answered_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # "Critical de Network_Security en los últimos 90 días": igualdades primero, rango al final
+        db.Index('ix_findings_severity_category_answered', 'severity', 'category', 'answered_at'),
+        db.Index('ix_findings_category_answered', 'category', 'answered_at'),
+        db.Index('ix_findings_answered', 'answered_at'),
+        db.Index('ix_findings_audit', 'audit_id', 'answered_at'),
+        db.Index('ix_findings_checklist', 'audit_checklist_id'),
+        db.Index('ix_findings_question', 'question_id'),
+    )
+
+    def __repr__(self):
+        return f'<Finding response={self.response_id} severity={self.severity}>'
@@ -0,0 +1,28 @@
+from app import db
+from datetime import datetime
+
+class IdempotencyRecord(db.Model):
+    """
+    Respuesta guardada de un POST con cabecera ``Idempotency-Key`` (ver app/utils/idempotency.py).
+    La clave única (usuario, clave) la comparten todos los workers. Sin ``status_code``
+    la petición sigue en curso. Sin claves foráneas: caduca en ``expires_at``.
+    """
+    __tablename__ = 'idempotency_records'
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(64), nullable=False)  # Identidad del usuario (JWT)
+    key = db.Column(db.String(255), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    body = db.Column(db.LargeBinary)
+    headers = db.Column(db.Text)  # JSON [[nombre, valor], ...]
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'key', name='uq_idempotency_scope_key'),
+        db.Index('ix_idempotency_expires', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f'<IdempotencyRecord {self.scope}:{self.key} {self.status_code}>'
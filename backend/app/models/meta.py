@@ -0,0 +1,28 @@
+from app import db
+from datetime import datetime
+
+class AppMeta(db.Model):
+    """Pares clave/valor de metadatos de la instalación (versión de esquema, seeds...)"""
+    __tablename__ = 'app_meta'
+
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def get_values(keys):
+        """Lee varias claves con una sola consulta"""
+        rows = db.session.query(AppMeta.key, AppMeta.value).filter(AppMeta.key.in_(keys)).all()
+        return {key: value for key, value in rows}
+
+    @staticmethod
+    def set_value(key, value):
+        """Inserta o actualiza una clave (no hace commit)"""
+        meta = db.session.get(AppMeta, key)
+        if meta is None:
+            db.session.add(AppMeta(key=key, value=value))
+        else:
+            meta.value = value
+
+    def __repr__(self):
+        return f'<AppMeta {self.key}={self.value}>'
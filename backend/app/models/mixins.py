@@ -0,0 +1,19 @@
+from operator import attrgetter
+
+
+class JSONSerializableMixin:
+    """
+    Ruta de serialización ligera para FastJSONProvider (app.utils.json_provider).
+    ``__json__`` devuelve los valores crudos de ``__json_fields__`` y deja que el
+    proveedor serialice los datetime de forma nativa, sin ``to_dict()``.
+    """
+    __json_fields__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = cls.__json_fields__
+        # attrgetter con un solo campo devuelve el valor, no una tupla
+        cls._json_getter = attrgetter(*fields, fields[0]) if fields else None
+
+    def __json__(self):
+        return dict(zip(self.__json_fields__, self._json_getter(self)))
@@ -0,0 +1,47 @@
+from app import db
+
+class ComplianceDailyRollup(db.Model):
+    """Recuento diario por categoría de respuestas y hallazgos de los checklists completados"""
+    __tablename__ = 'compliance_daily_rollups'
+
+    day = db.Column(db.Date, primary_key=True)  # Fecha (UTC) de completed_at del checklist
+    category = db.Column(db.String(50), primary_key=True)
+    checklists_completed = db.Column(db.Integer, nullable=False, default=0)
+    yes_count = db.Column(db.Integer, nullable=False, default=0)
+    no_count = db.Column(db.Integer, nullable=False, default=0)
+    na_count = db.Column(db.Integer, nullable=False, default=0)
+    critical_findings = db.Column(db.Integer, nullable=False, default=0)
+    high_findings = db.Column(db.Integer, nullable=False, default=0)
+
+    # Columnas acumulables (todas menos la clave)
+    COUNTERS = ('checklists_completed', 'yes_count', 'no_count', 'na_count',
+                'critical_findings', 'high_findings')
+
+    __table_args__ = (
+        db.Index('ix_compliance_rollup_category_day', 'category', 'day'),
+    )
+
+    def __repr__(self):
+        return f'<ComplianceDailyRollup {self.day} {self.category}>'
+
+
+class ComplianceRollupEntry(db.Model):
+    """
+    Lo que cada checklist completado sumó al rollup (día, categoría y recuentos).
+    Al eliminarlo se resta exactamente esto, aunque después cambien su ``completed_at``
+    o la severidad de sus preguntas. Sin clave foránea: se borra en ``checklist_deleting``.
+    """
+    __tablename__ = 'compliance_rollup_entries'
+
+    audit_checklist_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    checklists_completed = db.Column(db.Integer, nullable=False, default=0)
+    yes_count = db.Column(db.Integer, nullable=False, default=0)
+    no_count = db.Column(db.Integer, nullable=False, default=0)
+    na_count = db.Column(db.Integer, nullable=False, default=0)
+    critical_findings = db.Column(db.Integer, nullable=False, default=0)
+    high_findings = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ComplianceRollupEntry checklist={self.audit_checklist_id} {self.day} {self.category}>'
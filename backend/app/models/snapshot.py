@@ -0,0 +1,18 @@
+from app import db
+from datetime import datetime
+
+class ReportSnapshot(db.Model):
+    """
+    Datos del reporte de una auditoría ya agregados (JSON comprimido con zlib).
+    Solo es válido mientras ``version`` coincida con la versión actual de los datos
+    (ver app/services/report_data.py). Sin clave foránea: es una caché desechable.
+    """
+    __tablename__ = 'report_snapshots'
+
+    audit_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.String(32), nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ReportSnapshot {self.audit_id} {self.version}>'
@@ -1,9 +1,11 @@
 from app import db
 from werkzeug.security import generate_password_hash, check_password_hash
+from app.models.mixins import JSONSerializableMixin
 from datetime import datetime
 
-class User(db.Model):
+class User(JSONSerializableMixin, db.Model):
     __tablename__ = 'users'  # ← CAMBIO: plural
+    __json_fields__ = ('id', 'name', 'email', 'role', 'active', 'created_at')
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)  # ← CAMBIO: inglés
@@ -0,0 +1,44 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from app.utils.decorators import admin_required
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+@jwt_required()
+@admin_required()
+def list_slow_queries():
+    """Consultas lentas agregadas por huella normalizada (solo admin)"""
+    slow_log = current_app.extensions.get('slow_query_log')
+
+    if slow_log is None:
+        return jsonify({
+            'enabled': False,
+            'message': 'Slow query log disabled. Set SLOW_QUERY_LOG_ENABLED=true to enable it.',
+            'queries': []
+        }), 200
+
+    sort = request.args.get('sort', 'total_ms')
+    limit = request.args.get('limit', 50, type=int)
+    queries = slow_log.snapshot(sort=sort, limit=limit)
+
+    return jsonify({
+        'enabled': True,
+        'threshold_ms': slow_log.threshold_ms,
+        'queries': queries,
+        'total': len(queries)
+    }), 200
+
+
+@admin_bp.route('/slow-queries', methods=['DELETE'])
+@jwt_required()
+@admin_required()
+def reset_slow_queries():
+    """Vaciar el registro de consultas lentas (solo admin)"""
+    slow_log = current_app.extensions.get('slow_query_log')
+
+    if slow_log is not None:
+        slow_log.reset()
+
+    return jsonify({'message': 'Slow query log cleared'}), 200
@@ -0,0 +1,158 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from app.utils.decorators import admin_required
+
+analytics_bp = Blueprint('analytics', __name__)
+
+
+@analytics_bp.route('/question-failures', methods=['GET'])
+@jwt_required()
+def question_failure_heatmap():
+    """
+    Preguntas que más fallan entre todas las auditorías, por categoría y en el tiempo
+    Query params: category (lista separada por comas), since, until (YYYY-MM), top (máx. 100), min_answers
+    """
+    from datetime import date
+    from app.models.checklist import ChecklistTemplate
+    from app.services import question_analytics
+    from app.utils.cache import get_cache
+
+    try:
+        categories = [c.strip() for c in request.args.get('category', '').split(',') if c.strip()]
+        invalid = [c for c in categories if c not in ChecklistTemplate.get_valid_categories()]
+        if invalid:
+            return jsonify({'error': f'Invalid categories: {invalid}'}), 400
+
+        try:
+            since = date.fromisoformat(request.args['since'][:7] + '-01') if request.args.get('since') else None
+            until = date.fromisoformat(request.args['until'][:7] + '-01') if request.args.get('until') else None
+        except ValueError:
+            return jsonify({'error': 'since and until must be months in YYYY-MM format'}), 400
+
+        top = min(max(request.args.get('top', 20, type=int), 1), 100)
+        min_answers = max(request.args.get('min_answers', 1, type=int), 1)
+
+        dataset = question_analytics.get_dataset()
+        key = f'analytics:questions:{dataset.marker}:{",".join(categories)}:{since}:{until}:{top}:{min_answers}'
+        result, cached = get_cache().get_or_set(
+            key,
+            lambda: question_analytics.compute_heatmap(dataset, categories, since, until, top, min_answers),
+            ttl=current_app.config['ANALYTICS_CACHE_TTL']
+        )
+
+        response = jsonify(dict(result, data_marker=dataset.marker))
+        response.headers['X-Cache'] = 'HIT' if cached else 'MISS'
+        return response, 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _risk_names(scope, ids):
+    """Nombres de los elementos de un ranking de riesgo (una consulta)"""
+    from app import db
+    from app.models.asset import Asset
+    from app.models.audit import Audit
+    from app.models.checklist import AuditChecklist, ChecklistTemplate
+
+    if not ids:
+        return {}
+    if scope == 'audits':
+        query = db.session.query(Audit.id, Audit.name).filter(Audit.id.in_(ids))
+    elif scope == 'assets':
+        query = db.session.query(Asset.id, Asset.name).filter(Asset.id.in_(ids))
+    else:
+        query = db.session.query(AuditChecklist.id, ChecklistTemplate.name)\
+            .join(ChecklistTemplate, ChecklistTemplate.id == AuditChecklist.template_id)\
+            .filter(AuditChecklist.id.in_(ids))
+    return dict(query.all())
+
+
+@analytics_bp.route('/risk', methods=['GET'])
+@jwt_required()
+def risk_scores():
+    """
+    Riesgo ponderado (severidad × categoría) de checklists, auditorías o activos
+    Query params: scope (checklists, audits, assets), ids (lista separada por comas),
+    top (máx. 500), min_score
+    """
+    from app.services import risk_scoring
+
+    try:
+        scope = request.args.get('scope', 'audits')
+        if scope not in risk_scoring.SCOPES:
+            return jsonify({'error': f'scope must be one of: {", ".join(risk_scoring.SCOPES)}'}), 400
+
+        try:
+            ids = [int(value) for value in request.args.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+
+        scores = risk_scoring.get_scores()
+        if ids:
+            items = scores.lookup(scope, ids)
+            total = len(items)
+        else:
+            top = min(max(request.args.get('top', 50, type=int), 1), 500)
+            min_score = request.args.get('min_score', 0, type=float)
+            items, total = scores.ranking(scope, top, min_score)
+
+        names = _risk_names(scope, [item['id'] for item in items])
+        for item in items:
+            item['name'] = names.get(item['id'])
+
+        return jsonify({
+            'scope': scope,
+            'items': items,
+            'total': total,
+            'weights': scores.weights,
+            'scored_in_ms': scores.elapsed_ms
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@analytics_bp.route('/risk/weights', methods=['GET'])
+@jwt_required()
+def get_risk_weights():
+    """Pesos de riesgo efectivos por severidad y categoría"""
+    from app.services import risk_scoring
+
+    try:
+        return jsonify({'weights': risk_scoring.load_weights()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@analytics_bp.route('/risk/weights', methods=['PUT'])
+@jwt_required()
+@admin_required()
+def update_risk_weights():
+    """
+    Cambia los pesos de riesgo (solo admin) y vuelve a puntuar toda la cartera.
+    Body: {"severity": {"Critical": 10, ...}, "category": {"Network_Security": 1.5, ...}}
+    Los reportes guardados se regeneran al pedirse (la versión de sus datos incluye los pesos).
+    """
+    from app import db
+    from app.services import risk_scoring
+
+    try:
+        try:
+            weights = risk_scoring.validate_weights(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        risk_scoring.save_weights(weights)
+        db.session.commit()
+        scores = risk_scoring.get_scores()
+
+        return jsonify({
+            'message': 'Risk weights updated successfully',
+            'weights': scores.weights,
+            'scored_in_ms': scores.elapsed_ms
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
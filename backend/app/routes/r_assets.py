@@ -1,11 +1,13 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app.utils.idempotency import idempotent
 
 assets_bp = Blueprint('assets', __name__)
 
 @assets_bp.route('', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_asset():
     """US-001: Crear activo digital"""
     from app.models.asset import Asset
@@ -61,14 +63,7 @@ def list_assets():
         per_page = 10
         
         # Query con filtros
-        query = Asset.query
-        
-        if name:
-            query = query.filter(Asset.name.ilike(f'%{name}%'))
-        if asset_type and asset_type in Asset.get_valid_types():
-            query = query.filter(Asset.type == asset_type)
-        if status and status in Asset.get_valid_statuses():
-            query = query.filter(Asset.status == status)
+        query = Asset.query.filter(*Asset.filter_clauses(name=name, type=asset_type, status=status))
         
         # Paginación
         assets_paginated = query.paginate(
@@ -78,7 +73,7 @@ def list_assets():
         )
         
         return jsonify({
-            'assets': [asset.to_dict() for asset in assets_paginated.items],
+            'assets': assets_paginated.items,
             'total': assets_paginated.total,
             'pages': assets_paginated.pages,
             'current_page': page
@@ -139,4 +134,75 @@ def delete_asset(asset_id):
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': 'Internal server error'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Internal server error'}), 500
+# ========== HISTORIAL DE AUDITORÍAS ==========
+
+MAX_HISTORY_ASSETS = 500
+
+@assets_bp.route('/<int:asset_id>/audits', methods=['GET'])
+@jwt_required()
+def get_asset_audits(asset_id):
+    """Auditorías en las que participó un activo, con fechas, estado y cumplimiento"""
+    from app.models.asset import Asset
+    from app.models.audit import Audit
+    from app.services.asset_history import asset_history
+    
+    try:
+        if db.session.get(Asset, asset_id) is None:
+            return jsonify({'error': 'Asset not found'}), 404
+        
+        status = request.args.get('status', '')
+        if status and status not in Audit.get_valid_statuses():
+            return jsonify({'error': f'Status must be one of: {", ".join(Audit.get_valid_statuses())}'}), 400
+        
+        audits = asset_history([asset_id], status)[asset_id]
+        
+        return jsonify({
+            'asset_id': asset_id,
+            'audits': audits,
+            'total': len(audits)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+@assets_bp.route('/audits', methods=['GET'])
+@jwt_required()
+def get_assets_audits():
+    """
+    Historial de auditorías de varios activos en una sola llamada.
+    Query params: asset_ids=1,2,3 (máx. 500), status
+    """
+    from app.models.asset import Asset
+    from app.models.audit import Audit
+    from app.services.asset_history import asset_history
+    from app.services.audit_assets import missing_asset_ids
+    
+    try:
+        try:
+            asset_ids = list(dict.fromkeys(
+                int(value) for value in request.args.get('asset_ids', '').split(',') if value.strip()
+            ))
+        except ValueError:
+            return jsonify({'error': 'asset_ids must be a comma-separated list of integers'}), 400
+        
+        if not asset_ids:
+            return jsonify({'error': 'asset_ids is required'}), 400
+        if len(asset_ids) > MAX_HISTORY_ASSETS:
+            return jsonify({'error': f'At most {MAX_HISTORY_ASSETS} asset_ids per request'}), 400
+        
+        status = request.args.get('status', '')
+        if status and status not in Audit.get_valid_statuses():
+            return jsonify({'error': f'Status must be one of: {", ".join(Audit.get_valid_statuses())}'}), 400
+        
+        not_found = set(missing_asset_ids(asset_ids))
+        history = asset_history([aid for aid in asset_ids if aid not in not_found], status)
+        
+        return jsonify({
+            'assets': [{'asset_id': aid, 'audits': audits, 'total': len(audits)}
+                       for aid, audits in history.items()],
+            'not_found': [aid for aid in asset_ids if aid in not_found]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
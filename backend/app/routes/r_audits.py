@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app.utils.conditional import conditional_get
+from app.utils.idempotency import idempotent
+from app import signals
 from datetime import datetime
 
 audits_bp = Blueprint('audits', __name__)
@@ -23,7 +26,7 @@ def list_audits():
         audits = query.order_by(Audit.created_at.desc()).all()
         
         return jsonify({
-            'audits': [audit.to_dict() for audit in audits],
+            'audits': audits,
             'total': len(audits)
         }), 200
         
@@ -33,10 +36,15 @@ def list_audits():
 
 @audits_bp.route('', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_audit():
-    """US-004: Crear auditoría con asignación de activos"""
+    """
+    US-004: Crear auditoría con asignación de activos.
+    Body: name, description, asset_ids (lista) y/o asset_filters (asignar todos los
+    activos que cumplan name/type/status/location) o all_assets=true (todos)
+    """
     from app.models.audit import Audit
-    from app.models.asset import Asset
+    from app.services import audit_assets
     
     try:
         data = request.get_json()
@@ -44,16 +52,19 @@ def create_audit():
         if not data or not data.get('name'):
             return jsonify({'error': 'Audit name is required'}), 400
         
-        asset_ids = data.get('asset_ids', [])
-        assets = []
+        try:
+            asset_ids = audit_assets.normalize_ids(data.get('asset_ids') or [])
+            asset_filters = _asset_filters(data.get('asset_filters'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if data.get('all_assets') is True:
+            if asset_filters is not None:
+                return jsonify({'error': 'Use either asset_filters or all_assets=true'}), 400
+            asset_filters = {}
         
-        if asset_ids:
-            assets = Asset.query.filter(Asset.id.in_(asset_ids)).all()
-            found_ids = [asset.id for asset in assets]
-            
-            if len(assets) != len(asset_ids):
-                missing_ids = [aid for aid in asset_ids if aid not in found_ids]
-                return jsonify({'error': f'Assets not found: {missing_ids}'}), 400
+        missing_ids = audit_assets.missing_asset_ids(asset_ids)
+        if missing_ids:
+            return jsonify({'error': f'Assets not found: {missing_ids}'}), 400
         
         audit = Audit(
             name=data.get('name'),
@@ -62,15 +73,18 @@ def create_audit():
             created_by=int(get_jwt_identity())
         )
         
-        audit.assets = assets
-        
         db.session.add(audit)
+        db.session.flush()
+        
+        assigned = audit_assets.add_assets(audit.id, asset_ids)
+        if asset_filters is not None:
+            assigned += audit_assets.assign_by_filter(audit.id, asset_filters)
         db.session.commit()
         
         return jsonify({
             'message': 'Audit created successfully',
             'audit': audit.to_dict(),
-            'assets_assigned': len(audit.assets)
+            'assets_assigned': assigned
         }), 201
         
     except Exception as e:
@@ -98,9 +112,12 @@ def get_audit(audit_id):
 @audits_bp.route('/<int:audit_id>', methods=['PUT'])
 @jwt_required()
 def update_audit(audit_id):
-    """US-004: Actualizar auditoría"""
+    """
+    US-004: Actualizar auditoría. ``asset_ids`` reemplaza la asignación completa
+    (solo se aplica la diferencia); para cambios parciales usar /<id>/assets
+    """
     from app.models.audit import Audit
-    from app.models.asset import Asset
+    from app.services import audit_assets
     
     try:
         audit = Audit.query.get_or_404(audit_id)
@@ -115,19 +132,16 @@ def update_audit(audit_id):
             audit.description = data['description']
         
         if 'asset_ids' in data:
-            asset_ids = data['asset_ids']
+            try:
+                asset_ids = audit_assets.normalize_ids(data['asset_ids'] or [])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            missing_ids = audit_assets.missing_asset_ids(asset_ids)
+            if missing_ids:
+                return jsonify({'error': f'Assets not found: {missing_ids}'}), 400
             
-            if asset_ids:
-                assets = Asset.query.filter(Asset.id.in_(asset_ids)).all()
-                found_ids = [asset.id for asset in assets]
-                
-                if len(assets) != len(asset_ids):
-                    missing_ids = [aid for aid in asset_ids if aid not in found_ids]
-                    return jsonify({'error': f'Assets not found: {missing_ids}'}), 400
-                
-                audit.assets = assets
-            else:
-                audit.assets = []
+            audit_assets.replace_assets(audit.id, asset_ids)
         
         # ⚠️ NOTA: NO permitir cambio manual de estado (se maneja automáticamente)
         # El estado se actualiza solo mediante update_status_based_on_checklists()
@@ -137,7 +151,7 @@ def update_audit(audit_id):
         return jsonify({
             'message': 'Audit updated successfully',
             'audit': audit.to_dict(),
-            'assets_assigned': len(audit.assets)
+            'assets_assigned': audit.assets_count
         }), 200
         
     except Exception as e:
@@ -158,11 +172,20 @@ def delete_audit(audit_id):
         # Eliminar checklists asociados (cascade debería hacerlo automáticamente)
         checklists = AuditChecklist.query.filter_by(audit_id=audit_id).all()
         for checklist in checklists:
+            signals.checklist_deleting.send(current_app._get_current_object(), checklist=checklist)
             db.session.delete(checklist)
         db.session.flush()
 
         # Limpiar relaciones de activos
-        audit.assets.clear()
+        from app.services import audit_assets
+        audit_assets.clear_assets(audit_id)
+        
+        # Descartar datos y reportes ya generados
+        from app.services import report_data, report_store
+        from app.utils.transaction import on_commit
+        report_data.discard(audit_id)
+        store = report_store.get_store()
+        on_commit(lambda: store.invalidate(audit_id))
         
         # Eliminar auditoría
         db.session.delete(audit)
@@ -180,26 +203,137 @@ def delete_audit(audit_id):
 @audits_bp.route('/<int:audit_id>/assets', methods=['GET'])
 @jwt_required()
 def get_audit_assets(audit_id):
-    """US-004: Obtener activos asignados a una auditoría"""
+    """
+    US-004: Activos asignados a una auditoría, paginados.
+    Query params: page, per_page (máx. 500), name, type, status, location.
+    Con ids_only=true devuelve solo ids por cursor: after_id, limit (máx. 10000)
+    """
     from app.models.audit import Audit
+    from app.services import audit_assets
     
     try:
         audit = Audit.query.get_or_404(audit_id)
         
+        if request.args.get('ids_only', 'false').lower() == 'true':
+            after_id = request.args.get('after_id', 0, type=int)
+            limit = min(max(request.args.get('limit', 1000, type=int), 1), 10000)
+            asset_ids = audit_assets.ids_page(audit_id, after_id, limit)
+            return jsonify({
+                'asset_ids': asset_ids,
+                'total_assets': audit.assets_count,
+                'next_after_id': asset_ids[-1] if len(asset_ids) == limit else None
+            }), 200
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+        try:
+            filters = _asset_query_filters(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        assets_paginated = audit_assets.assets_page(audit_id, page, per_page, filters)
+        
         return jsonify({
             'audit': audit.to_dict(),
-            'assets': [asset.to_dict() for asset in audit.assets],
-            'total_assets': len(audit.assets)
+            'assets': assets_paginated.items,
+            'total_assets': audit.assets_count,
+            'total': assets_paginated.total,
+            'pages': assets_paginated.pages,
+            'current_page': page
         }), 200
         
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
 
 
+@audits_bp.route('/<int:audit_id>/assets', methods=['POST'])
+@jwt_required()
+@idempotent
+def add_audit_assets(audit_id):
+    """
+    Añade activos a la auditoría sin tocar los ya asignados.
+    Body: asset_ids (lista) y/o filters (todos los activos que cumplan
+    name/type/status/location, resuelto en la BD con un INSERT ... SELECT)
+    o all=true (todos los activos)
+    """
+    from app.models.audit import Audit
+    from app.services import audit_assets
+    
+    try:
+        audit = Audit.query.get_or_404(audit_id)
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            asset_ids = audit_assets.normalize_ids(data.get('asset_ids') or [])
+            filters = _asset_filters(data.get('filters'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if data.get('all') is True:
+            if filters is not None:
+                return jsonify({'error': 'Use either filters or all=true'}), 400
+            filters = {}
+        
+        if not asset_ids and filters is None:
+            return jsonify({'error': 'asset_ids, filters or all=true required'}), 400
+        
+        missing_ids = audit_assets.missing_asset_ids(asset_ids)
+        if missing_ids:
+            return jsonify({'error': f'Assets not found: {missing_ids}'}), 400
+        
+        added = audit_assets.add_assets(audit_id, asset_ids)
+        if filters is not None:
+            added += audit_assets.assign_by_filter(audit_id, filters)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Assets assigned successfully',
+            'added': added,
+            'total_assets': audit.assets_count
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+
+@audits_bp.route('/<int:audit_id>/assets', methods=['DELETE'])
+@jwt_required()
+def remove_audit_assets(audit_id):
+    """Quita activos de la auditoría. Body: asset_ids (lista) o all=true"""
+    from app.models.audit import Audit
+    from app.services import audit_assets
+    
+    try:
+        audit = Audit.query.get_or_404(audit_id)
+        data = request.get_json(silent=True) or {}
+        
+        if data.get('all') is True:
+            removed = audit_assets.clear_assets(audit_id)
+        else:
+            try:
+                asset_ids = audit_assets.normalize_ids(data.get('asset_ids') or [])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if not asset_ids:
+                return jsonify({'error': 'asset_ids or all=true required'}), 400
+            removed = audit_assets.remove_assets(audit_id, asset_ids)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Assets removed successfully',
+            'removed': removed,
+            'total_assets': audit.assets_count
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+
 # ========== GESTIÓN DE CHECKLISTS (US-005) ==========
 
 @audits_bp.route('/<int:audit_id>/checklist/start', methods=['POST'])
 @jwt_required()
+@idempotent
 def start_audit_checklist(audit_id):
     """US-005: Iniciar un nuevo checklist en una auditoría"""
     from app.models.audit import Audit
@@ -233,6 +367,8 @@ def start_audit_checklist(audit_id):
         )
 
         db.session.add(audit_checklist)
+        db.session.flush()
+        signals.checklist_started.send(current_app._get_current_object(), checklist=audit_checklist)
         db.session.commit()
 
         # ✅ CRÍTICO: Actualizar estado de auditoría (Created → In_Progress)
@@ -252,6 +388,7 @@ def start_audit_checklist(audit_id):
 
 @audits_bp.route('/<int:audit_id>/checklist/<int:checklist_id>/answer', methods=['POST'])
 @jwt_required()
+@idempotent
 def answer_checklist_question(audit_id, checklist_id):
     """US-005: Guardar respuesta a una pregunta del checklist"""
     from app.models.checklist import AuditChecklist, ChecklistResponse, ChecklistQuestion
@@ -293,6 +430,7 @@ def answer_checklist_question(audit_id, checklist_id):
             existing_response.notes = notes
             existing_response.answered_at = datetime.utcnow()
             existing_response.answered_by = int(get_jwt_identity())
+            response = existing_response
         else:
             response = ChecklistResponse(
                 audit_checklist_id=checklist_id,
@@ -303,6 +441,7 @@ def answer_checklist_question(audit_id, checklist_id):
             )
             db.session.add(response)
         
+        signals.response_saved.send(current_app._get_current_object(), response=response)
         db.session.commit()
         
         # Verificar si el checklist se completó automáticamente
@@ -312,6 +451,7 @@ def answer_checklist_question(audit_id, checklist_id):
         if answered_questions >= total_questions and audit_checklist.status == 'In_Progress':
             audit_checklist.status = 'Completed'
             audit_checklist.completed_at = datetime.utcnow()
+            signals.checklist_completed.send(current_app._get_current_object(), checklist=audit_checklist)
             db.session.commit()
 
             # ✅ CRÍTICO: Actualizar estado de auditoría (puede pasar a Completed)
@@ -335,11 +475,16 @@ def answer_checklist_question(audit_id, checklist_id):
 
 @audits_bp.route('/<int:audit_id>/checklist/<int:checklist_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda audit_id, checklist_id: _checklist_version(audit_id, checklist_id))
 def get_audit_checklist(audit_id, checklist_id):
     """US-005: Obtener checklist completo con preguntas y respuestas"""
-    from app.models.checklist import AuditChecklist
+    from sqlalchemy.orm import joinedload
+    from app.models.checklist import AuditChecklist, ChecklistResponse
+    from app.services import change_log
     
     try:
+        # Cursor leído antes que los datos: los cambios posteriores llegarán por /changes
+        sync_cursor = change_log.current_cursor()
         audit_checklist = AuditChecklist.query.get_or_404(checklist_id)
         
         if audit_checklist.audit_id != audit_id:
@@ -347,19 +492,24 @@ def get_audit_checklist(audit_id, checklist_id):
         
         questions = audit_checklist.template.questions.order_by('order').all()
         
+        # Una sola consulta para las respuestas, con su pregunta (la usa __json__)
+        responses = {}
+        for response in ChecklistResponse.query.options(joinedload(ChecklistResponse.question))\
+                .filter_by(audit_checklist_id=audit_checklist.id).order_by(ChecklistResponse.id):
+            responses.setdefault(response.question_id, response)
+        
         questions_with_responses = []
         for question in questions:
-            response = audit_checklist.responses.filter_by(question_id=question.id).first()
-            
             questions_with_responses.append({
-                'question': question.to_dict(),
-                'response': response.to_dict() if response else None
+                'question': question,
+                'response': responses.get(question.id)
             })
         
         return jsonify({
             'checklist': audit_checklist.to_dict(),
             'template': audit_checklist.template.to_dict(),
-            'questions_with_responses': questions_with_responses
+            'questions_with_responses': questions_with_responses,
+            'sync_cursor': sync_cursor
         }), 200
         
     except Exception as e:
@@ -368,6 +518,7 @@ def get_audit_checklist(audit_id, checklist_id):
 
 @audits_bp.route('/<int:audit_id>/checklists', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda audit_id: _audit_checklists_version(audit_id))
 def list_audit_checklists(audit_id):
     """US-005: Listar todos los checklists de una auditoría"""
     from app.models.audit import Audit
@@ -431,6 +582,7 @@ def delete_checklist_from_audit(audit_id, checklist_id):
                 }), 400
         
         # Eliminar checklist (cascade eliminará las respuestas)
+        signals.checklist_deleting.send(current_app._get_current_object(), checklist=audit_checklist)
         db.session.delete(audit_checklist)
         db.session.commit()
 
@@ -449,10 +601,82 @@ def delete_checklist_from_audit(audit_id, checklist_id):
         return jsonify({'error': f'Error eliminando checklist: {str(e)}'}), 500
 
 
+# ========== SINCRONIZACIÓN INCREMENTAL ==========
+
+@audits_bp.route('/<int:audit_id>/changes', methods=['GET'])
+@jwt_required()
+def get_audit_changes(audit_id):
+    """
+    Cambios de la auditoría posteriores a un cursor: estado actual de respuestas,
+    checklists y auditoría modificados, más tombstones de lo eliminado.
+    Query params: since (cursor de la llamada anterior o sync_cursor de get_audit_checklist), limit
+    Mientras has_more sea true, volver a llamar con el cursor devuelto. Un cursor anterior
+    a la retención del registro devuelve 410: hay que recargar el checklist completo.
+    """
+    from app.models.audit import Audit
+    from app.services import change_log
+
+    try:
+        if db.session.get(Audit, audit_id) is None:
+            return jsonify({'error': 'Audit not found'}), 404
+
+        since = request.args.get('since', type=int)
+        if since is None or since < 0:
+            return jsonify({'error': 'since must be a non-negative integer cursor'}), 400
+        if since < change_log.pruned_cursor():
+            return jsonify({
+                'error': 'Cursor expired: reload the checklist to get a new sync_cursor',
+                'resync': True
+            }), 410
+
+        limit = min(max(request.args.get('limit', current_app.config['SYNC_MAX_CHANGES'], type=int), 1),
+                    current_app.config['SYNC_MAX_CHANGES'])
+
+        return jsonify(change_log.changes_since(audit_id, since, limit=limit)), 200
+
+    except Exception as e:
+        return jsonify({'error': f'Error getting changes: {str(e)}'}), 500
+
+
+# ========== EVENTOS DE PROGRESO (SONDEO) ==========
+
+@audits_bp.route('/<int:audit_id>/events', methods=['GET'])
+@jwt_required()
+def get_audit_events(audit_id):
+    """
+    Eventos de progreso de los checklists posteriores a un cursor (sondeo corto).
+    Query params: since (cursor de la llamada anterior; sin él se devuelve un 'snapshot')
+    Volver a llamar con el cursor devuelto tras poll_interval segundos, o enseguida si has_more.
+    Un cursor caducado por retención recibe de nuevo un 'snapshot'.
+    """
+    from app.models.audit import Audit
+    from app.services import change_log, events
+
+    try:
+        audit = db.session.get(Audit, audit_id)
+        if audit is None:
+            return jsonify({'error': 'Audit not found'}), 404
+
+        since = request.args.get('since', type=int)
+        if since is not None and since < 0:
+            return jsonify({'error': 'since must be a non-negative integer cursor'}), 400
+
+        if since is None or since < change_log.pruned_cursor():
+            result = events.snapshot(audit)
+        else:
+            result = events.events_since(audit, since, limit=current_app.config['SYNC_MAX_CHANGES'])
+        result['poll_interval'] = current_app.config['EVENTS_POLL_SECONDS']
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({'error': f'Error getting events: {str(e)}'}), 500
+
+
 # ========== VALIDACIÓN Y REPORTES (US-006) ==========
 
 @audits_bp.route('/<int:audit_id>/validate-completion', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda audit_id: _audit_completion_version(audit_id))
 def validate_audit_completion(audit_id):
     """
     US-006: Validar si una auditoría puede generar reportes
@@ -506,83 +730,63 @@ def validate_audit_completion(audit_id):
 @audits_bp.route('/<int:audit_id>/report', methods=['GET'])
 @jwt_required()
 def generate_audit_report(audit_id):
-    """US-006: Generar reporte de auditoría en formato real"""
+    """
+    US-006: Generar reporte de auditoría en formato real
+    Query params: format (pdf, xlsx, csv o bundle = ZIP con los tres), detail=true para el anexo por pregunta
+    """
     from app.models.audit import Audit
     from app.models.checklist import AuditChecklist
-    from app.services.report_generator import ReportGenerator
-    from flask import make_response
+    from app.services import report_registry, report_prerender, report_bundle
+    from app.utils import tracing
     
     try:
-        audit = Audit.query.get_or_404(audit_id)
         report_format = request.args.get('format', 'pdf').lower()
+        detail = request.args.get('detail', 'false').lower() == 'true'
+        tracing.set_attributes(**{'report.format': report_format, 'report.detail': detail, 'audit.id': audit_id})
         
-        # Validación de formato
-        if report_format not in ['pdf', 'xlsx', 'csv']:
-            return jsonify({'error': 'Formato inválido. Use: pdf, xlsx, o csv'}), 400
-        
-        # Validación de completitud
-        checklists = AuditChecklist.query.filter_by(audit_id=audit_id).all()
-        
-        if len(checklists) == 0:
-            return jsonify({
-                'error': 'No se puede generar reporte. La auditoría no tiene checklists asignados.'
-            }), 400
-        
-        incomplete = [c for c in checklists if c.status != 'Completed']
-        
-        if len(incomplete) > 0:
-            incomplete_names = [c.template.name for c in incomplete]
-            return jsonify({
-                'error': f'No se puede generar reporte. Checklists incompletos: {", ".join(incomplete_names)}'
-            }), 400
-        
-        # Preparar datos para el reporte
-        checklist_data = []
-        for checklist in checklists:
-            summary = get_checklist_summary_internal(checklist.id)
-            if summary:
-                checklist_data.append({
-                    'id': checklist.id,
-                    'name': checklist.template.name,
-                    'category': checklist.template.category,
-                    'summary': summary['summary']
-                })
-        
-        print(f"📊 Generando reporte {report_format.upper()} para auditoría {audit_id}")
-        print(f"📋 Checklists incluidos: {len(checklist_data)}")
-        
-        # ✅ GENERAR REPORTE REAL (NO PLACEHOLDER)
-        filename = f'cyberlynx_audit_{audit.id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
-        
-        if report_format == 'pdf':
-            buffer = ReportGenerator.generate_pdf_report(audit, checklist_data)
-            
-            print(f"✅ PDF generado: {buffer.tell()} bytes")
+        with tracing.span('report.validate') as validation:
+            audit = Audit.query.get_or_404(audit_id)
             
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = f'attachment; filename="{filename}.pdf"'
-            return response
+            # Validación de formato
+            if report_format not in report_registry.get_valid_formats() + ['bundle']:
+                return jsonify({'error': 'Formato inválido. Use: pdf, xlsx, csv o bundle'}), 400
             
-        elif report_format == 'xlsx':
-            buffer = ReportGenerator.generate_excel_report(audit, checklist_data)
+            # Validación de completitud
+            checklists = AuditChecklist.query.filter_by(audit_id=audit_id).all()
+            validation.set_attributes(**{'report.checklists': len(checklists)})
             
-            print(f"✅ XLSX generado: {buffer.tell()} bytes")
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
-            return response
-            
-        elif report_format == 'csv':
-            buffer = ReportGenerator.generate_csv_report(audit, checklist_data)
+            if len(checklists) == 0:
+                return jsonify({
+                    'error': 'No se puede generar reporte. La auditoría no tiene checklists asignados.'
+                }), 400
             
-            print(f"✅ CSV generado: {buffer.tell()} bytes")
+            incomplete = [c for c in checklists if c.status != 'Completed']
             
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-            response.headers['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
-            return response
+            if len(incomplete) > 0:
+                incomplete_names = [c.template.name for c in incomplete]
+                return jsonify({
+                    'error': f'No se puede generar reporte. Checklists incompletos: {", ".join(incomplete_names)}'
+                }), 400
+        
+        if report_format == 'bundle':
+            filename_base = f'cyberlynx_audit_{audit.id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+            return report_bundle.bundle_response(audit, filename_base, detail=detail)
+        
+        # Pre-renderizado al completar la auditoría; si no está listo se genera aquí
+        with tracing.span('report.generate', **{'report.format': report_format}) as generation:
+            source, cache_status = report_prerender.get_report(audit, report_format, detail=detail)
+            generation.set_attributes(**{'report.cache': cache_status})
+        format_info = report_registry.get_format_info(report_format)
+        filename = f'cyberlynx_audit_{audit.id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{format_info["extension"]}'
+        
+        response = send_file(
+            source,
+            mimetype=format_info['mimetype'],
+            as_attachment=True,
+            download_name=filename
+        )
+        response.headers['X-Report-Cache'] = cache_status
+        return tracing.span_until_closed(response, 'report.transfer', **{'report.format': report_format})
         
     except Exception as e:
         import traceback
@@ -591,70 +795,168 @@ def generate_audit_report(audit_id):
         return jsonify({'error': f'Error generando reporte: {str(e)}'}), 500
 
 
-# ========== FUNCIONES HELPER INTERNAS ==========
+# ========== COMPARACIÓN ENTRE AUDITORÍAS ==========
 
-def get_checklist_summary_internal(checklist_id):
+@audits_bp.route('/<int:audit_id>/compare/<int:other_audit_id>', methods=['GET'])
+@jwt_required()
+def compare_audits(audit_id, other_audit_id):
     """
-    Helper interno para obtener resumen de checklist sin hacer request HTTP
-    Reutiliza la lógica de checklists_bp.get_checklist_summary
+    Compara una auditoría base con otra posterior: por pregunta compartida indica si la
+    respuesta mejoró, empeoró o se mantuvo, y el delta de cumplimiento por severidad.
+    Query params: questions=false para omitir el detalle por pregunta
     """
-    from app.models.checklist import AuditChecklist
-    
+    from app.models.audit import Audit
+    from app.services.audit_compare import compare_audits as run_comparison
+
     try:
-        audit_checklist = AuditChecklist.query.get(checklist_id)
-        if not audit_checklist:
-            return None
-        
-        responses = audit_checklist.responses.all()
-        total_questions = audit_checklist.template.questions.count()
-        answered_questions = len(responses)
-        
-        yes_count = sum(1 for r in responses if r.answer == 'Yes')
-        no_count = sum(1 for r in responses if r.answer == 'No')
-        na_count = sum(1 for r in responses if r.answer == 'N/A')
-        
-        preguntas_aplicables = yes_count + no_count
-        
-        # Contar por severidad
-        severity_stats = {}
-        for question in audit_checklist.template.questions:
-            response = next((r for r in responses if r.question_id == question.id), None)
-            
-            if question.severity not in severity_stats:
-                severity_stats[question.severity] = {
-                    'total': 0, 
-                    'yes': 0, 
-                    'no': 0, 
-                    'na': 0, 
-                    'unanswered': 0
-                }
-            
-            severity_stats[question.severity]['total'] += 1
-            
-            if response:
-                if response.answer == 'Yes':
-                    severity_stats[question.severity]['yes'] += 1
-                elif response.answer == 'No':
-                    severity_stats[question.severity]['no'] += 1
-                elif response.answer == 'N/A':
-                    severity_stats[question.severity]['na'] += 1
-            else:
-                severity_stats[question.severity]['unanswered'] += 1
-        
-        return {
-            'checklist': audit_checklist.to_dict(),
-            'summary': {
-                'total_questions': total_questions,
-                'answered_questions': answered_questions,
-                'unanswered_questions': total_questions - answered_questions,
-                'yes_count': yes_count,
-                'no_count': no_count,
-                'na_count': na_count,
-                'preguntas_aplicables': preguntas_aplicables,
-                'compliance_rate': round((yes_count / preguntas_aplicables * 100), 2) if preguntas_aplicables > 0 else 0,
-                'severity_breakdown': severity_stats
-            }
-        }
+        audits = {audit.id: audit for audit in Audit.query.filter(Audit.id.in_([audit_id, other_audit_id])).all()}
+        missing = [aid for aid in (audit_id, other_audit_id) if aid not in audits]
+        if missing:
+            return jsonify({'error': f'Audits not found: {missing}'}), 404
+
+        include_questions = request.args.get('questions', 'true').lower() != 'false'
+        comparison = run_comparison(audit_id, other_audit_id, include_questions=include_questions)
+
+        return jsonify({
+            'base': {'id': audit_id, 'name': audits[audit_id].name, 'status': audits[audit_id].status},
+            'target': {'id': other_audit_id, 'name': audits[other_audit_id].name,
+                       'status': audits[other_audit_id].status},
+            **comparison
+        }), 200
+
     except Exception as e:
-        print(f"Error en get_checklist_summary_internal: {str(e)}")
-        return None
\ No newline at end of file
+        return jsonify({'error': f'Error comparing audits: {str(e)}'}), 500
+
+
+# ========== FUNCIONES HELPER INTERNAS ==========
+
+_ASSET_FILTER_KEYS = ('name', 'type', 'status', 'location')
+
+
+def _asset_filters(source):
+    """
+    Filtros de asignación de un objeto JSON (None si no se envían). Claves
+    desconocidas, valores vacíos o un objeto vacío son un error: la asignación
+    abarcaría todos los activos (para eso hay que pedirlo con all=true).
+    """
+    if source is None:
+        return None
+    if not isinstance(source, dict):
+        raise ValueError('filters must be an object')
+    unknown = sorted(set(source) - set(_ASSET_FILTER_KEYS))
+    if unknown:
+        raise ValueError(f'Unknown filter keys: {unknown}. Valid keys: {", ".join(_ASSET_FILTER_KEYS)}')
+    if not source:
+        raise ValueError(f'filters must include at least one of: {", ".join(_ASSET_FILTER_KEYS)} '
+                         f'(use all=true to assign every asset)')
+    for key, value in source.items():
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f'filter {key} must be a non-empty string')
+    return _validated_filters({key: value.strip() for key, value in source.items()})
+
+
+def _asset_query_filters(args):
+    """Filtros de activo de los query params de un listado (los vacíos se ignoran)"""
+    return _validated_filters({key: args.get(key) for key in _ASSET_FILTER_KEYS if args.get(key)})
+
+
+def _validated_filters(filters):
+    from app.models.asset import Asset
+
+    # Un valor no válido no puede ignorarse: el filtro dejaría de aplicarse
+    if filters.get('type') and filters['type'] not in Asset.get_valid_types():
+        raise ValueError(f'type must be one of: {", ".join(Asset.get_valid_types())}')
+    if filters.get('status') and filters['status'] not in Asset.get_valid_statuses():
+        raise ValueError(f'status must be one of: {", ".join(Asset.get_valid_statuses())}')
+    return filters
+
+
+def _checklist_version(audit_id, checklist_id):
+    """
+    Marcadores baratos de un checklist para el ETag:
+    estado, fechas, nº de respuestas, max(answered_at) y versión de la plantilla
+    """
+    from app.models.checklist import AuditChecklist, ChecklistResponse, ChecklistTemplate
+
+    checklist = db.session.query(
+        AuditChecklist.audit_id,
+        AuditChecklist.template_id,
+        AuditChecklist.status,
+        AuditChecklist.started_at,
+        AuditChecklist.completed_at
+    ).filter(AuditChecklist.id == checklist_id).first()
+
+    if checklist is None or checklist.audit_id != audit_id:
+        return None
+
+    responses_count, last_answer = db.session.query(
+        db.func.count(ChecklistResponse.id),
+        db.func.max(ChecklistResponse.answered_at)
+    ).filter(ChecklistResponse.audit_checklist_id == checklist_id).one()
+
+    markers = (
+        checklist.status,
+        checklist.started_at,
+        checklist.completed_at,
+        responses_count,
+        last_answer,
+        ChecklistTemplate.version_marker(checklist.template_id)
+    )
+    return markers
+
+
+def _audit_checklists_version(audit_id):
+    """Marcadores de la auditoría, sus activos, checklists y respuestas (ETag)"""
+    from app.models.audit import Audit, audit_assets
+    from app.models.checklist import AuditChecklist, ChecklistResponse, ChecklistTemplate
+
+    audit = db.session.query(
+        Audit.name, Audit.description, Audit.status, Audit.started_at, Audit.completed_at
+    ).filter(Audit.id == audit_id).first()
+
+    if audit is None:
+        return None
+
+    assets_marker = db.session.query(
+        db.func.count(audit_assets.c.asset_id),
+        db.func.sum(audit_assets.c.asset_id)
+    ).filter(audit_assets.c.audit_id == audit_id).one()
+
+    checklists_marker = db.session.query(
+        db.func.count(AuditChecklist.id),
+        db.func.sum(AuditChecklist.id),
+        db.func.max(AuditChecklist.completed_at),
+        db.func.sum(db.case((AuditChecklist.status == 'Completed', 1), else_=0))
+    ).filter(AuditChecklist.audit_id == audit_id).one()
+
+    responses_marker = db.session.query(
+        db.func.count(ChecklistResponse.id),
+        db.func.max(ChecklistResponse.answered_at)
+    ).join(AuditChecklist, ChecklistResponse.audit_checklist_id == AuditChecklist.id)\
+        .filter(AuditChecklist.audit_id == audit_id).one()
+
+    markers = (
+        tuple(audit),
+        tuple(assets_marker),
+        tuple(checklists_marker),
+        tuple(responses_marker),
+        ChecklistTemplate.version_marker()
+    )
+    return markers
+
+
+def _audit_completion_version(audit_id):
+    """Marcadores del estado de completitud de los checklists (ETag)"""
+    from app.models.audit import Audit
+    from app.models.checklist import AuditChecklist, ChecklistTemplate
+
+    if db.session.query(Audit.id).filter(Audit.id == audit_id).first() is None:
+        return None
+
+    checklists_marker = db.session.query(
+        db.func.count(AuditChecklist.id),
+        db.func.sum(AuditChecklist.id),
+        db.func.sum(db.case((AuditChecklist.status == 'Completed', 1), else_=0))
+    ).filter(AuditChecklist.audit_id == audit_id).one()
+
+    return tuple(checklists_marker), ChecklistTemplate.version_marker()
@@ -1,12 +1,29 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app import signals
+from app.utils.conditional import conditional_get
+from app.utils.idempotency import idempotent
 from datetime import datetime
 
 checklists_bp = Blueprint('checklists', __name__)
 
+
+def _templates_version():
+    """Marcadores de versión del listado de plantillas (ETag)"""
+    from app.models.checklist import ChecklistTemplate
+    return ChecklistTemplate.version_marker()
+
+
+def _template_version(template_id):
+    """Marcadores de versión de una plantilla (ETag)"""
+    from app.models.checklist import ChecklistTemplate
+    return ChecklistTemplate.version_marker(template_id)
+
+
 @checklists_bp.route('/templates', methods=['GET'])
 @jwt_required()
+@conditional_get(_templates_version)
 def list_templates():
     """US-005: Listar plantillas de checklist disponibles"""
     from app.models.checklist import ChecklistTemplate
@@ -32,6 +49,7 @@ def list_templates():
 
 @checklists_bp.route('/templates/<int:template_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(_template_version)
 def get_template_details(template_id):
     """US-005: Obtener detalles de una plantilla con sus preguntas"""
     from app.models.checklist import ChecklistTemplate
@@ -121,15 +139,20 @@ def get_checklist_summary(checklist_id):
 # ✅ NUEVO ENDPOINT: Validar y completar checklist
 @checklists_bp.route('/audit-checklists/<int:checklist_id>/complete', methods=['POST'])
 @jwt_required()
+@idempotent
 def complete_checklist(checklist_id):
     """
     US-005: Marcar checklist como completado
     Valida que todas las preguntas estén respondidas antes de finalizar
     """
     from app.models.checklist import AuditChecklist
+    from app.models.audit import Audit
     
     try:
         audit_checklist = AuditChecklist.query.get_or_404(checklist_id)
+
+        if audit_checklist.status == 'Completed':
+            return jsonify({'error': 'Checklist already completed'}), 400
         
         # Validar que todas las preguntas tengan respuesta
         total_questions = audit_checklist.template.questions.count()
@@ -144,14 +167,21 @@ def complete_checklist(checklist_id):
                 'unanswered_count': unanswered_count
             }), 400
         
-        # Marcar como completado
+        # Marcar como completado (los receptores escriben en la misma transacción)
         audit_checklist.status = 'Completed'
         audit_checklist.completed_at = datetime.utcnow()
+        signals.checklist_completed.send(current_app._get_current_object(), checklist=audit_checklist)
+        db.session.commit()
+
+        # Actualizar estado de auditoría (puede pasar a Completed)
+        audit = db.session.get(Audit, audit_checklist.audit_id)
+        audit.update_status_based_on_checklists()
         db.session.commit()
         
         return jsonify({
             'message': 'Checklist completado exitosamente',
-            'checklist': audit_checklist.to_dict()
+            'checklist': audit_checklist.to_dict(),
+            'audit_status': audit.status
         }), 200
         
     except Exception as e:
@@ -202,12 +232,17 @@ def delete_checklist_from_audit(audit_id, checklist_id):
                 }), 400
         
         # Eliminar (cascade eliminará automáticamente las respuestas)
+        signals.checklist_deleting.send(current_app._get_current_object(), checklist=audit_checklist)
         db.session.delete(audit_checklist)
         db.session.commit()
+
+        audit.update_status_based_on_checklists()
+        db.session.commit()
         
         return jsonify({
             'message': f'Checklist "{template_name}" deleted successfully',
-            'deleted_responses': responses_count
+            'deleted_responses': responses_count,
+            'audit_status': audit.status
         }), 200
         
     except Exception as e:
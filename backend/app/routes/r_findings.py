@@ -0,0 +1,109 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app import db
+
+findings_bp = Blueprint('findings', __name__)
+
+
+def _list_arg(name):
+    return [value.strip() for value in request.args.get(name, '').split(',') if value.strip()]
+
+
+@findings_bp.route('', methods=['GET'])
+@jwt_required()
+def list_findings():
+    """
+    Hallazgos (respuestas 'No') de todas las auditorías, paginados y filtrables
+    Query params: severity, category (listas separadas por comas), audit_id, asset_id,
+    question_id, days o since/until (YYYY-MM-DD), page, per_page (máx. 100)
+    De los activos solo se devuelve el recuento; la lista está paginada en assets_url.
+    """
+    from datetime import datetime, timedelta
+    from app.models.finding import Finding
+    from app.models.audit import Audit, audit_assets
+    from app.models.checklist import ChecklistTemplate, ChecklistQuestion, ChecklistResponse
+
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+
+        severities = _list_arg('severity')
+        invalid = [s for s in severities if s not in ChecklistQuestion.get_valid_severities()]
+        if invalid:
+            return jsonify({'error': f'Invalid severities: {invalid}'}), 400
+
+        categories = _list_arg('category')
+        invalid = [c for c in categories if c not in ChecklistTemplate.get_valid_categories()]
+        if invalid:
+            return jsonify({'error': f'Invalid categories: {invalid}'}), 400
+
+        try:
+            since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+            until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else None
+        except ValueError:
+            return jsonify({'error': 'since and until must be dates in YYYY-MM-DD format'}), 400
+
+        days = request.args.get('days', type=int)
+        if days:
+            since = datetime.utcnow() - timedelta(days=days)
+
+        query = Finding.query
+        if severities:
+            query = query.filter(Finding.severity.in_(severities))
+        if categories:
+            query = query.filter(Finding.category.in_(categories))
+        if since:
+            query = query.filter(Finding.answered_at >= since)
+        if until:
+            # until es inclusivo: hasta el final de ese día si no trae hora
+            if 'T' not in request.args['until']:
+                until += timedelta(days=1)
+            query = query.filter(Finding.answered_at < until)
+        if request.args.get('audit_id', type=int):
+            query = query.filter(Finding.audit_id == request.args.get('audit_id', type=int))
+        if request.args.get('question_id', type=int):
+            query = query.filter(Finding.question_id == request.args.get('question_id', type=int))
+        if request.args.get('asset_id', type=int):
+            query = query.filter(Finding.audit_id.in_(
+                db.select(audit_assets.c.audit_id)
+                .where(audit_assets.c.asset_id == request.args.get('asset_id', type=int))
+            ))
+
+        findings_paginated = query.order_by(Finding.answered_at.desc(), Finding.id.desc())\
+            .paginate(page=page, per_page=per_page, error_out=False)
+        findings = findings_paginated.items
+
+        # Datos de presentación solo de la página actual (una consulta por tabla)
+        question_ids = {f.question_id for f in findings}
+        audit_ids = {f.audit_id for f in findings}
+        response_ids = [f.response_id for f in findings]
+
+        questions = dict(db.session.query(ChecklistQuestion.id, ChecklistQuestion.question_text)
+                         .filter(ChecklistQuestion.id.in_(question_ids)).all()) if findings else {}
+        audits = dict(db.session.query(Audit.id, Audit.name)
+                      .filter(Audit.id.in_(audit_ids)).all()) if findings else {}
+        notes = dict(db.session.query(ChecklistResponse.id, ChecklistResponse.notes)
+                     .filter(ChecklistResponse.id.in_(response_ids)).all()) if findings else {}
+        assets_counts = dict(db.session.query(audit_assets.c.audit_id, db.func.count())
+                             .filter(audit_assets.c.audit_id.in_(audit_ids))
+                             .group_by(audit_assets.c.audit_id).all()) if findings else {}
+
+        items = []
+        for finding in findings:
+            data = finding.__json__()
+            data['question_text'] = questions.get(finding.question_id)
+            data['audit_name'] = audits.get(finding.audit_id)
+            data['notes'] = notes.get(finding.response_id)
+            data['assets_count'] = assets_counts.get(finding.audit_id, 0)
+            data['assets_url'] = f'/api/audits/{finding.audit_id}/assets'
+            items.append(data)
+
+        return jsonify({
+            'findings': items,
+            'total': findings_paginated.total,
+            'pages': findings_paginated.pages,
+            'current_page': page
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
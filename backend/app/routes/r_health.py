@@ -0,0 +1,122 @@
+"""
+Sondas para el balanceador y el orquestador (sin autenticación ni /api).
+
+- ``/healthz`` (liveness): el proceso responde; no toca la BD.
+- ``/readyz`` (readiness): conexión a la BD con una consulta trivial, estado del
+  pool de conexiones, versión del esquema y pool de render de reportes. El
+  resultado se guarda ``READINESS_CACHE_SECONDS`` por proceso, así que las
+  sondas frecuentes no generan carga en la BD.
+"""
+import os
+import threading
+import time
+
+from flask import Blueprint, jsonify, current_app
+
+from app import db
+
+health_bp = Blueprint('health', __name__)
+
+_started_at = time.time()
+_expected_schema = None
+_readiness = None  # (caduca_en, cuerpo, código)
+_readiness_lock = threading.Lock()
+
+
+def _no_store(response, status):
+    response.headers['Cache-Control'] = 'no-store'
+    return response, status
+
+
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: el proceso está vivo"""
+    return _no_store(jsonify({
+        'status': 'ok',
+        'pid': os.getpid(),
+        'uptime_seconds': round(time.time() - _started_at, 1)
+    }), 200)
+
+
+def _check_database():
+    started = time.perf_counter()
+    try:
+        db.session.execute(db.text('SELECT 1'))
+        return {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+    except Exception as e:
+        db.session.rollback()
+        return {'ok': False, 'error': f'{type(e).__name__}: {e}'.splitlines()[0][:300]}
+
+
+def _pool_stats():
+    """Estadísticas del pool de conexiones (las que ofrezca la clase de pool del motor)"""
+    pool = db.engine.pool
+    stats = {'class': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+def _check_schema():
+    """Huella guardada por el arranque frente a la de los modelos de este proceso"""
+    from app.bootstrap import SCHEMA_KEY, SEED_KEY, read_boot_markers, schema_fingerprint
+    global _expected_schema
+
+    if _expected_schema is None:
+        _expected_schema = schema_fingerprint()
+    stored = read_boot_markers() or {}
+    return {
+        'ok': stored.get(SCHEMA_KEY) == _expected_schema,
+        'version': stored.get(SCHEMA_KEY),
+        'expected': _expected_schema,
+        'seed_version': stored.get(SEED_KEY)
+    }
+
+
+def compute_readiness():
+    """Cuerpo y código HTTP de /readyz (200 listo, 503 no listo)"""
+    from app.services import report_prerender
+
+    database = _check_database()
+    schema = _check_schema() if database['ok'] else {'ok': False, 'error': 'database unavailable'}
+    report_workers = report_prerender.pool_status(current_app)
+    # El pool se crea al primer render (sin arrancar está listo); falla si hay trabajos y ningún hilo
+    report_workers['ok'] = not report_workers['shutdown'] and \
+        not (report_workers['pending_jobs'] and not report_workers['alive_threads'])
+
+    ready = database['ok'] and schema['ok'] and report_workers['ok']
+    body = {
+        'status': 'ready' if ready else 'not_ready',
+        'checked_at': time.time(),
+        'checks': {
+            'database': database,
+            'pool': _pool_stats(),
+            'schema': schema,
+            'report_workers': report_workers
+        }
+    }
+    return body, 200 if ready else 503
+
+
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: BD, esquema y pool de reportes (resultado cacheado unos segundos)"""
+    global _readiness
+
+    now = time.monotonic()
+    cached = _readiness
+    if cached is None or cached[0] <= now:
+        with _readiness_lock:
+            if _readiness is None or _readiness[0] <= now:
+                try:
+                    body, status = compute_readiness()
+                finally:
+                    db.session.remove()
+                _readiness = (now + current_app.config['READINESS_CACHE_SECONDS'], body, status)
+            cached = _readiness
+
+    _, body, status = cached
+    response = jsonify(dict(body, cached_for_seconds=round(max(cached[0] - time.monotonic(), 0), 2)))
+    return _no_store(response, status)
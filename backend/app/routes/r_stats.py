@@ -0,0 +1,141 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from app import db
+
+stats_bp = Blueprint('stats', __name__)
+
+# Tablas de las que dependen las estadísticas: escribir en ellas invalida la caché
+_STATS_TABLES = ('audits', 'assets', 'audit_checklists', 'checklist_responses', 'findings')
+
+
+def _count_by(column):
+    """{valor: número de filas} con un solo GROUP BY"""
+    return dict(db.session.query(column, db.func.count()).group_by(column).all())
+
+
+def compute_dashboard_stats():
+    """Estadísticas del panel principal con cinco consultas agregadas (no escala con el nº de auditorías)"""
+    from app.models.audit import Audit
+    from app.models.asset import Asset
+    from app.models.checklist import AuditChecklist, ChecklistResponse
+    from app.models.finding import Finding
+
+    audits = _count_by(Audit.status)
+    audits_by_status = {status: audits.get(status, 0) for status in Audit.get_valid_statuses()}
+
+    assets_by_type = {asset_type: 0 for asset_type in Asset.get_valid_types()}
+    assets_by_status = {status: 0 for status in Asset.get_valid_statuses()}
+    asset_rows = db.session.query(Asset.type, Asset.status, db.func.count())\
+        .group_by(Asset.type, Asset.status).all()
+    for asset_type, status, count in asset_rows:
+        assets_by_type[asset_type] = assets_by_type.get(asset_type, 0) + count
+        assets_by_status[status] = assets_by_status.get(status, 0) + count
+
+    checklists = _count_by(AuditChecklist.status)
+
+    answers = _count_by(ChecklistResponse.answer)
+    yes_count = answers.get('Yes', 0)
+    no_count = answers.get('No', 0)
+    na_count = answers.get('N/A', 0)
+    preguntas_aplicables = yes_count + no_count
+
+    # Hallazgos = respuestas 'No' (índice de hallazgos); se reportan los de severidad Critical/High
+    findings = dict(db.session.query(Finding.severity, db.func.count(Finding.id))
+                    .filter(Finding.severity.in_(['Critical', 'High']))
+                    .group_by(Finding.severity).all())
+
+    return {
+        'audits': {
+            'total': sum(audits.values()),
+            'by_status': audits_by_status
+        },
+        'assets': {
+            'total': sum(assets_by_type.values()),
+            'by_type': assets_by_type,
+            'by_status': assets_by_status
+        },
+        'checklists': {
+            'total': sum(checklists.values()),
+            'in_progress': checklists.get('In_Progress', 0),
+            'completed': checklists.get('Completed', 0)
+        },
+        'compliance': {
+            'yes_count': yes_count,
+            'no_count': no_count,
+            'na_count': na_count,
+            'compliance_rate': round((yes_count / preguntas_aplicables * 100), 2) if preguntas_aplicables > 0 else 0
+        },
+        'open_findings': {
+            'Critical': findings.get('Critical', 0),
+            'High': findings.get('High', 0),
+            'total': findings.get('Critical', 0) + findings.get('High', 0)
+        }
+    }
+
+
+@stats_bp.route('', methods=['GET'])
+@jwt_required()
+def get_dashboard_stats():
+    """US-011: Estadísticas agregadas del panel principal (cacheadas con TTL corto)"""
+    from app.utils.cache import get_cache
+
+    try:
+        stats, cached = get_cache().get_or_set(
+            'stats:dashboard',
+            compute_dashboard_stats,
+            ttl=current_app.config['STATS_CACHE_TTL'],
+            tables=_STATS_TABLES
+        )
+
+        response = jsonify(stats)
+        response.headers['X-Cache'] = 'HIT' if cached else 'MISS'
+        return response, 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@stats_bp.route('/compliance-trend', methods=['GET'])
+@jwt_required()
+def get_compliance_trend():
+    """
+    Tendencia de cumplimiento por categoría leída del rollup diario
+    Query params: from, to (YYYY-MM-DD), granularity (day|week|month), category (lista separada por comas)
+    """
+    from datetime import date, datetime, timedelta
+    from app.models.checklist import ChecklistTemplate
+    from app.services import compliance_rollup
+
+    try:
+        try:
+            date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else datetime.utcnow().date()
+            date_from = date.fromisoformat(request.args['from']) if request.args.get('from') \
+                else date_to - timedelta(days=365)
+        except ValueError:
+            return jsonify({'error': 'from and to must be dates in YYYY-MM-DD format'}), 400
+
+        if date_from > date_to:
+            return jsonify({'error': 'from must be before to'}), 400
+
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in compliance_rollup.GRANULARITIES:
+            return jsonify({
+                'error': f'granularity must be one of: {", ".join(compliance_rollup.GRANULARITIES)}'
+            }), 400
+
+        categories = [c.strip() for c in request.args.get('category', '').split(',') if c.strip()]
+        invalid = [c for c in categories if c not in ChecklistTemplate.get_valid_categories()]
+        if invalid:
+            return jsonify({'error': f'Invalid categories: {invalid}'}), 400
+
+        series = compliance_rollup.trend(date_from, date_to, granularity, categories or None)
+
+        return jsonify({
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'granularity': granularity,
+            **series
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
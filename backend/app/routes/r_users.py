@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required
 from app import db
 from app.models.user import User
 from app.utils.decorators import admin_required
+from app.utils.idempotency import idempotent
 import re
 
 users_bp = Blueprint('users', __name__)
@@ -24,6 +25,7 @@ def get_user(user_id):
 @users_bp.route('/', methods=['POST'])
 @jwt_required()
 @admin_required()
+@idempotent
 def create_user():
     data = request.get_json() or {}
     name = (data.get('name') or '').strip()
@@ -93,5 +95,5 @@ def list_users():
     users = query.order_by(User.created_at.desc()).all()
     return jsonify({
         'total': len(users),
-        'users': [user.to_dict() for user in users]
+        'users': users
     }), 200
\ No newline at end of file
@@ -0,0 +1,355 @@
+"""
+Paquetes declarativos de plantillas de checklist (JSON o YAML).
+
+Formato::
+
+    {
+      "pack": "cyberlynx_base",
+      "description": "...",
+      "templates": [
+        {
+          "name": "Seguridad de Red",          # clave estable de la plantilla
+          "category": "Network_Security",
+          "description": "...",
+          "active": true,
+          "questions": [
+            {"key": "net-01", "order": 1, "severity": "Critical", "text": "..."}   # clave estable: key
+          ]
+        }
+      ]
+    }
+
+``apply_pack`` compara el paquete con las filas existentes (plantilla por nombre,
+pregunta por plantilla + key) y aplica solo las diferencias con INSERT/UPDATE
+masivos. Aplicar dos veces el mismo paquete no escribe nada. Reordenar o insertar
+preguntas no toca las demás, y el texto de una pregunta con respuestas no se puede
+cambiar (se añade otra con una key nueva). El mismo formato se usa para exportar
+(``export_pack``).
+"""
+import json
+import os
+import uuid
+
+from sqlalchemy import insert, update, delete
+
+from app import db
+from app.models.checklist import ChecklistTemplate, ChecklistQuestion, ChecklistQuestionKey, ChecklistResponse
+
+TEMPLATES_VERSION_KEY = 'templates_version'
+
+_TEMPLATE_FIELDS = ('category', 'description', 'active')
+
+_MAX_KEY_LENGTH = 100
+
+
+def _yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError('YAML template packs require PyYAML (pip install pyyaml)')
+    return yaml
+
+
+def _is_yaml(path):
+    return os.path.splitext(path)[1].lower() in ('.yaml', '.yml')
+
+
+def load_pack(path):
+    """Lee un paquete desde un fichero .json, .yaml o .yml"""
+    with open(path, encoding='utf-8') as f:
+        if _is_yaml(path):
+            pack = _yaml().safe_load(f)
+        else:
+            pack = json.load(f)
+    validate_pack(pack)
+    return pack
+
+
+def validate_pack(pack):
+    """Lanza ValueError si el paquete no es válido"""
+    if not isinstance(pack, dict) or not isinstance(pack.get('templates'), list):
+        raise ValueError('Template pack must be an object with a "templates" list')
+
+    valid_categories = ChecklistTemplate.get_valid_categories()
+    valid_severities = ChecklistQuestion.get_valid_severities()
+    names = set()
+
+    for template in pack['templates']:
+        if not isinstance(template, dict):
+            raise ValueError('Every template must be an object')
+        name = template.get('name')
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError('Every template needs a name')
+        name = name.strip()
+        if name in names:
+            raise ValueError(f'Duplicated template name in pack: {name}')
+        names.add(name)
+
+        if template.get('category') not in valid_categories:
+            raise ValueError(f'Template "{name}": category must be one of {valid_categories}')
+
+        questions = template.get('questions', [])
+        if not isinstance(questions, list):
+            raise ValueError(f'Template "{name}": "questions" must be a list')
+
+        orders = set()
+        keys = set()
+        for question in questions:
+            if not isinstance(question, dict):
+                raise ValueError(f'Template "{name}": every question must be an object')
+            order = question.get('order')
+            if not isinstance(order, int):
+                raise ValueError(f'Template "{name}": every question needs an integer order')
+            if order in orders:
+                raise ValueError(f'Template "{name}": duplicated question order {order}')
+            orders.add(order)
+            key = question.get('key')
+            if not isinstance(key, str) or not key.strip() or len(key.strip()) > _MAX_KEY_LENGTH:
+                raise ValueError(f'Template "{name}": question {order} needs a string key '
+                                 f'(max {_MAX_KEY_LENGTH} characters)')
+            if key.strip() in keys:
+                raise ValueError(f'Template "{name}": duplicated question key "{key.strip()}"')
+            keys.add(key.strip())
+            text = question.get('text')
+            if not isinstance(text, str) or not text.strip():
+                raise ValueError(f'Template "{name}": question {order} has no text')
+            if question.get('severity', 'Medium') not in valid_severities:
+                raise ValueError(f'Template "{name}": question {order} severity must be one of {valid_severities}')
+
+
+def apply_pack(pack, prune=False, dry_run=False):
+    """
+    Aplica el paquete a la BD y devuelve un resumen de cambios.
+    Con ``prune`` se eliminan las preguntas que ya no están en el paquete y no
+    tienen respuestas (las respondidas se conservan siempre).
+    """
+    validate_pack(pack)
+    stats = {
+        'templates_created': 0, 'templates_updated': 0,
+        'questions_created': 0, 'questions_updated': 0,
+        'questions_pruned': 0, 'questions_orphaned': 0
+    }
+
+    pack_templates = {t['name'].strip(): t for t in pack['templates']}
+
+    existing_templates = {
+        row.name: row for row in db.session.query(
+            ChecklistTemplate.id, ChecklistTemplate.name, ChecklistTemplate.category,
+            ChecklistTemplate.description, ChecklistTemplate.active
+        ).filter(ChecklistTemplate.name.in_(pack_templates)).all()
+    }
+
+    # 1. Plantillas nuevas y modificadas
+    new_templates = []
+    template_updates = []
+    for name, template in pack_templates.items():
+        values = {
+            'category': template['category'],
+            'description': template.get('description', ''),
+            'active': template.get('active', True)
+        }
+        current = existing_templates.get(name)
+        if current is None:
+            new_templates.append(dict(values, name=name))
+        elif any(getattr(current, field) != values[field] for field in _TEMPLATE_FIELDS):
+            template_updates.append(dict(values, id=current.id))
+
+    stats['templates_created'] = len(new_templates)
+    stats['templates_updated'] = len(template_updates)
+
+    if dry_run:
+        template_ids = {name: row.id for name, row in existing_templates.items()}
+    else:
+        if template_updates:
+            db.session.execute(update(ChecklistTemplate), template_updates)
+        if new_templates:
+            db.session.execute(insert(ChecklistTemplate), new_templates)
+        template_ids = dict(db.session.query(ChecklistTemplate.name, ChecklistTemplate.id)
+                            .filter(ChecklistTemplate.name.in_(pack_templates)).all())
+
+    # 2. Preguntas, indexadas por (template_id, key). Las que aún no tienen clave
+    #    (sembradas antes de existir las keys) la adoptan si su texto coincide
+    existing_questions = {}
+    unkeyed = {}
+    if template_ids:
+        for row in db.session.query(
+            ChecklistQuestion.id, ChecklistQuestion.template_id, ChecklistQuestion.order,
+            ChecklistQuestion.question_text, ChecklistQuestion.severity, ChecklistQuestionKey.key
+        ).outerjoin(ChecklistQuestionKey, ChecklistQuestionKey.question_id == ChecklistQuestion.id)\
+                .filter(ChecklistQuestion.template_id.in_(list(template_ids.values())))\
+                .order_by(ChecklistQuestion.order, ChecklistQuestion.id).all():
+            if row.key is None:
+                unkeyed.setdefault((row.template_id, row.question_text.strip()), []).append(row)
+            else:
+                existing_questions[(row.template_id, row.key)] = row
+
+    new_questions = []
+    new_question_keys = []
+    adopted_keys = []
+    question_updates = []
+    text_changes = {}
+    seen_keys = set()
+    for name, template in pack_templates.items():
+        template_id = template_ids.get(name)
+        for question in template.get('questions', []):
+            text = question['text'].strip()
+            severity = question.get('severity', 'Medium')
+            key = (template_id, question['key'].strip())
+            seen_keys.add(key)
+
+            current = None
+            if template_id is not None:
+                current = existing_questions.get(key)
+                if current is None and unkeyed.get((template_id, text)):
+                    current = unkeyed[(template_id, text)].pop(0)
+                    adopted_keys.append({'question_id': current.id, 'template_id': template_id, 'key': key[1]})
+
+            if current is None:
+                new_questions.append({
+                    'template_id': template_id,
+                    'order': question['order'],
+                    'question_text': text,
+                    'severity': severity
+                })
+                new_question_keys.append(key[1])
+            elif current.question_text != text or current.severity != severity \
+                    or current.order != question['order']:
+                question_updates.append({'id': current.id, 'question_text': text,
+                                         'severity': severity, 'order': question['order']})
+                if current.question_text != text:
+                    text_changes[current.id] = key[1]
+
+    orphaned_ids = [row.id for key, row in existing_questions.items() if key not in seen_keys]
+    orphaned_ids += [row.id for rows in unkeyed.values() for row in rows]
+
+    # Cambiar el texto de una pregunta respondida re-etiquetaría respuestas históricas
+    if text_changes:
+        answered = sorted(text_changes[qid] for (qid,) in db.session.query(ChecklistResponse.question_id)
+                          .filter(ChecklistResponse.question_id.in_(list(text_changes))).distinct().all())
+        if answered:
+            db.session.rollback()
+            raise ValueError(f'Questions with answers cannot change their text (keys: {", ".join(answered)}); '
+                             f'add the new wording as a question with a new key')
+
+    stats['questions_created'] = len(new_questions)
+    stats['questions_updated'] = len(question_updates)
+
+    prunable_ids = []
+    if orphaned_ids and prune:
+        answered = {qid for (qid,) in db.session.query(ChecklistResponse.question_id)
+                    .filter(ChecklistResponse.question_id.in_(orphaned_ids)).distinct().all()}
+        prunable_ids = [qid for qid in orphaned_ids if qid not in answered]
+    stats['questions_pruned'] = len(prunable_ids)
+    stats['questions_orphaned'] = len(orphaned_ids) - len(prunable_ids)
+
+    if dry_run:
+        db.session.rollback()
+        return stats
+
+    if question_updates:
+        db.session.execute(update(ChecklistQuestion), question_updates)
+    if new_questions:
+        new_ids = db.session.scalars(
+            insert(ChecklistQuestion).returning(ChecklistQuestion.id, sort_by_parameter_order=True),
+            new_questions
+        ).all()
+        adopted_keys += [{'question_id': question_id, 'template_id': question['template_id'], 'key': key}
+                         for question_id, question, key in zip(new_ids, new_questions, new_question_keys)]
+    if adopted_keys:
+        db.session.execute(insert(ChecklistQuestionKey), adopted_keys)
+    if prunable_ids:
+        db.session.execute(delete(ChecklistQuestionKey).where(ChecklistQuestionKey.question_id.in_(prunable_ids)))
+        db.session.execute(delete(ChecklistQuestion).where(ChecklistQuestion.id.in_(prunable_ids)))
+
+    # Índices derivados (hallazgos) copian severidad y categoría: avisar de los cambios
+    changed_question_ids = [q['id'] for q in question_updates]
+    if template_updates:
+        changed_question_ids += [qid for (qid,) in db.session.query(ChecklistQuestion.id).filter(
+            ChecklistQuestion.template_id.in_([t['id'] for t in template_updates])).all()]
+    if changed_question_ids:
+        from flask import current_app
+        from app import signals
+        signals.questions_changed.send(current_app._get_current_object(), question_ids=changed_question_ids)
+
+    changed = any(stats[key] for key in stats if key != 'questions_orphaned')
+    if changed:
+        # Invalida los ETags de plantillas aunque no cambien contadores ni fechas
+        from app.models.meta import AppMeta
+        AppMeta.set_value(TEMPLATES_VERSION_KEY, uuid.uuid4().hex)
+
+    db.session.commit()
+    return stats
+
+
+def export_pack(name='cyberlynx_export', description='', category=None, template_ids=None):
+    """Exporta plantillas existentes en el formato de paquete"""
+    query = ChecklistTemplate.query
+    if category:
+        query = query.filter(ChecklistTemplate.category == category)
+    if template_ids:
+        query = query.filter(ChecklistTemplate.id.in_(template_ids))
+    templates = query.order_by(ChecklistTemplate.id).all()
+
+    questions_by_template = {}
+    if templates:
+        for question, key in db.session.query(ChecklistQuestion, ChecklistQuestionKey.key).outerjoin(
+            ChecklistQuestionKey, ChecklistQuestionKey.question_id == ChecklistQuestion.id
+        ).filter(
+            ChecklistQuestion.template_id.in_([t.id for t in templates])
+        ).order_by(ChecklistQuestion.template_id, ChecklistQuestion.order).all():
+            questions_by_template.setdefault(question.template_id, []).append({
+                # Las preguntas creadas a mano no tienen key: se les asigna una por id
+                'key': key or f'q{question.id}',
+                'order': question.order,
+                'severity': question.severity,
+                'text': question.question_text
+            })
+
+    return {
+        'pack': name,
+        'description': description,
+        'templates': [
+            {
+                'name': template.name,
+                'category': template.category,
+                'description': template.description or '',
+                'active': bool(template.active),
+                'questions': questions_by_template.get(template.id, [])
+            }
+            for template in templates
+        ]
+    }
+
+
+def dump_pack(pack, path):
+    """Escribe un paquete en JSON (una pregunta por línea) o YAML según la extensión"""
+    with open(path, 'w', encoding='utf-8') as f:
+        if _is_yaml(path):
+            _yaml().safe_dump(pack, f, allow_unicode=True, sort_keys=False, width=120)
+        else:
+            f.write(format_pack_json(pack))
+
+
+def format_pack_json(pack):
+    """JSON legible con cada pregunta en una sola línea (diffs limpios en git)"""
+    header = {key: value for key, value in pack.items() if key != 'templates'}
+    lines = ['{']
+    for key, value in header.items():
+        lines.append(f'  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},')
+    lines.append('  "templates": [')
+
+    for t_index, template in enumerate(pack['templates']):
+        lines.append('    {')
+        for key in ('name', 'category', 'description', 'active'):
+            lines.append(f'      {json.dumps(key)}: {json.dumps(template.get(key), ensure_ascii=False)},')
+        lines.append('      "questions": [')
+        questions = template.get('questions', [])
+        for q_index, question in enumerate(questions):
+            comma = ',' if q_index < len(questions) - 1 else ''
+            lines.append(f'        {json.dumps(question, ensure_ascii=False)}{comma}')
+        lines.append('      ]')
+        lines.append('    },' if t_index < len(pack['templates']) - 1 else '    }')
+
+    lines.append('  ]')
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
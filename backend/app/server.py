@@ -0,0 +1,138 @@
+"""
+Servidor de producción: gunicorn con workers preforkados y la app precargada.
+
+Uso:
+    FLASK_CONFIG=production flask --app run serve
+
+Configuración (variables de entorno, ver ``config.py``):
+    SERVER_BIND              dirección de escucha (127.0.0.1:5000)
+    SERVER_WORKERS           procesos worker (0 = automático; también WEB_CONCURRENCY)
+    SERVER_THREADS           hilos por worker (4)
+    SERVER_TIMEOUT           segundos antes de reiniciar un worker bloqueado (60)
+    SERVER_GRACEFUL_TIMEOUT  segundos para terminar peticiones en curso al parar (30)
+    SERVER_KEEPALIVE         segundos de keep-alive HTTP (5)
+    SERVER_MAX_REQUESTS      reciclar el worker tras N peticiones (0 = nunca)
+
+Modelo de concurrencia
+----------------------
+* El proceso maestro crea la app (``run.py``) y ejecuta una sola vez la
+  inicialización de la base de datos antes de hacer fork. Los workers heredan el
+  código ya importado y comparten esa memoria copy-on-write.
+* Antes del fork se cierran las conexiones del pool del maestro; cada worker
+  abre las suyas (nunca se comparte un socket/fichero de BD entre procesos).
+* Cada worker atiende ``SERVER_THREADS`` peticiones concurrentes (gthread), así
+  que el pool de SQLAlchemy de cada worker debe tener al menos ese tamaño.
+* Ninguna ruta mantiene conexiones abiertas: el progreso en vivo
+  (``/api/audits/<id>/events``) es un sondeo corto sobre el registro de cambios
+  en la BD, así que todos los workers ven lo escrito por los demás.
+* SIGTERM hace un apagado ordenado: el maestro deja de aceptar conexiones y los
+  workers terminan las peticiones en curso durante ``SERVER_GRACEFUL_TIMEOUT``.
+
+SQLite frente a PostgreSQL/MySQL
+--------------------------------
+* SQLite admite un único escritor por fichero. Se activa el modo WAL (lectores
+  y escritor no se bloquean) y ``busy_timeout`` para que las escrituras
+  concurrentes esperen en lugar de fallar con "database is locked". Con SQLite
+  conviene pocos procesos (por defecto 2) y paralelismo por hilos.
+* Con un servidor de base de datos los workers escalan con las CPUs
+  (por defecto 2 * CPU + 1); el límite real es el número de conexiones que
+  acepta el servidor: workers * pool_size.
+"""
+import multiprocessing
+
+from sqlalchemy import event
+
+from app import db
+
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+def _is_sqlite(app):
+    return app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite')
+
+
+def _default_workers(app):
+    if _is_sqlite(app):
+        return 2
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def _configure_sqlite(engine):
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.close()
+
+
+def build_options(app):
+    """Opciones de gunicorn a partir de la configuración de la app"""
+    config = app.config
+    workers = config.get('SERVER_WORKERS') or _default_workers(app)
+    max_requests = config.get('SERVER_MAX_REQUESTS', 0)
+
+    return {
+        'bind': config.get('SERVER_BIND', '127.0.0.1:5000'),
+        'workers': workers,
+        'threads': config.get('SERVER_THREADS', 4),
+        'worker_class': 'gthread',
+        'timeout': config.get('SERVER_TIMEOUT', 60),
+        'graceful_timeout': config.get('SERVER_GRACEFUL_TIMEOUT', 30),
+        'keepalive': config.get('SERVER_KEEPALIVE', 5),
+        'max_requests': max_requests,
+        'max_requests_jitter': max_requests // 10,
+        'preload_app': True,
+        'post_fork': _make_post_fork(app),
+        'worker_exit': _make_worker_exit(app),
+    }
+
+
+def _make_post_fork(app):
+    def post_fork(server, worker):
+        # Descarta las conexiones heredadas del maestro sin cerrarlas (siguen siendo suyas)
+        with app.app_context():
+            db.engine.dispose(close=False)
+    return post_fork
+
+
+def _make_worker_exit(app):
+    def worker_exit(server, worker):
+        with app.app_context():
+            db.engine.dispose()
+    return worker_exit
+
+
+def serve(app):
+    """Inicializa la BD una vez en el maestro y arranca gunicorn"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit('gunicorn is required for "flask serve" (pip install gunicorn)')
+
+    from app.bootstrap import initialize_database
+
+    with app.app_context():
+        if _is_sqlite(app):
+            _configure_sqlite(db.engine)
+        initialize_database()
+        # No heredar conexiones abiertas en los workers
+        db.engine.dispose()
+
+    class CyberLynxApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = build_options(app)
+    print(f"🚀 Serving on http://{options['bind']} "
+          f"({options['workers']} workers x {options['threads']} threads)")
+    CyberLynxApplication(app, options).run()
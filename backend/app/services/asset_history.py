@@ -0,0 +1,111 @@
+"""
+Historial de auditorías de uno o varios activos.
+
+Dos consultas para cualquier número de activos: las auditorías de cada activo
+(por ``ix_audit_assets_asset``) y un resumen agrupado por auditoría con los
+recuentos de checklists y respuestas, del que sale el cumplimiento.
+"""
+from app import db
+
+# Ids por sentencia en los IN (límite de parámetros del motor)
+ID_CHUNK_SIZE = 500
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def audit_summaries(audit_ids):
+    """Resumen de cumplimiento por auditoría con una consulta agrupada por bloque de ids"""
+    from app.models.checklist import AuditChecklist, ChecklistResponse, ChecklistQuestion
+
+    def answer_sum(condition):
+        return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+
+    summaries = {}
+    for chunk in _chunks(audit_ids):
+        rows = db.session.query(
+            AuditChecklist.audit_id,
+            db.func.count(db.distinct(AuditChecklist.id)),
+            db.func.count(db.distinct(db.case((AuditChecklist.status == 'Completed', AuditChecklist.id)))),
+            answer_sum(ChecklistResponse.answer == 'Yes'),
+            answer_sum(ChecklistResponse.answer == 'No'),
+            answer_sum(ChecklistResponse.answer == 'N/A'),
+            answer_sum(db.and_(ChecklistResponse.answer == 'No', ChecklistQuestion.severity == 'Critical')),
+            answer_sum(db.and_(ChecklistResponse.answer == 'No', ChecklistQuestion.severity == 'High'))
+        ).outerjoin(ChecklistResponse, ChecklistResponse.audit_checklist_id == AuditChecklist.id)\
+            .outerjoin(ChecklistQuestion, ChecklistQuestion.id == ChecklistResponse.question_id)\
+            .filter(AuditChecklist.audit_id.in_(chunk))\
+            .group_by(AuditChecklist.audit_id)\
+            .all()
+
+        for audit_id, checklists, completed, yes, no, na, critical, high in rows:
+            applicable = yes + no
+            summaries[audit_id] = {
+                'checklists_total': checklists,
+                'checklists_completed': completed,
+                'yes_count': yes,
+                'no_count': no,
+                'na_count': na,
+                'compliance_rate': round((yes / applicable * 100), 2) if applicable > 0 else 0,
+                'critical_findings': critical,
+                'high_findings': high
+            }
+    return summaries
+
+
+def _empty_summary():
+    return {
+        'checklists_total': 0, 'checklists_completed': 0,
+        'yes_count': 0, 'no_count': 0, 'na_count': 0,
+        'compliance_rate': 0, 'critical_findings': 0, 'high_findings': 0
+    }
+
+
+def asset_history(asset_ids, status=None):
+    """
+    ``{asset_id: [auditoría, ...]}`` con las auditorías de cada activo (más recientes
+    primero) y su resumen de cumplimiento. Los activos sin auditorías tienen lista vacía.
+    """
+    from app.models.audit import Audit, audit_assets
+
+    history = {asset_id: [] for asset_id in asset_ids}
+    audits = {}
+    for chunk in _chunks(asset_ids):
+        query = db.session.query(
+            audit_assets.c.asset_id,
+            Audit.id,
+            Audit.name,
+            Audit.status,
+            Audit.created_at,
+            Audit.started_at,
+            Audit.completed_at
+        ).join(Audit, Audit.id == audit_assets.c.audit_id)\
+            .filter(audit_assets.c.asset_id.in_(chunk))
+        if status:
+            query = query.filter(Audit.status == status)
+
+        for asset_id, audit_id, name, audit_status, created_at, started_at, completed_at in \
+                query.order_by(audit_assets.c.asset_id, Audit.created_at.desc(), Audit.id.desc()):
+            entry = audits.get(audit_id)
+            if entry is None:
+                entry = audits[audit_id] = {
+                    'id': audit_id,
+                    'name': name,
+                    'status': audit_status,
+                    'created_at': _iso(created_at),
+                    'started_at': _iso(started_at),
+                    'completed_at': _iso(completed_at)
+                }
+            history[asset_id].append(entry)
+
+    summaries = audit_summaries(audits)
+    for audit_id, entry in audits.items():
+        entry['summary'] = summaries.get(audit_id) or _empty_summary()
+    return history
@@ -0,0 +1,147 @@
+"""
+Asignación de activos a auditorías sin cargar la colección ``Audit.assets``.
+
+Todas las operaciones trabajan directamente sobre ``audit_assets`` con SQL basado
+en conjuntos: añadir y quitar solo tocan el delta, la asignación por filtros es un
+único ``INSERT ... SELECT`` y los listados se paginan en la BD. Las listas de ids
+se procesan por bloques para no superar el límite de parámetros del motor.
+
+Ninguna función hace commit.
+"""
+from app import db
+
+# Ids por sentencia (SQLite admite como mínimo 999 parámetros)
+ID_CHUNK_SIZE = 500
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
+
+
+def normalize_ids(raw_ids):
+    """Lista de ids enteros sin duplicados (conserva el orden); ValueError si no es válida"""
+    if not isinstance(raw_ids, list):
+        raise ValueError('asset_ids must be a list of integers')
+    ids = []
+    seen = set()
+    for value in raw_ids:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError('asset_ids must be a list of integers')
+        if value not in seen:
+            seen.add(value)
+            ids.append(value)
+    return ids
+
+
+def missing_asset_ids(asset_ids):
+    """Ids que no existen en ``assets`` (en el orden recibido)"""
+    from app.models.asset import Asset
+
+    found = set()
+    for chunk in _chunks(asset_ids):
+        found.update(db.session.scalars(db.select(Asset.id).where(Asset.id.in_(chunk))))
+    return [asset_id for asset_id in asset_ids if asset_id not in found]
+
+
+def assigned_ids(audit_id):
+    from app.models.audit import audit_assets
+
+    return set(db.session.scalars(
+        db.select(audit_assets.c.asset_id).where(audit_assets.c.audit_id == audit_id)
+    ))
+
+
+def count_assets(audit_id):
+    from app.models.audit import audit_assets
+
+    return db.session.scalar(
+        db.select(db.func.count()).select_from(audit_assets).where(audit_assets.c.audit_id == audit_id)
+    )
+
+
+def add_assets(audit_id, asset_ids):
+    """Asigna los activos que aún no lo están; devuelve cuántos se añadieron"""
+    from app.models.asset import Asset
+
+    added = 0
+    for chunk in _chunks(asset_ids):
+        added += _insert_assets(audit_id, Asset.id.in_(chunk))
+    return added
+
+
+def assign_by_filter(audit_id, filters):
+    """Asigna todos los activos que cumplen los filtros con un solo INSERT ... SELECT"""
+    from app.models.asset import Asset
+
+    return _insert_assets(audit_id, *Asset.filter_clauses(**filters))
+
+
+def _insert_assets(audit_id, *clauses):
+    """INSERT INTO audit_assets SELECT de los activos que cumplen ``clauses`` y no están asignados"""
+    from app.models.asset import Asset
+    from app.models.audit import audit_assets
+
+    already_assigned = db.select(audit_assets.c.asset_id).where(audit_assets.c.audit_id == audit_id)
+    source = db.select(db.literal(audit_id), Asset.id)\
+        .where(*clauses, Asset.id.not_in(already_assigned))
+    return db.session.execute(
+        audit_assets.insert().from_select(['audit_id', 'asset_id'], source)
+    ).rowcount
+
+
+def remove_assets(audit_id, asset_ids):
+    """Quita los activos indicados de la auditoría; devuelve cuántos se quitaron"""
+    from app.models.audit import audit_assets
+
+    removed = 0
+    for chunk in _chunks(asset_ids):
+        removed += db.session.execute(
+            audit_assets.delete().where(
+                audit_assets.c.audit_id == audit_id,
+                audit_assets.c.asset_id.in_(chunk)
+            )
+        ).rowcount
+    return removed
+
+
+def clear_assets(audit_id):
+    from app.models.audit import audit_assets
+
+    return db.session.execute(
+        audit_assets.delete().where(audit_assets.c.audit_id == audit_id)
+    ).rowcount
+
+
+def replace_assets(audit_id, asset_ids):
+    """Deja asignados exactamente ``asset_ids`` aplicando solo la diferencia"""
+    current = assigned_ids(audit_id)
+    target = set(asset_ids)
+    removed = remove_assets(audit_id, current - target)
+    added = add_assets(audit_id, [asset_id for asset_id in asset_ids if asset_id not in current])
+    return added, removed
+
+
+def assets_page(audit_id, page=1, per_page=50, filters=None):
+    """Consulta paginada de los activos asignados (con filtros opcionales de activo)"""
+    from app.models.asset import Asset
+    from app.models.audit import audit_assets
+
+    query = Asset.query.join(audit_assets, audit_assets.c.asset_id == Asset.id)\
+        .filter(audit_assets.c.audit_id == audit_id)
+    if filters:
+        query = query.filter(*Asset.filter_clauses(**filters))
+    return query.order_by(Asset.id).paginate(page=page, per_page=per_page, error_out=False)
+
+
+def ids_page(audit_id, after_id=0, limit=1000):
+    """Ids asignados mayores que ``after_id`` (paginación por cursor, para listas grandes)"""
+    from app.models.audit import audit_assets
+
+    return list(db.session.scalars(
+        db.select(audit_assets.c.asset_id)
+        .where(audit_assets.c.audit_id == audit_id, audit_assets.c.asset_id > after_id)
+        .order_by(audit_assets.c.asset_id)
+        .limit(limit)
+    ))
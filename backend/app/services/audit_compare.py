@@ -0,0 +1,154 @@
+"""
+Comparación de dos auditorías (p. ej. la misma revisión trimestral).
+
+Dos consultas basadas en conjuntos: las respuestas de ambas auditorías unidas
+por ``question_id`` (solo preguntas respondidas en las dos) y los recuentos de
+respuestas por severidad de cada auditoría para el delta de cumplimiento. Si un
+lado no tiene respuestas Sí/No en una severidad su tasa y el delta son ``None``.
+"""
+from sqlalchemy.orm import aliased
+
+from app import db
+
+# Cambio de respuesta base -> objetivo
+_IMPROVED = {('No', 'Yes')}
+_REGRESSED = {('Yes', 'No')}
+
+
+def classify(base_answer, target_answer):
+    if base_answer == target_answer:
+        return 'unchanged'
+    if (base_answer, target_answer) in _IMPROVED:
+        return 'improved'
+    if (base_answer, target_answer) in _REGRESSED:
+        return 'regressed'
+    return 'changed'  # Cambios desde o hacia N/A
+
+
+def _shared_answers(base_id, target_id):
+    from app.models.checklist import AuditChecklist, ChecklistTemplate, ChecklistResponse, ChecklistQuestion
+
+    base_response = aliased(ChecklistResponse)
+    target_response = aliased(ChecklistResponse)
+    base_checklist = aliased(AuditChecklist)
+    target_checklist = aliased(AuditChecklist)
+
+    return db.session.query(
+        ChecklistQuestion.template_id,
+        ChecklistTemplate.name,
+        ChecklistTemplate.category,
+        ChecklistQuestion.id,
+        ChecklistQuestion.order,
+        ChecklistQuestion.severity,
+        ChecklistQuestion.question_text,
+        base_response.answer,
+        target_response.answer
+    ).select_from(base_response)\
+        .join(base_checklist, base_checklist.id == base_response.audit_checklist_id)\
+        .join(target_response, target_response.question_id == base_response.question_id)\
+        .join(target_checklist, target_checklist.id == target_response.audit_checklist_id)\
+        .join(ChecklistQuestion, ChecklistQuestion.id == base_response.question_id)\
+        .join(ChecklistTemplate, ChecklistTemplate.id == ChecklistQuestion.template_id)\
+        .filter(base_checklist.audit_id == base_id, target_checklist.audit_id == target_id)\
+        .order_by(ChecklistQuestion.template_id, ChecklistQuestion.order,
+                  base_response.answered_at, target_response.answered_at)\
+        .all()
+
+
+def _severity_counts(audit_ids):
+    """{audit_id: {severity: {'Yes': n, 'No': n, 'N/A': n}}} con un GROUP BY"""
+    from app.models.checklist import AuditChecklist, ChecklistResponse, ChecklistQuestion
+
+    rows = db.session.query(
+        AuditChecklist.audit_id, ChecklistQuestion.severity, ChecklistResponse.answer, db.func.count()
+    ).join(AuditChecklist, AuditChecklist.id == ChecklistResponse.audit_checklist_id)\
+        .join(ChecklistQuestion, ChecklistQuestion.id == ChecklistResponse.question_id)\
+        .filter(AuditChecklist.audit_id.in_(audit_ids))\
+        .group_by(AuditChecklist.audit_id, ChecklistQuestion.severity, ChecklistResponse.answer)\
+        .all()
+
+    counts = {audit_id: {} for audit_id in audit_ids}
+    for audit_id, severity, answer, count in rows:
+        counts[audit_id].setdefault(severity, {}).setdefault(answer, 0)
+        counts[audit_id][severity][answer] += count
+    return counts
+
+
+def _compliance_rate(answers):
+    """Porcentaje de Sí sobre Sí + No, o None si no hay respuestas aplicables"""
+    yes_count = answers.get('Yes', 0)
+    preguntas_aplicables = yes_count + answers.get('No', 0)
+    return round((yes_count / preguntas_aplicables * 100), 2) if preguntas_aplicables > 0 else None
+
+
+def compare_audits(base_id, target_id, include_questions=True):
+    from app.models.checklist import ChecklistQuestion
+
+    # Una fila por pregunta compartida (si se repitió un checklist, gana la última respuesta)
+    shared = {}
+    for row in _shared_answers(base_id, target_id):
+        shared[row[3]] = row
+
+    summary = {'shared_questions': len(shared), 'improved': 0, 'regressed': 0, 'unchanged': 0, 'changed': 0}
+    templates = {}
+    for template_id, template_name, category, question_id, order, severity, text, base_answer, target_answer \
+            in shared.values():
+        change = classify(base_answer, target_answer)
+        summary[change] += 1
+
+        template = templates.setdefault(template_id, {
+            'template_id': template_id,
+            'template_name': template_name,
+            'category': category,
+            'improved': 0, 'regressed': 0, 'unchanged': 0, 'changed': 0,
+            'questions': []
+        })
+        template[change] += 1
+        if include_questions:
+            template['questions'].append({
+                'question_id': question_id,
+                'question_text': text,
+                'order': order,
+                'severity': severity,
+                'base_answer': base_answer,
+                'target_answer': target_answer,
+                'change': change
+            })
+
+    if not include_questions:
+        for template in templates.values():
+            del template['questions']
+
+    counts = _severity_counts([base_id, target_id])
+    compliance = {}
+    for severity in ChecklistQuestion.get_valid_severities() + ['overall']:
+        if severity == 'overall':
+            base_answers = _merge(counts[base_id].values())
+            target_answers = _merge(counts[target_id].values())
+        else:
+            base_answers = counts[base_id].get(severity, {})
+            target_answers = counts[target_id].get(severity, {})
+        base_rate = _compliance_rate(base_answers)
+        target_rate = _compliance_rate(target_answers)
+        compliance[severity] = {
+            'base_rate': base_rate,
+            'target_rate': target_rate,
+            # Sin tasa en uno de los lados no hay delta que comparar
+            'delta': round(target_rate - base_rate, 2) if base_rate is not None and target_rate is not None else None,
+            'base_findings': base_answers.get('No', 0),
+            'target_findings': target_answers.get('No', 0)
+        }
+
+    return {
+        'summary': summary,
+        'templates': list(templates.values()),
+        'compliance_by_severity': compliance
+    }
+
+
+def _merge(severity_answers):
+    merged = {}
+    for answers in severity_answers:
+        for answer, count in answers.items():
+            merged[answer] = merged.get(answer, 0) + count
+    return merged
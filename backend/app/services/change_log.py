@@ -0,0 +1,230 @@
+"""
+Registro de cambios por auditoría (tabla ``audit_changes``) y lectura incremental.
+
+Los receptores de señales anotan un cambio por entidad (respuesta guardada,
+checklist iniciado/completado/eliminado, estado de la auditoría) y las filas se
+escriben justo antes del commit, con seq reservados en ``ChangeClock``: el orden
+de los seq es el de los commits, así que un cursor nunca salta cambios de una
+transacción larga. ``changes_since`` devuelve solo lo ocurrido después de un
+cursor: el estado actual de lo modificado y tombstones de lo eliminado, de modo
+que el tráfico es proporcional al número de cambios y no al tamaño de la auditoría.
+
+Las entradas más antiguas que ``SYNC_RETENTION_DAYS`` se eliminan (``prune``);
+un cursor anterior a lo eliminado ya no sirve y el cliente debe recargar.
+"""
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, insert, select, update
+
+from app import db
+from app import signals
+from app.models.change import AuditChange, ChangeClock
+
+_PENDING_KEY = 'pending_audit_changes'
+_CLOCK_ID = 1
+
+_last_prune = 0.0
+
+
+def record(audit_id, entity, entity_id, op='upsert'):
+    """Anota un cambio; se escribe con su seq cuando la sesión hace commit"""
+    db.session.info.setdefault(_PENDING_KEY, []).append((audit_id, entity, entity_id, op))
+
+
+def current_cursor():
+    return db.session.query(db.func.coalesce(db.func.max(ChangeClock.last_seq), 0)).scalar()
+
+
+def pruned_cursor():
+    """Cursores menores que este caducaron por retención"""
+    return db.session.query(db.func.coalesce(db.func.max(ChangeClock.pruned_seq), 0)).scalar()
+
+
+def ensure_clock():
+    """Crea la fila del reloj si falta, continuando tras el mayor seq existente (no hace commit)"""
+    if db.session.get(ChangeClock, _CLOCK_ID) is None:
+        last_seq = db.session.query(db.func.coalesce(db.func.max(AuditChange.seq), 0)).scalar()
+        db.session.add(ChangeClock(id=_CLOCK_ID, last_seq=last_seq, pruned_seq=0))
+        db.session.flush()
+
+
+def _reserve(session, count):
+    """Reserva ``count`` seq consecutivos; devuelve el primero. El bloqueo dura hasta el commit"""
+    table = ChangeClock.__table__
+    result = session.execute(
+        update(table).where(table.c.id == _CLOCK_ID).values(last_seq=table.c.last_seq + count)
+    )
+    if result.rowcount == 0:
+        ensure_clock()
+        return _reserve(session, count)
+    return session.execute(select(table.c.last_seq).where(table.c.id == _CLOCK_ID)).scalar() - count + 1
+
+
+def prune(retention_days):
+    """Elimina las entradas anteriores a la retención y avanza ``pruned_seq`` (no hace commit)"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    cutoff_seq = db.session.query(db.func.max(AuditChange.seq))\
+        .filter(AuditChange.created_at < cutoff).scalar()
+    if cutoff_seq is None:
+        return 0
+    deleted = db.session.execute(
+        AuditChange.__table__.delete().where(AuditChange.seq <= cutoff_seq)
+    ).rowcount
+    clock = ChangeClock.__table__
+    db.session.execute(
+        update(clock).where(clock.c.id == _CLOCK_ID, clock.c.pruned_seq < cutoff_seq)
+        .values(pruned_seq=cutoff_seq)
+    )
+    return deleted
+
+
+def entries_since(audit_id, since, limit=500):
+    """
+    Entradas con seq > ``since`` (como mucho ``limit``) y si quedan más.
+    Devuelve ``(filas, has_more, ops)``; ``ops`` es la última operación de cada
+    ``(entidad, id)`` dentro de la página.
+    """
+    rows = db.session.query(AuditChange.seq, AuditChange.entity, AuditChange.entity_id, AuditChange.op)\
+        .filter(AuditChange.audit_id == audit_id, AuditChange.seq > since)\
+        .order_by(AuditChange.seq).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    ops = {}
+    for seq, entity, entity_id, op in rows:
+        ops[(entity, entity_id)] = op
+    return rows, has_more, ops
+
+
+def changes_since(audit_id, since, limit=500):
+    """
+    Cambios de la auditoría con seq > ``since`` (como mucho ``limit`` entradas del registro).
+    ``has_more`` solo es true si la página está llena. El llamador comprueba antes que
+    ``since`` no sea anterior a ``pruned_cursor()``.
+    """
+    from app.models.audit import Audit
+    from app.models.checklist import AuditChecklist, ChecklistResponse
+
+    # Solo cuenta la última operación de cada entidad dentro de la ventana
+    rows, has_more, latest = entries_since(audit_id, since, limit)
+
+    upserts = {'audit': [], 'checklist': [], 'response': []}
+    deleted = {'checklist': [], 'response': []}
+    for (entity, entity_id), op in latest.items():
+        if op == 'delete':
+            deleted.setdefault(entity, []).append(entity_id)
+        else:
+            upserts.setdefault(entity, []).append(entity_id)
+
+    responses = []
+    if upserts['response']:
+        responses = [dict(row._mapping) for row in db.session.execute(select(
+            ChecklistResponse.id, ChecklistResponse.audit_checklist_id, ChecklistResponse.question_id,
+            ChecklistResponse.answer, ChecklistResponse.notes, ChecklistResponse.answered_at,
+            ChecklistResponse.answered_by
+        ).where(ChecklistResponse.id.in_(upserts['response'])).order_by(ChecklistResponse.id))]
+
+    checklists = []
+    if upserts['checklist']:
+        checklists = [dict(row._mapping) for row in db.session.execute(select(
+            AuditChecklist.id, AuditChecklist.template_id, AuditChecklist.status,
+            AuditChecklist.started_at, AuditChecklist.completed_at
+        ).where(AuditChecklist.id.in_(upserts['checklist'])).order_by(AuditChecklist.id))]
+
+    audit = None
+    if upserts['audit']:
+        row = db.session.execute(select(
+            Audit.id, Audit.status, Audit.started_at, Audit.completed_at
+        ).where(Audit.id == audit_id)).first()
+        audit = dict(row._mapping) if row else None
+
+    # Las consultas IN omiten lo que ya no existe; su tombstone llegará en otra página
+    return {
+        'cursor': rows[-1].seq if rows else since,
+        'has_more': has_more,
+        'audit': audit,
+        'checklists': checklists,
+        'responses': responses,
+        'deleted': {
+            'checklists': sorted(deleted.get('checklist', [])),
+            'responses': sorted(deleted.get('response', []))
+        }
+    }
+
+
+# ========== RECEPTORES DE SEÑALES ==========
+
+def _on_response_saved(sender, response, **extra):
+    from app.models.checklist import AuditChecklist
+
+    db.session.flush()
+    audit_id = db.session.query(AuditChecklist.audit_id)\
+        .filter(AuditChecklist.id == response.audit_checklist_id).scalar()
+    record(audit_id, 'response', response.id)
+
+
+def _on_checklist_changed(sender, checklist, **extra):
+    db.session.flush()
+    record(checklist.audit_id, 'checklist', checklist.id)
+
+
+def _on_checklist_deleting(sender, checklist, **extra):
+    from app.models.checklist import ChecklistResponse
+
+    # Tombstones de las respuestas (los ids se leen ahora: se borran en esta transacción)
+    response_ids = db.session.scalars(
+        select(ChecklistResponse.id)
+        .where(ChecklistResponse.audit_checklist_id == checklist.id)
+        .order_by(ChecklistResponse.id)
+    ).all()
+    for response_id in response_ids:
+        record(checklist.audit_id, 'response', response_id, op='delete')
+    record(checklist.audit_id, 'checklist', checklist.id, op='delete')
+
+
+def _on_audit_status_changed(sender, audit, previous_status, **extra):
+    record(audit.id, 'audit', audit.id)
+
+
+# ========== ESCRITURA AL HACER COMMIT ==========
+
+def _before_commit(session):
+    global _last_prune
+
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    first_seq = _reserve(session, len(pending))
+    now = datetime.utcnow()
+    session.execute(insert(AuditChange), [{
+        'seq': first_seq + offset,
+        'audit_id': audit_id,
+        'entity': entity,
+        'entity_id': entity_id,
+        'op': op,
+        'created_at': now
+    } for offset, (audit_id, entity, entity_id, op) in enumerate(pending)])
+
+    # Retención: como mucho una vez por intervalo y proceso, dentro de una escritura
+    if has_app_context() and time.monotonic() - _last_prune >= current_app.config['SYNC_PRUNE_INTERVAL_SECONDS']:
+        _last_prune = time.monotonic()
+        prune(current_app.config['SYNC_RETENTION_DAYS'])
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_app(app):
+    for name, listener in (('before_commit', _before_commit), ('after_rollback', _after_rollback)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
+
+    signals.response_saved.connect(_on_response_saved)
+    signals.checklist_started.connect(_on_checklist_changed)
+    signals.checklist_completed.connect(_on_checklist_changed)
+    signals.checklist_deleting.connect(_on_checklist_deleting)
+    signals.audit_status_changed.connect(_on_audit_status_changed)
@@ -0,0 +1,191 @@
+"""
+Rollup diario de cumplimiento por categoría de checklist.
+
+Se mantiene de forma incremental: al completarse un checklist se suman sus
+respuestas al día de ``completed_at`` y lo sumado se guarda en
+``compliance_rollup_entries``; si se elimina el checklist se resta esa misma
+aportación. ``backfill()`` lo reconstruye desde cero (``flask backfill-compliance``).
+Las series de tendencia se leen solo de esta tabla, sin tocar las respuestas.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from app import db
+from app import signals
+from app.models.rollup import ComplianceDailyRollup, ComplianceRollupEntry
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def _checklist_entries(checklist_ids=None):
+    """
+    Aportación de cada checklist completado con una sola consulta agrupada.
+    El día se calcula en Python para no depender de funciones de fecha del dialecto.
+    """
+    from app.models.checklist import AuditChecklist, ChecklistTemplate, ChecklistResponse, ChecklistQuestion
+
+    def answer_sum(condition):
+        return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+
+    query = db.session.query(
+        AuditChecklist.id,
+        AuditChecklist.completed_at,
+        ChecklistTemplate.category,
+        answer_sum(ChecklistResponse.answer == 'Yes'),
+        answer_sum(ChecklistResponse.answer == 'No'),
+        answer_sum(ChecklistResponse.answer == 'N/A'),
+        answer_sum(db.and_(ChecklistResponse.answer == 'No', ChecklistQuestion.severity == 'Critical')),
+        answer_sum(db.and_(ChecklistResponse.answer == 'No', ChecklistQuestion.severity == 'High'))
+    ).join(ChecklistTemplate, ChecklistTemplate.id == AuditChecklist.template_id)\
+        .outerjoin(ChecklistResponse, ChecklistResponse.audit_checklist_id == AuditChecklist.id)\
+        .outerjoin(ChecklistQuestion, ChecklistQuestion.id == ChecklistResponse.question_id)\
+        .filter(AuditChecklist.status == 'Completed', AuditChecklist.completed_at.isnot(None))\
+        .group_by(AuditChecklist.id, AuditChecklist.completed_at, ChecklistTemplate.category)
+
+    if checklist_ids is not None:
+        query = query.filter(AuditChecklist.id.in_(checklist_ids))
+
+    return [{
+        'audit_checklist_id': checklist_id,
+        'day': completed_at.date(),
+        'category': category,
+        'checklists_completed': 1,
+        'yes_count': yes,
+        'no_count': no,
+        'na_count': na,
+        'critical_findings': critical,
+        'high_findings': high
+    } for checklist_id, completed_at, category, yes, no, na, critical, high in query.all()]
+
+
+def _deltas(entries):
+    """Suma las aportaciones por (día, categoría)"""
+    deltas = defaultdict(lambda: dict.fromkeys(ComplianceDailyRollup.COUNTERS, 0))
+    for entry in entries:
+        counters = deltas[(entry['day'], entry['category'])]
+        for name in ComplianceDailyRollup.COUNTERS:
+            counters[name] += entry[name]
+    return deltas
+
+
+def _apply(deltas, sign):
+    """Suma (o resta) los recuentos con UPDATE atómicos; inserta la fila si aún no existe"""
+    table = ComplianceDailyRollup.__table__
+    for (day, category), counters in deltas.items():
+        result = db.session.execute(
+            table.update()
+            .where(table.c.day == day, table.c.category == category)
+            .values({name: table.c[name] + sign * value for name, value in counters.items()})
+        )
+        if result.rowcount == 0 and sign > 0:
+            db.session.execute(table.insert().values(day=day, category=category, **counters))
+
+    if sign < 0:
+        # Días que se quedan sin checklists no aportan nada a las series
+        db.session.execute(table.delete().where(table.c.checklists_completed <= 0))
+
+
+def add_checklist(checklist):
+    """Suma un checklist recién completado y guarda su aportación (se llama antes del commit)"""
+    db.session.flush()
+    if db.session.get(ComplianceRollupEntry, checklist.id) is not None:
+        return  # Ya sumado
+    entries = _checklist_entries([checklist.id])
+    if entries:
+        db.session.execute(ComplianceRollupEntry.__table__.insert(), entries)
+        _apply(_deltas(entries), 1)
+
+
+def remove_checklist(checklist):
+    """Resta la aportación guardada de un checklist que se va a eliminar"""
+    table = ComplianceRollupEntry.__table__
+    row = db.session.execute(
+        db.select(table.c.day, table.c.category, *(table.c[name] for name in ComplianceDailyRollup.COUNTERS))
+        .where(table.c.audit_checklist_id == checklist.id)
+    ).first()
+    if row is not None:
+        _apply(_deltas([dict(row._mapping)]), -1)
+        db.session.execute(table.delete().where(table.c.audit_checklist_id == checklist.id))
+    elif checklist.status == 'Completed':
+        # Completado antes de que existieran las aportaciones: se resta el estado actual
+        _apply(_deltas(_checklist_entries([checklist.id])), -1)
+
+
+def backfill():
+    """Reconstruye el rollup completo a partir de todos los checklists completados (no hace commit)"""
+    entries = _checklist_entries()
+    deltas = _deltas(entries)
+    db.session.query(ComplianceDailyRollup).delete()
+    db.session.query(ComplianceRollupEntry).delete()
+    if entries:
+        db.session.execute(ComplianceRollupEntry.__table__.insert(), entries)
+    if deltas:
+        db.session.execute(ComplianceDailyRollup.__table__.insert(), [
+            dict(counters, day=day, category=category) for (day, category), counters in deltas.items()
+        ])
+    return len(deltas)
+
+
+def _period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _point(period, counters):
+    aplicables = counters['yes_count'] + counters['no_count']
+    return {
+        'period': period.isoformat(),
+        'checklists_completed': counters['checklists_completed'],
+        'yes_count': counters['yes_count'],
+        'no_count': counters['no_count'],
+        'na_count': counters['na_count'],
+        'findings': counters['no_count'],
+        'critical_findings': counters['critical_findings'],
+        'high_findings': counters['high_findings'],
+        'compliance_rate': round((counters['yes_count'] / aplicables * 100), 2) if aplicables > 0 else 0
+    }
+
+
+def trend(date_from, date_to, granularity='day', categories=None):
+    """Series de cumplimiento por categoría y total entre dos fechas (incluidas)"""
+    columns = [getattr(ComplianceDailyRollup, name) for name in ComplianceDailyRollup.COUNTERS]
+    query = db.session.query(ComplianceDailyRollup.day, ComplianceDailyRollup.category, *columns)\
+        .filter(ComplianceDailyRollup.day >= date_from, ComplianceDailyRollup.day <= date_to)
+    if categories:
+        query = query.filter(ComplianceDailyRollup.category.in_(categories))
+
+    empty = lambda: dict.fromkeys(ComplianceDailyRollup.COUNTERS, 0)
+    by_category = defaultdict(lambda: defaultdict(empty))
+    overall = defaultdict(empty)
+
+    for day, category, *values in query.all():
+        period = _period_start(day, granularity)
+        category_counters = by_category[category][period]
+        overall_counters = overall[period]
+        for name, value in zip(ComplianceDailyRollup.COUNTERS, values):
+            category_counters[name] += value
+            overall_counters[name] += value
+
+    return {
+        'categories': {
+            category: [_point(period, counters) for period, counters in sorted(periods.items())]
+            for category, periods in by_category.items()
+        },
+        'overall': [_point(period, counters) for period, counters in sorted(overall.items())]
+    }
+
+
+def _on_checklist_completed(sender, checklist, **extra):
+    add_checklist(checklist)
+
+
+def _on_checklist_deleting(sender, checklist, **extra):
+    remove_checklist(checklist)
+
+
+def init_app(app):
+    signals.checklist_completed.connect(_on_checklist_completed)
+    signals.checklist_deleting.connect(_on_checklist_deleting)
@@ -0,0 +1,108 @@
+"""
+Eventos de progreso por auditoría (``GET /api/audits/<id>/events``) por sondeo corto.
+
+No hay conexiones abiertas ni broker: los eventos se derivan del registro de
+cambios (``change_log``), que comparten todos los workers y sigue el orden de los
+commits. Cada petición es breve y no retiene un hilo del worker; el cliente pide
+los eventos posteriores a su cursor cada ``EVENTS_POLL_SECONDS``.
+
+Sin cursor (o con uno caducado por retención) se devuelve un evento 'snapshot'
+con el estado actual. Después, por cada página del registro:
+
+- ``progress``: checklists con respuestas nuevas o modificadas
+- ``checklist_started`` / ``checklist_completed``: checklist creado o completado
+- ``checklist_deleted``: checklist eliminado
+- ``audit_status``: estado actual de la auditoría si cambió
+"""
+from app import db
+from app.services import change_log
+
+
+def _progress_rows(audit_id, checklist_ids=None):
+    """(id, plantilla, estado, completado, respondidas, total) de los checklists con una consulta"""
+    from app.models.checklist import AuditChecklist, ChecklistResponse, ChecklistQuestion
+
+    answered = db.select(db.func.count(ChecklistResponse.id))\
+        .where(ChecklistResponse.audit_checklist_id == AuditChecklist.id).scalar_subquery()
+    total = db.select(db.func.count(ChecklistQuestion.id))\
+        .where(ChecklistQuestion.template_id == AuditChecklist.template_id).scalar_subquery()
+    query = db.session.query(AuditChecklist.id, AuditChecklist.template_id, AuditChecklist.status,
+                             AuditChecklist.completed_at, answered, total)\
+        .filter(AuditChecklist.audit_id == audit_id)
+    if checklist_ids is not None:
+        query = query.filter(AuditChecklist.id.in_(checklist_ids))
+    return query.order_by(AuditChecklist.id).all()
+
+
+def _progress_data(checklist_id, template_id, status, answered, total):
+    return {
+        'checklist_id': checklist_id,
+        'template_id': template_id,
+        'status': status,
+        'answered_questions': answered,
+        'total_questions': total,
+        'progress': round((answered / total * 100), 2) if total > 0 else 0
+    }
+
+
+def _event(audit_id, event_type, data):
+    return {'audit_id': audit_id, 'type': event_type, 'data': data}
+
+
+def snapshot(audit):
+    """Cursor actual y evento 'snapshot' (el cursor se lee antes que los datos)"""
+    cursor = change_log.current_cursor()
+    checklists = [_progress_data(checklist_id, template_id, status, answered, total)
+                  for checklist_id, template_id, status, _, answered, total in _progress_rows(audit.id)]
+    return {
+        'cursor': cursor,
+        'has_more': False,
+        'events': [_event(audit.id, 'snapshot', {'status': audit.status, 'checklists': checklists})]
+    }
+
+
+def events_since(audit, since, limit=500):
+    """Eventos derivados de las entradas del registro con seq > ``since``"""
+    from app.models.checklist import ChecklistResponse
+
+    rows, has_more, ops = change_log.entries_since(audit.id, since, limit)
+
+    changed_checklists = {entity_id for (entity, entity_id), op in ops.items()
+                          if entity == 'checklist' and op != 'delete'}
+    deleted_checklists = sorted(entity_id for (entity, entity_id), op in ops.items()
+                                if entity == 'checklist' and op == 'delete')
+    response_ids = [entity_id for (entity, entity_id), op in ops.items()
+                    if entity == 'response' and op != 'delete']
+
+    touched = set(changed_checklists)
+    if response_ids:
+        touched.update(db.session.scalars(
+            db.select(ChecklistResponse.audit_checklist_id)
+            .where(ChecklistResponse.id.in_(response_ids)).distinct()
+        ))
+    touched.difference_update(deleted_checklists)
+
+    events = []
+    for checklist_id, template_id, status, completed_at, answered, total in \
+            (_progress_rows(audit.id, touched) if touched else []):
+        data = _progress_data(checklist_id, template_id, status, answered, total)
+        if checklist_id not in changed_checklists:
+            event_type = 'progress'
+        elif status == 'Completed':
+            event_type = 'checklist_completed'
+            data['completed_at'] = completed_at.isoformat() if completed_at else None
+        else:
+            event_type = 'checklist_started'
+        events.append(_event(audit.id, event_type, data))
+
+    events.extend(_event(audit.id, 'checklist_deleted', {'checklist_id': checklist_id})
+                  for checklist_id in deleted_checklists)
+
+    if ('audit', audit.id) in ops:
+        events.append(_event(audit.id, 'audit_status', {'status': audit.status}))
+
+    return {
+        'cursor': rows[-1].seq if rows else since,
+        'has_more': has_more,
+        'events': events
+    }
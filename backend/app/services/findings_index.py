@@ -0,0 +1,102 @@
+"""
+Mantenimiento del índice de hallazgos (tabla ``findings``).
+
+Un hallazgo es una ``ChecklistResponse`` con respuesta 'No'. Al guardar una
+respuesta se inserta, actualiza o elimina su fila; al eliminar un checklist se
+borran las suyas. Severidad y categoría se copian de la pregunta y la plantilla
+para poder filtrar con índices compuestos sin recorrer todas las respuestas.
+"""
+from sqlalchemy import select, insert, update, delete
+
+from app import db
+from app import signals
+from app.models.finding import Finding
+
+
+def _finding_source():
+    """SELECT de (response_id, audit_id, checklist, pregunta, severidad, categoría, fecha) de las respuestas 'No'"""
+    from app.models.checklist import AuditChecklist, ChecklistTemplate, ChecklistResponse, ChecklistQuestion
+
+    return select(
+        ChecklistResponse.id,
+        AuditChecklist.audit_id,
+        ChecklistResponse.audit_checklist_id,
+        ChecklistResponse.question_id,
+        ChecklistQuestion.severity,
+        ChecklistTemplate.category,
+        ChecklistResponse.answered_at
+    ).join(AuditChecklist, AuditChecklist.id == ChecklistResponse.audit_checklist_id)\
+        .join(ChecklistTemplate, ChecklistTemplate.id == AuditChecklist.template_id)\
+        .join(ChecklistQuestion, ChecklistQuestion.id == ChecklistResponse.question_id)\
+        .where(ChecklistResponse.answer == 'No')
+
+
+_COLUMNS = ['response_id', 'audit_id', 'audit_checklist_id', 'question_id', 'severity', 'category', 'answered_at']
+
+
+def sync_response(response):
+    """Refleja en el índice el estado actual de una respuesta (se llama antes del commit)"""
+    from app.models.checklist import ChecklistResponse
+
+    db.session.flush()
+
+    if response.answer != 'No':
+        db.session.execute(delete(Finding).where(Finding.response_id == response.id))
+        return
+
+    row = db.session.execute(_finding_source().where(ChecklistResponse.id == response.id)).one()
+    values = dict(zip(_COLUMNS, row))
+    result = db.session.execute(
+        update(Finding).where(Finding.response_id == response.id).values(values)
+    )
+    if result.rowcount == 0:
+        db.session.execute(insert(Finding).values(values))
+
+
+def remove_checklist(checklist):
+    db.session.execute(delete(Finding).where(Finding.audit_checklist_id == checklist.id))
+
+
+def refresh_questions(question_ids):
+    """Recalcula severidad y categoría de los hallazgos de preguntas modificadas"""
+    from app.models.checklist import ChecklistTemplate, ChecklistQuestion
+
+    if not question_ids:
+        return
+    db.session.execute(
+        update(Finding)
+        .where(Finding.question_id.in_(question_ids))
+        .values(
+            severity=select(ChecklistQuestion.severity)
+            .where(ChecklistQuestion.id == Finding.question_id).scalar_subquery(),
+            category=select(ChecklistTemplate.category)
+            .join(ChecklistQuestion, ChecklistQuestion.template_id == ChecklistTemplate.id)
+            .where(ChecklistQuestion.id == Finding.question_id).scalar_subquery()
+        ),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def rebuild():
+    """Reconstruye el índice completo con un único INSERT ... SELECT (no hace commit)"""
+    db.session.execute(delete(Finding))
+    db.session.execute(insert(Finding).from_select(_COLUMNS, _finding_source()))
+    return db.session.query(db.func.count(Finding.id)).scalar()
+
+
+def _on_response_saved(sender, response, **extra):
+    sync_response(response)
+
+
+def _on_checklist_deleting(sender, checklist, **extra):
+    remove_checklist(checklist)
+
+
+def _on_questions_changed(sender, question_ids, **extra):
+    refresh_questions(question_ids)
+
+
+def init_app(app):
+    signals.response_saved.connect(_on_response_saved)
+    signals.checklist_deleting.connect(_on_checklist_deleting)
+    signals.questions_changed.connect(_on_questions_changed)
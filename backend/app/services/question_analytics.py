@@ -0,0 +1,267 @@
+"""
+Analítica de fallos por pregunta con NumPy.
+
+Las respuestas se cargan una sola vez en columnas NumPy (pregunta, auditoría,
+respuesta, mes) y todas las métricas se calculan con operaciones vectorizadas
+(``bincount``, máscaras, producto de matrices) en lugar de recorrer objetos ORM.
+El dataset se conserva en memoria mientras no cambie el marcador de datos de
+las respuestas (número, id máximo y última fecha de respuesta) ni la versión de
+las plantillas, que son consultas baratas; así cada worker detecta también los
+cambios hechos por los demás.
+"""
+import threading
+
+import numpy as np
+
+from app import db
+
+# Códigos de respuesta en la columna ``answers``
+YES, NO, NA = 0, 1, 2
+_ANSWER_CODES = {'Yes': YES, 'No': NO, 'N/A': NA}
+
+_dataset = None
+_dataset_lock = threading.Lock()
+
+
+class QuestionDataset:
+    """Respuestas en formato columnar más los metadatos de preguntas y categorías"""
+
+    def __init__(self, marker, question_idx, audit_idx, checklist_idx, answers, months,
+                 question_ids, question_texts, question_severities, question_category_idx,
+                 categories, audit_ids, checklist_ids, checklist_audit_idx):
+        self.marker = marker
+        self.question_idx = question_idx        # int32, índice en question_ids
+        self.audit_idx = audit_idx              # int32, índice en audit_ids
+        self.checklist_idx = checklist_idx      # int32, índice en checklist_ids
+        self.answers = answers                  # int8, YES / NO / NA
+        self.months = months                    # datetime64[M] de answered_at
+        self.question_ids = question_ids
+        self.question_texts = question_texts
+        self.question_severities = question_severities
+        self.question_category_idx = question_category_idx
+        self.categories = categories
+        self.audit_ids = audit_ids
+        self.checklist_ids = checklist_ids
+        self.checklist_audit_idx = checklist_audit_idx  # auditoría de cada checklist
+
+    def __len__(self):
+        return len(self.answers)
+
+
+def data_marker():
+    """
+    Cambia cada vez que se crea, modifica o elimina una respuesta o pregunta, y con
+    cada actualización de plantillas (texto, severidad o categoría)
+    """
+    from app.models.checklist import ChecklistResponse, ChecklistQuestion
+    from app.models.meta import AppMeta
+
+    responses = db.session.query(
+        db.func.count(ChecklistResponse.id),
+        db.func.max(ChecklistResponse.id),
+        db.func.max(ChecklistResponse.answered_at)
+    ).one()
+    questions = db.session.query(
+        db.func.count(ChecklistQuestion.id),
+        db.func.max(ChecklistQuestion.id)
+    ).one()
+    templates_version = AppMeta.get_values(['templates_version']).get('templates_version')
+    parts = tuple(responses) + tuple(questions) + (templates_version,)
+    return ':'.join('' if value is None else str(value) for value in parts)
+
+
+def load_dataset(marker):
+    """Carga todas las respuestas en arrays NumPy (dos consultas, sin objetos ORM)"""
+    from app.models.checklist import AuditChecklist, ChecklistTemplate, ChecklistResponse, ChecklistQuestion
+
+    question_rows = db.session.query(
+        ChecklistQuestion.id, ChecklistQuestion.question_text,
+        ChecklistQuestion.severity, ChecklistTemplate.category
+    ).join(ChecklistTemplate, ChecklistTemplate.id == ChecklistQuestion.template_id)\
+        .order_by(ChecklistQuestion.id).all()
+
+    question_ids = np.array([row[0] for row in question_rows], dtype=np.int64)
+    categories = sorted({row[3] for row in question_rows})
+    category_positions = {category: i for i, category in enumerate(categories)}
+
+    rows = db.session.execute(
+        db.select(
+            ChecklistResponse.question_id,
+            AuditChecklist.audit_id,
+            ChecklistResponse.audit_checklist_id,
+            ChecklistResponse.answer,
+            ChecklistResponse.answered_at
+        ).join(AuditChecklist, AuditChecklist.id == ChecklistResponse.audit_checklist_id)
+    ).all()
+    count = len(rows)
+
+    raw_questions = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    raw_audits = np.fromiter((row[1] for row in rows), dtype=np.int64, count=count)
+    raw_checklists = np.fromiter((row[2] for row in rows), dtype=np.int64, count=count)
+    answers = np.fromiter((_ANSWER_CODES.get(row[3], NA) for row in rows), dtype=np.int8, count=count)
+    months = np.array([row[4] for row in rows], dtype='datetime64[us]').astype('datetime64[M]') \
+        if count else np.array([], dtype='datetime64[M]')
+
+    audit_ids, audit_idx = np.unique(raw_audits, return_inverse=True)
+    question_idx = np.searchsorted(question_ids, raw_questions)
+    checklist_ids, first_row, checklist_idx = np.unique(raw_checklists, return_index=True, return_inverse=True)
+
+    return QuestionDataset(
+        marker=marker,
+        question_idx=question_idx.astype(np.int32),
+        audit_idx=audit_idx.astype(np.int32),
+        checklist_idx=checklist_idx.astype(np.int32),
+        answers=answers,
+        months=months,
+        question_ids=question_ids,
+        question_texts=[row[1] for row in question_rows],
+        question_severities=[row[2] for row in question_rows],
+        question_category_idx=np.array([category_positions[row[3]] for row in question_rows], dtype=np.int32),
+        categories=categories,
+        audit_ids=audit_ids,
+        checklist_ids=checklist_ids,
+        checklist_audit_idx=audit_idx[first_row].astype(np.int32)
+    )
+
+
+def get_dataset():
+    """Dataset en memoria, recargado solo si cambió el marcador de datos"""
+    global _dataset
+
+    marker = data_marker()
+    current = _dataset
+    if current is not None and current.marker == marker:
+        return current
+
+    with _dataset_lock:
+        if _dataset is None or _dataset.marker != marker:
+            _dataset = load_dataset(marker)
+        return _dataset
+
+
+def _rates(numerator, denominator):
+    """Cociente elemento a elemento con 0 donde el denominador es 0"""
+    numerator = numerator.astype(np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def _answer_counts(index, answers, size):
+    """Recuentos Yes/No/N/A por índice con un único bincount"""
+    counts = np.bincount(index.astype(np.int64) * 3 + answers, minlength=size * 3).reshape(size, 3)
+    return counts[:, YES], counts[:, NO], counts[:, NA]
+
+
+def compute_heatmap(dataset, categories=None, since=None, until=None, top=20, min_answers=1):
+    """
+    Tasas de fallo y N/A por pregunta y categoría, su evolución mensual y la
+    correlación de co-fallos (phi) entre las ``top`` preguntas que más fallan.
+    """
+    mask = np.ones(len(dataset), dtype=bool)
+    if categories:
+        wanted = np.isin(dataset.question_category_idx,
+                         [dataset.categories.index(c) for c in categories if c in dataset.categories])
+        mask &= wanted[dataset.question_idx]
+    if since is not None:
+        mask &= dataset.months >= np.datetime64(since, 'M')
+    if until is not None:
+        mask &= dataset.months <= np.datetime64(until, 'M')
+
+    question_idx = dataset.question_idx[mask]
+    audit_idx = dataset.audit_idx[mask]
+    answers = dataset.answers[mask]
+    months = dataset.months[mask]
+    question_count = len(dataset.question_ids)
+    audits_present = np.bincount(audit_idx, minlength=len(dataset.audit_ids)) > 0
+
+    # 1. Por pregunta
+    yes, no, na = _answer_counts(question_idx, answers, question_count)
+    answered = yes + no + na
+    failure_rate = _rates(no, yes + no)
+    na_rate = _rates(na, answered)
+
+    eligible = np.flatnonzero(answered >= max(min_answers, 1))
+    # Orden: mayor tasa de fallo, luego más fallos absolutos
+    ranked = eligible[np.lexsort((-no[eligible], -failure_rate[eligible]))]
+    top_questions = ranked[:top]
+
+    questions = [{
+        'question_id': int(dataset.question_ids[q]),
+        'question_text': dataset.question_texts[q],
+        'severity': dataset.question_severities[q],
+        'category': dataset.categories[dataset.question_category_idx[q]],
+        'answered': int(answered[q]),
+        'yes_count': int(yes[q]),
+        'no_count': int(no[q]),
+        'na_count': int(na[q]),
+        'failure_rate': round(float(failure_rate[q]) * 100, 2),
+        'na_rate': round(float(na_rate[q]) * 100, 2)
+    } for q in top_questions]
+
+    # 2. Por categoría
+    response_category = dataset.question_category_idx[question_idx]
+    category_count = len(dataset.categories)
+    c_yes, c_no, c_na = _answer_counts(response_category, answers, category_count)
+    c_failure = _rates(c_no, c_yes + c_no)
+    c_na_rate = _rates(c_na, c_yes + c_no + c_na)
+    by_category = [{
+        'category': category,
+        'answered': int(c_yes[i] + c_no[i] + c_na[i]),
+        'no_count': int(c_no[i]),
+        'failure_rate': round(float(c_failure[i]) * 100, 2),
+        'na_rate': round(float(c_na_rate[i]) * 100, 2)
+    } for i, category in enumerate(dataset.categories) if c_yes[i] + c_no[i] + c_na[i] > 0]
+
+    # 3. Evolución mensual de la tasa de fallo por categoría (celdas sin datos = None)
+    timeline = {'periods': [], 'categories': {}}
+    if len(months):
+        # Meses como enteros desde el primero: bincount en vez de np.unique (sin ordenar)
+        month_numbers = months.astype(np.int64)
+        first_month = month_numbers.min()
+        month_offsets = month_numbers - first_month
+        present = np.flatnonzero(np.bincount(month_offsets))
+        periods = (present + first_month).astype('datetime64[M]')
+        period_lookup = np.zeros(present[-1] + 1, dtype=np.int64)
+        period_lookup[present] = np.arange(len(present))
+        period_idx = period_lookup[month_offsets]
+        cell = response_category.astype(np.int64) * len(periods) + period_idx
+        t_yes, t_no, _ = _answer_counts(cell, answers, category_count * len(periods))
+        t_applicable = (t_yes + t_no).reshape(category_count, len(periods))
+        t_failure = _rates(t_no.reshape(category_count, len(periods)), t_applicable)
+        timeline['periods'] = [str(p) for p in periods]
+        for i, category in enumerate(dataset.categories):
+            if t_applicable[i].any():
+                timeline['categories'][category] = [
+                    round(float(rate) * 100, 2) if applicable else None
+                    for rate, applicable in zip(t_failure[i], t_applicable[i])
+                ]
+
+    # 4. Co-fallos: matriz binaria preguntas × auditorías solo para las top
+    co_failure = {'question_ids': [int(dataset.question_ids[q]) for q in top_questions],
+                  'counts': [], 'correlation': []}
+    if len(top_questions) and len(audit_idx):
+        position = np.full(question_count, -1, dtype=np.int64)
+        position[top_questions] = np.arange(len(top_questions))
+        failed = (answers == NO) & (position[question_idx] >= 0)
+        # Columna de cada auditoría con respuestas en el filtro (las que no fallan nada cuentan como ceros)
+        audit_columns = np.cumsum(audits_present) - 1
+
+        matrix = np.zeros((len(top_questions), int(audits_present.sum())), dtype=np.float32)
+        matrix[position[question_idx[failed]], audit_columns[audit_idx[failed]]] = 1.0
+
+        counts = matrix @ matrix.T
+        if matrix.shape[1] > 1:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                correlation = np.nan_to_num(np.corrcoef(matrix))
+        else:
+            correlation = np.zeros_like(counts)
+        co_failure['counts'] = counts.astype(np.int64).tolist()
+        co_failure['correlation'] = np.round(np.atleast_2d(correlation), 4).tolist()
+
+    return {
+        'responses': int(mask.sum()),
+        'audits': int(audits_present.sum()),
+        'questions': questions,
+        'categories': by_category,
+        'timeline': timeline,
+        'co_failure': co_failure
+    }
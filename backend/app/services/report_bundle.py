@@ -0,0 +1,149 @@
+"""
+Paquete ZIP con el reporte de una auditoría en todos los formatos (``format=bundle``).
+
+Los datos se preparan una sola vez (la instantánea de ``report_data`` queda
+guardada antes de empezar) y los formatos que no están ya en el almacén se
+renderizan a la vez en un pool propio (un hilo por formato), sin esperar a los
+pre-renderizados del pool de ``report_prerender``. Si ya hay un pre-renderizado
+en curso del mismo formato y versión se espera a ese en lugar de repetirlo. El ZIP
+se escribe en streaming: cada fichero se envía en cuanto termina su render, sin
+construir el archivo completo en memoria.
+"""
+import io
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from flask import Response, current_app, stream_with_context
+
+from app import db
+from app.services import report_data, report_registry, report_prerender, report_store
+from app.utils import tracing
+
+BUNDLE_FORMATS = ('pdf', 'xlsx', 'csv')
+
+# Tamaño de los bloques al copiar ficheros del almacén al ZIP
+_COPY_CHUNK_SIZE = 64 * 1024
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    # Los hilos no sobreviven al fork de gunicorn: un pool por proceso
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=len(BUNDLE_FORMATS), thread_name_prefix='report-bundle')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+class _ZipSink(io.RawIOBase):
+    """Destino no posicionable para ``zipfile``: acumula lo escrito hasta que se recoge"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        """Lo escrito desde la última llamada (como iterable vacío si no hay nada)"""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return (data,) if data else ()
+
+
+def _render_in_worker(app, audit_id, report_format, version, detail, trace_context=None):
+    """Bytes del reporte, o el fichero abierto del pre-renderizado en curso si lo había"""
+    from app.models.audit import Audit
+
+    with app.app_context(), tracing.use_context(trace_context):
+        try:
+            # El pre-renderizado solo genera la versión sin anexo
+            stored = None if detail else report_prerender.wait_inflight(audit_id, report_format, version)
+            if stored is not None:
+                return stored
+            audit = db.session.get(Audit, audit_id)
+            return report_prerender.render(audit, report_format, version, detail)
+        finally:
+            db.session.remove()
+
+
+def _entries(audit, detail):
+    """Genera ``(formato, fichero abierto o bytes)`` a medida que cada formato está listo"""
+    app = current_app._get_current_object()
+    store = report_store.get_store()
+    version = report_data.data_version(audit.id)
+
+    # Una sola preparación de datos para los tres renders
+    report_data.get_report_data(audit, version)
+
+    pending = {}
+    executor = get_executor()
+    for report_format in BUNDLE_FORMATS:
+        stored = store.open(audit.id, report_format, version, detail)
+        if stored is not None:
+            yield report_format, stored
+        else:
+            future = executor.submit(_render_in_worker, app, audit.id, report_format, version, detail,
+                                     tracing.current_context())
+            pending[future] = report_format
+
+    completed = audit.status == 'Completed'
+    for future in as_completed(pending):
+        report_format = pending[future]
+        content = future.result()
+        if completed and isinstance(content, bytes):
+            store.put(audit.id, report_format, version, content, detail)
+        yield report_format, content
+
+
+def stream_bundle(audit, filename_base, detail=False, trace_context=None):
+    """Generador de los bytes del ZIP (usar con ``stream_with_context``)"""
+    sink = _ZipSink()
+    timestamp = datetime.now().timetuple()[:6]
+
+    # Abarca la preparación, los renders y la transferencia del ZIP completo; el
+    # generador se consume después de la vista, así que la traza se pasa explícita
+    with tracing.use_context(trace_context), \
+            tracing.span('report.bundle', **{'report.detail': detail}) as bundling, \
+            zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        for report_format, source in _entries(audit, detail):
+            bundling.set_attributes(**{f'report.{report_format}': 'rendered' if isinstance(source, bytes) else 'stored'})
+            extension = report_registry.get_format_info(report_format)['extension']
+            info = zipfile.ZipInfo(f'{filename_base}.{extension}', date_time=timestamp)
+            # PDF y XLSX ya van comprimidos
+            info.compress_type = zipfile.ZIP_DEFLATED if report_format == 'csv' else zipfile.ZIP_STORED
+
+            with bundle.open(info, 'w') as entry:
+                if isinstance(source, bytes):
+                    entry.write(source)
+                else:
+                    with source as f:
+                        while True:
+                            chunk = f.read(_COPY_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            entry.write(chunk)
+                            yield from sink.drain()
+            yield from sink.drain()
+
+    yield from sink.drain()
+
+
+def bundle_response(audit, filename_base, detail=False):
+    """Respuesta en streaming con el ZIP (el tamaño no se conoce de antemano)"""
+    return Response(
+        stream_with_context(stream_bundle(audit, filename_base, detail, tracing.current_context())),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{filename_base}.zip"'}
+    )
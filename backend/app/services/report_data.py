@@ -0,0 +1,272 @@
+"""
+Modelo de datos de los reportes de una auditoría.
+
+``build_report_data`` recorre una sola vez las preguntas de todos los checklists
+(con su respuesta, si la hay) y calcula los agregados que usan todos los formatos:
+totales, cumplimiento, riesgo ponderado, desglose por severidad y hallazgos
+críticos/altos.
+
+El resultado se guarda en ``report_snapshots`` como JSON comprimido junto a la
+versión de los datos (``data_version``). PDF, XLSX, CSV, la vista previa y los
+re-renderizados leen esa instantánea mientras la versión no cambie.
+"""
+import hashlib
+import json
+import zlib
+from datetime import datetime
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app import db
+from app.utils import tracing
+
+# Se incluye en la versión: cambiar la estructura invalida instantáneas y reportes guardados
+SNAPSHOT_FORMAT = 3
+
+_ANSWER_KEYS = {'Yes': 'yes', 'No': 'no', 'N/A': 'na'}
+
+
+def data_version(audit_id):
+    """Huella de todo lo que aparece en el reporte de la auditoría (consultas agregadas)"""
+    from app.models.audit import Audit
+    from app.models.checklist import AuditChecklist, ChecklistResponse
+    from app.models.meta import AppMeta
+    from app.models.user import User
+
+    audit = db.session.query(
+        Audit.name, Audit.description, Audit.status, Audit.created_at, Audit.completed_at
+    ).filter(Audit.id == audit_id).one()
+    checklists = db.session.query(
+        db.func.count(AuditChecklist.id),
+        db.func.max(AuditChecklist.id),
+        db.func.max(AuditChecklist.completed_at)
+    ).filter(AuditChecklist.audit_id == audit_id).one()
+    responses = db.session.query(
+        db.func.count(ChecklistResponse.id),
+        db.func.max(ChecklistResponse.id),
+        db.func.max(ChecklistResponse.answered_at)
+    ).join(AuditChecklist, AuditChecklist.id == ChecklistResponse.audit_checklist_id)\
+        .filter(AuditChecklist.audit_id == audit_id).one()
+    # El anexo por pregunta muestra el nombre de quien respondió: renombrar un usuario cambia la versión
+    answerers = db.session.query(User.id, User.name)\
+        .join(ChecklistResponse, ChecklistResponse.answered_by == User.id)\
+        .join(AuditChecklist, AuditChecklist.id == ChecklistResponse.audit_checklist_id)\
+        .filter(AuditChecklist.audit_id == audit_id).distinct().order_by(User.id).all()
+    from app.services import risk_scoring
+
+    meta = AppMeta.get_values(['templates_version', risk_scoring.WEIGHTS_KEY])
+    # Los pesos de riesgo cambian la puntuación que muestra el reporte
+    weights = risk_scoring.weights_fingerprint(risk_scoring.load_weights(meta.get(risk_scoring.WEIGHTS_KEY) or ''))
+
+    parts = (SNAPSHOT_FORMAT,) + tuple(audit) + tuple(checklists) + tuple(responses) \
+        + (meta.get('templates_version'), weights) \
+        + tuple(f'{user_id}={name}' for user_id, name in answerers)
+    raw = '\x1f'.join('' if value is None else str(value) for value in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _empty_counts():
+    return {'total': 0, 'yes': 0, 'no': 0, 'na': 0, 'unanswered': 0}
+
+
+def _summary(severity_stats):
+    """Resumen de un checklist (o del total) a partir de sus recuentos por severidad"""
+    total = sum(stats['total'] for stats in severity_stats.values())
+    yes_count = sum(stats['yes'] for stats in severity_stats.values())
+    no_count = sum(stats['no'] for stats in severity_stats.values())
+    na_count = sum(stats['na'] for stats in severity_stats.values())
+    unanswered = sum(stats['unanswered'] for stats in severity_stats.values())
+    preguntas_aplicables = yes_count + no_count
+
+    return {
+        'total_questions': total,
+        'answered_questions': total - unanswered,
+        'unanswered_questions': unanswered,
+        'yes_count': yes_count,
+        'no_count': no_count,
+        'na_count': na_count,
+        'preguntas_aplicables': preguntas_aplicables,
+        'compliance_rate': round((yes_count / preguntas_aplicables * 100), 2) if preguntas_aplicables > 0 else 0,
+        'severity_breakdown': severity_stats
+    }
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def build_report_data(audit, version=None, weights=None):
+    """Calcula los datos del reporte con una consulta y una pasada sobre sus filas"""
+    from app.models.checklist import AuditChecklist, ChecklistTemplate, ChecklistResponse, ChecklistQuestion
+    from app.services import risk_scoring
+
+    rows = db.session.query(
+        AuditChecklist.id,
+        AuditChecklist.template_id,
+        AuditChecklist.status,
+        ChecklistTemplate.name,
+        ChecklistTemplate.category,
+        ChecklistQuestion.id,
+        ChecklistQuestion.severity,
+        ChecklistResponse.answer
+    ).join(ChecklistTemplate, ChecklistTemplate.id == AuditChecklist.template_id)\
+        .outerjoin(ChecklistQuestion, ChecklistQuestion.template_id == AuditChecklist.template_id)\
+        .outerjoin(ChecklistResponse, db.and_(
+            ChecklistResponse.audit_checklist_id == AuditChecklist.id,
+            ChecklistResponse.question_id == ChecklistQuestion.id
+        ))\
+        .filter(AuditChecklist.audit_id == audit.id)\
+        .order_by(AuditChecklist.id, ChecklistQuestion.order, ChecklistResponse.id)\
+        .all()
+
+    # Última respuesta por (checklist, pregunta)
+    checklists = {}
+    for checklist_id, template_id, status, name, category, question_id, severity, answer in rows:
+        checklist = checklists.get(checklist_id)
+        if checklist is None:
+            checklist = checklists[checklist_id] = {
+                'id': checklist_id,
+                'template_id': template_id,
+                'name': name,
+                'category': category,
+                'status': status,
+                'answers': {}
+            }
+        if question_id is not None:
+            checklist['answers'][question_id] = (severity, answer)
+
+    weights = weights or risk_scoring.load_weights()
+    totals_by_severity = {}
+    risk_failures = risk_applicable = 0.0
+    findings = {'Critical': [], 'High': []}
+    for checklist in checklists.values():
+        severity_stats = {}
+        for severity, answer in checklist.pop('answers').values():
+            for stats in (severity_stats.setdefault(severity, _empty_counts()),
+                          totals_by_severity.setdefault(severity, _empty_counts())):
+                stats['total'] += 1
+                stats[_ANSWER_KEYS.get(answer, 'unanswered')] += 1
+
+        summary = _summary(severity_stats)
+        checklist['summary'] = summary
+        checklist['progress'] = round((summary['answered_questions'] / summary['total_questions'] * 100), 2) \
+            if summary['total_questions'] > 0 else 0
+        failures, applicable = risk_scoring.weighted_counts(severity_stats, checklist['category'], weights)
+        checklist['risk'] = risk_scoring.entry(failures, applicable)
+        risk_failures += failures
+        risk_applicable += applicable
+        for severity in findings:
+            if severity_stats.get(severity, {}).get('no'):
+                findings[severity].append({'checklist': checklist['name'], 'count': severity_stats[severity]['no']})
+
+    return {
+        'format': SNAPSHOT_FORMAT,
+        'version': version,
+        'generated_at': datetime.utcnow().isoformat(),
+        'audit': {
+            'id': audit.id,
+            'name': audit.name,
+            'description': audit.description,
+            'status': audit.status,
+            'created_at': _iso(audit.created_at),
+            'started_at': _iso(audit.started_at),
+            'completed_at': _iso(audit.completed_at)
+        },
+        'totals': _summary(totals_by_severity),
+        'risk': risk_scoring.entry(risk_failures, risk_applicable),
+        'checklists': list(checklists.values()),
+        'findings': findings
+    }
+
+
+def iter_detail_rows(audit_id, chunk_size=500):
+    """
+    Filas del anexo de detalle (una por pregunta de cada checklist, respondida o no)
+    en orden de checklist y pregunta. Una sola consulta leída por bloques con
+    ``yield_per``: no se cargan objetos ORM ni todas las filas a la vez.
+    """
+    from app.models.checklist import AuditChecklist, ChecklistTemplate, ChecklistResponse, ChecklistQuestion
+    from app.models.user import User
+
+    statement = db.select(
+        AuditChecklist.id.label('checklist_id'),
+        ChecklistTemplate.name.label('checklist'),
+        ChecklistTemplate.category,
+        ChecklistQuestion.order,
+        ChecklistQuestion.question_text,
+        ChecklistQuestion.severity,
+        ChecklistResponse.answer,
+        ChecklistResponse.notes,
+        User.name.label('answered_by'),
+        ChecklistResponse.answered_at
+    ).select_from(AuditChecklist)\
+        .join(ChecklistTemplate, ChecklistTemplate.id == AuditChecklist.template_id)\
+        .join(ChecklistQuestion, ChecklistQuestion.template_id == AuditChecklist.template_id)\
+        .outerjoin(ChecklistResponse, db.and_(
+            ChecklistResponse.audit_checklist_id == AuditChecklist.id,
+            ChecklistResponse.question_id == ChecklistQuestion.id
+        ))\
+        .outerjoin(User, User.id == ChecklistResponse.answered_by)\
+        .where(AuditChecklist.audit_id == audit_id)\
+        .order_by(AuditChecklist.id, ChecklistQuestion.order, ChecklistQuestion.id, ChecklistResponse.id)\
+        .execution_options(yield_per=chunk_size)
+
+    for row in db.session.execute(statement):
+        yield row
+
+
+def _pack(data):
+    return zlib.compress(json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+def get_report_data(audit, version=None):
+    """
+    Datos del reporte de la versión actual: desde ``report_snapshots`` si la
+    instantánea guardada es de esa versión; si no, se calculan y se guardan en una
+    transacción propia, sin confirmar la sesión de la petición.
+    """
+    from app.models.snapshot import ReportSnapshot
+
+    with tracing.span('report.data', **{'audit.id': audit.id}) as preparation:
+        version = version or data_version(audit.id)
+        snapshot = db.session.query(ReportSnapshot.version, ReportSnapshot.data)\
+            .filter(ReportSnapshot.audit_id == audit.id).first()
+        if snapshot is not None and snapshot.version == version:
+            preparation.set_attributes(**{'report.snapshot': 'hit'})
+            return _unpack(snapshot.data)
+
+        preparation.set_attributes(**{'report.snapshot': 'build'})
+        data = build_report_data(audit, version)
+        _save_snapshot(audit.id, version, _pack(data))
+        return data
+
+
+def _save_snapshot(audit_id, version, blob):
+    from app.models.snapshot import ReportSnapshot
+
+    table = ReportSnapshot.__table__
+    values = {'version': version, 'data': blob, 'created_at': datetime.utcnow()}
+    try:
+        with db.engine.begin() as conn:
+            updated = conn.execute(update(table).where(table.c.audit_id == audit_id).values(**values)).rowcount
+            if not updated:
+                conn.execute(insert(table).values(audit_id=audit_id, **values))
+    except IntegrityError:
+        # Otro worker guardó la misma instantánea a la vez: la nuestra es equivalente
+        pass
+    except OperationalError as e:
+        # Es una caché: si no se puede escribir ahora (BD bloqueada) se recalcula la próxima vez
+        print(f'⚠️  Report snapshot not saved for audit {audit_id}: {str(e)}')
+
+
+def discard(audit_id):
+    """Elimina la instantánea de una auditoría (no hace commit)"""
+    from app.models.snapshot import ReportSnapshot
+
+    db.session.query(ReportSnapshot).filter(ReportSnapshot.audit_id == audit_id)\
+        .delete(synchronize_session=False)
@@ -1,21 +1,99 @@
 from datetime import datetime
 from io import BytesIO, StringIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.colors import HexColor
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, KeepTogether
-from reportlab.lib.enums import TA_CENTER
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 import csv
 
+# Filas por tabla del anexo de detalle en el PDF
+DETAIL_CHUNK_ROWS = 25
+
+_ANSWER_LABELS = {'Yes': 'Sí', 'No': 'No', 'N/A': 'N/A'}
+_DETAIL_HEADER = ['Checklist', '#', 'Pregunta', 'Severidad', 'Respuesta', 'Notas', 'Respondida por', 'Fecha']
+_RISK_LEVELS = {'Low': 'Bajo', 'Medium': 'Medio', 'High': 'Alto', 'Critical': 'Crítico'}
+
+
+def _format_date(value):
+    """Fecha ISO de la instantánea como dd/mm/aaaa hh:mm"""
+    return datetime.fromisoformat(value).strftime('%d/%m/%Y %H:%M') if value else None
+
+
+def _risk_label(risk):
+    """Puntuación de riesgo ponderada como '42.5 / 100 (Alto)'"""
+    if not risk or risk['level'] is None:
+        return 'Sin respuestas aplicables'
+    return f"{risk['score']} / 100 ({_RISK_LEVELS.get(risk['level'], risk['level'])})"
+
+
+def _detail_values(row, sev_map):
+    """Valores de una fila del anexo (ver report_data.iter_detail_rows)"""
+    return [
+        row.checklist,
+        row.order,
+        row.question_text,
+        sev_map.get(row.severity, row.severity),
+        _ANSWER_LABELS.get(row.answer, 'Sin responder'),
+        row.notes or '',
+        row.answered_by or '',
+        row.answered_at.strftime('%d/%m/%Y %H:%M') if row.answered_at else ''
+    ]
+
+
+class _LazyStory(list):
+    """
+    Lista de flowables que se rellena desde un generador a medida que ReportLab
+    la consume (``build`` saca los elementos del principio). Solo se mantienen en
+    memoria unos pocos flowables por delante, no el anexo completo.
+    """
+
+    LOOKAHEAD = 4
+
+    def __init__(self, head, tail):
+        super().__init__(head)
+        self._tail = iter(tail)
+
+    def _fill(self, size):
+        while self._tail is not None and list.__len__(self) < size:
+            try:
+                self.append(next(self._tail))
+            except StopIteration:
+                self._tail = None
+
+    def __len__(self):
+        self._fill(self.LOOKAHEAD)
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.stop is not None:
+                self._fill(index.stop)
+        else:
+            self._fill(index + 1)
+        return super().__getitem__(index)
+
+
 class ReportGenerator:
-    """Generador de reportes en múltiples formatos para auditorías"""
+    """
+    Generador de reportes en múltiples formatos para auditorías.
+    Todos reciben los datos ya agregados de app/services/report_data.py.
+    ReportLab y openpyxl se importan dentro de cada método para no cargarlos al
+    arrancar la app (ver app/services/report_registry.py).
+    """
     
     @staticmethod
-    def generate_pdf_report(audit, checklist_data):
-        """Genera reporte de auditoría en formato PDF"""
+    def generate_pdf_report(report, details=None):
+        """
+        Genera reporte de auditoría en formato PDF. Con ``details`` (filas de
+        report_data.iter_detail_rows) añade el anexo por pregunta, que se construye
+        por bloques de tablas a medida que se maqueta.
+        """
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.lib.colors import HexColor
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, KeepTogether
+        from reportlab.lib.enums import TA_CENTER
+
+        audit = report['audit']
+        totals = report['totals']
+
         buffer = BytesIO()
         doc = SimpleDocTemplate(
             buffer,
@@ -52,52 +130,33 @@ class ReportGenerator:
         story.append(Spacer(1, 0.5*inch))
 
         audit_info = f"""
-        <b>Nombre de la auditoría:</b> {audit.name}<br/>
-        <b>Estado:</b> {audit.status}<br/>
-        <b>Fecha de inicio:</b> {audit.created_at.strftime('%d/%m/%Y %H:%M')}<br/>
-        <b>Fecha de cierre:</b> {audit.completed_at.strftime('%d/%m/%Y %H:%M') if audit.completed_at else 'En progreso'}<br/>
+        <b>Nombre de la auditoría:</b> {audit['name']}<br/>
+        <b>Estado:</b> {audit['status']}<br/>
+        <b>Fecha de inicio:</b> {_format_date(audit['created_at'])}<br/>
+        <b>Fecha de cierre:</b> {_format_date(audit['completed_at']) or 'En progreso'}<br/>
         """
         story.append(Paragraph(audit_info, styles['Normal']))
 
-        if audit.description:
+        if audit['description']:
             story.append(Spacer(1, 0.3*inch))
-            story.append(Paragraph(f"<b>Descripción:</b><br/>{audit.description}", styles['Normal']))
+            story.append(Paragraph(f"<b>Descripción:</b><br/>{audit['description']}", styles['Normal']))
 
         story.append(PageBreak())
 
         # RESUMEN EJECUTIVO
         story.append(Paragraph("Resumen Ejecutivo", heading_style))
 
-        total_questions = 0
-        total_yes = 0
-        total_no = 0
-        total_na = 0
-        critical_findings = []
-        high_findings = []
-
-        for checklist in checklist_data:
-            summary = checklist['summary']
-            total_questions += summary['total_questions']
-            total_yes += summary['yes_count']
-            total_no += summary['no_count']
-            total_na += summary['na_count']
-            
-            for severity, stats in summary['severity_breakdown'].items():
-                if severity == 'Critical' and stats['no'] > 0:
-                    critical_findings.append({'checklist': checklist['name'], 'count': stats['no']})
-                elif severity == 'High' and stats['no'] > 0:
-                    high_findings.append({'checklist': checklist['name'], 'count': stats['no']})
-
-        preguntas_aplicables = total_yes + total_no
-        tasa_cumplimiento = round((total_yes / preguntas_aplicables * 100), 2) if preguntas_aplicables > 0 else 0
+        critical_findings = report['findings']['Critical']
+        high_findings = report['findings']['High']
 
         summary_text = f"""
-        <b>Total de Preguntas Evaluadas:</b> {total_questions}<br/>
-        <b>Preguntas Aplicables:</b> {preguntas_aplicables} <i>(excluye N/A)</i><br/>
-        <b>Cumple (Sí):</b> {total_yes}<br/>
-        <b>No Cumple (No):</b> {total_no}<br/>
-        <b>No Aplica (N/A):</b> {total_na}<br/>
-        <b>Tasa de Cumplimiento:</b> {tasa_cumplimiento}%<br/>
+        <b>Total de Preguntas Evaluadas:</b> {totals['total_questions']}<br/>
+        <b>Preguntas Aplicables:</b> {totals['preguntas_aplicables']} <i>(excluye N/A)</i><br/>
+        <b>Cumple (Sí):</b> {totals['yes_count']}<br/>
+        <b>No Cumple (No):</b> {totals['no_count']}<br/>
+        <b>No Aplica (N/A):</b> {totals['na_count']}<br/>
+        <b>Tasa de Cumplimiento:</b> {totals['compliance_rate']}%<br/>
+        <b>Riesgo Ponderado:</b> {_risk_label(report['risk'])} <i>(fallos ponderados por severidad y categoría)</i><br/>
         <br/>
         <b>Hallazgos Críticos:</b> {len(critical_findings)}<br/>
         <b>Hallazgos de Prioridad Alta:</b> {len(high_findings)}<br/>
@@ -110,7 +169,7 @@ class ReportGenerator:
 
         sev_map = {'Critical': 'Crítica', 'High': 'Alta', 'Medium': 'Media', 'Low': 'Baja'}
 
-        for checklist in checklist_data:
+        for checklist in report['checklists']:
             bloque = []
             bloque.append(Spacer(1, 0.2*inch))
             bloque.append(Paragraph(f"<b>{checklist['name']}</b> ({checklist['category']})", styles['Heading3']))
@@ -143,7 +202,9 @@ class ReportGenerator:
             ]))
 
             bloque.append(severity_table)
-            bloque.append(Spacer(1, 0.3*inch))
+            bloque.append(Spacer(1, 0.1*inch))
+            bloque.append(Paragraph(f"<b>Riesgo ponderado:</b> {_risk_label(checklist['risk'])}", styles['Normal']))
+            bloque.append(Spacer(1, 0.2*inch))
             story.append(KeepTogether(bloque))
 
         story.append(PageBreak())
@@ -188,13 +249,74 @@ class ReportGenerator:
         footer_text = f"<i>Reporte generado por CyberLynx el {datetime.now().strftime('%d/%m/%Y %H:%M')}</i>"
         story.append(Paragraph(footer_text, styles['Normal']))
 
+        if details is not None:
+            story = _LazyStory(story, ReportGenerator._pdf_detail_flowables(
+                details, heading_style, styles, sev_map))
+
         doc.build(story)
         buffer.seek(0)
         return buffer
 
     @staticmethod
-    def generate_excel_report(audit, checklist_data):
-        """Genera reporte de auditoría en formato Excel"""
+    def _pdf_detail_flowables(details, heading_style, styles, sev_map):
+        """Genera el anexo como secuencia de tablas de DETAIL_CHUNK_ROWS filas"""
+        from xml.sax.saxutils import escape
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.lib.colors import HexColor
+        from reportlab.platypus import Paragraph, Spacer, Table, TableStyle, PageBreak
+
+        cell_style = ParagraphStyle('CeldaDetalle', parent=styles['Normal'], fontSize=7, leading=8.5)
+        table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), HexColor('#1976d2')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), HexColor('#FFFFFF')),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 7),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 0.5, HexColor('#cccccc'))
+        ])
+        header = _DETAIL_HEADER[1:7]
+        col_widths = [0.3*inch, 2.4*inch, 0.65*inch, 0.7*inch, 1.6*inch, 0.85*inch]
+
+        def table(rows):
+            detail_table = Table([header] + rows, colWidths=col_widths, repeatRows=1)
+            detail_table.setStyle(table_style)
+            return detail_table
+
+        yield PageBreak()
+        yield Paragraph("Anexo: Detalle por Pregunta", heading_style)
+
+        current_checklist = None
+        rows = []
+        for row in details:
+            if row.checklist_id != current_checklist:
+                if rows:
+                    yield table(rows)
+                    rows = []
+                current_checklist = row.checklist_id
+                yield Spacer(1, 0.15*inch)
+                yield Paragraph(f"<b>{escape(row.checklist)}</b> ({escape(row.category)})", styles['Heading3'])
+
+            values = _detail_values(row, sev_map)[1:7]
+            values[1] = Paragraph(escape(values[1]), cell_style)
+            values[4] = Paragraph(escape(values[4]), cell_style)
+            rows.append(values)
+            if len(rows) >= DETAIL_CHUNK_ROWS:
+                yield table(rows)
+                rows = []
+
+        if rows:
+            yield table(rows)
+
+    @staticmethod
+    def generate_excel_report(report, details=None):
+        """Genera reporte de auditoría en formato Excel (con ``details``, hoja de detalle por pregunta)"""
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, PatternFill, Alignment
+
+        audit = report['audit']
+        totals = report['totals']
+
         buffer = BytesIO()
         wb = Workbook()
 
@@ -206,54 +328,42 @@ class ReportGenerator:
         ws_summary.merge_cells('A1:D1')
 
         ws_summary['A3'] = "Nombre de la auditoría:"
-        ws_summary['B3'] = audit.name
+        ws_summary['B3'] = audit['name']
         ws_summary['A4'] = "Estado:"
-        ws_summary['B4'] = audit.status
+        ws_summary['B4'] = audit['status']
         ws_summary['A5'] = "Fecha de inicio:"
-        ws_summary['B5'] = audit.created_at.strftime('%d/%m/%Y %H:%M')
+        ws_summary['B5'] = _format_date(audit['created_at'])
         ws_summary['A6'] = "Fecha de finalización:"
-        ws_summary['B6'] = audit.completed_at.strftime('%d/%m/%Y %H:%M') if audit.completed_at else 'En progreso'
+        ws_summary['B6'] = _format_date(audit['completed_at']) or 'En progreso'
 
-        if audit.description:
+        if audit['description']:
             ws_summary['A7'] = "Descripción:"
-            ws_summary['B7'] = audit.description
+            ws_summary['B7'] = audit['description']
 
         header_fill = PatternFill(start_color="1976D2", end_color="1976D2", fill_type="solid")
         header_font = Font(color="FFFFFF", bold=True)
 
-        total_questions = 0
-        total_yes = 0
-        total_no = 0
-        total_na = 0
-
-        for checklist in checklist_data:
-            summary = checklist['summary']
-            total_questions += summary['total_questions']
-            total_yes += summary['yes_count']
-            total_no += summary['no_count']
-            total_na += summary['na_count']
-
-        preguntas_aplicables = total_yes + total_no
-        compliance_rate = round((total_yes / preguntas_aplicables * 100), 2) if preguntas_aplicables > 0 else 0
-
         ws_summary['A9'] = "RESUMEN EJECUTIVO"
         ws_summary['A9'].font = Font(bold=True, size=14)
         ws_summary['A10'] = "Preguntas evaluadas:"
-        ws_summary['B10'] = total_questions
+        ws_summary['B10'] = totals['total_questions']
         ws_summary['A11'] = "Preguntas aplicables:"
-        ws_summary['B11'] = preguntas_aplicables
+        ws_summary['B11'] = totals['preguntas_aplicables']
         ws_summary['C11'] = "(excluye N/A)"
         ws_summary['A12'] = "Cumple (Sí):"
-        ws_summary['B12'] = total_yes
+        ws_summary['B12'] = totals['yes_count']
         ws_summary['A13'] = "No cumple (No):"
-        ws_summary['B13'] = total_no
+        ws_summary['B13'] = totals['no_count']
         ws_summary['A14'] = "No aplica (N/A):"
-        ws_summary['B14'] = total_na
+        ws_summary['B14'] = totals['na_count']
         ws_summary['A15'] = "Tasa de cumplimiento:"
-        ws_summary['B15'] = f"{compliance_rate}%"
+        ws_summary['B15'] = f"{totals['compliance_rate']}%"
         ws_summary['C15'] = "Sí / (Sí + No)"
+        ws_summary['A16'] = "Riesgo ponderado:"
+        ws_summary['B16'] = _risk_label(report['risk'])
+        ws_summary['C16'] = "Fallos ponderados por severidad y categoría"
 
-        for row in range(10, 16):
+        for row in range(10, 17):
             ws_summary[f'A{row}'].font = Font(bold=True)
 
         ws_summary.column_dimensions['A'].width = 30
@@ -263,7 +373,7 @@ class ReportGenerator:
         # HOJAS POR CHECKLIST
         sev_map = {'Critical': 'Crítica', 'High': 'Alta', 'Medium': 'Media', 'Low': 'Baja'}
 
-        for checklist in checklist_data:
+        for checklist in report['checklists']:
             ws = wb.create_sheet(title=checklist['name'][:31])
 
             ws['A1'] = checklist['name']
@@ -305,56 +415,57 @@ class ReportGenerator:
             ws[f'A{row + 1}'] = "Tasa de cumplimiento:"
             ws[f'A{row + 1}'].font = Font(bold=True)
             
-            checklist_aplicables = summary['yes_count'] + summary['no_count']
-            checklist_compliance = round((summary['yes_count'] / checklist_aplicables * 100), 2) if checklist_aplicables > 0 else 0
-            
-            ws[f'B{row + 1}'] = f"{checklist_compliance}%"
-            ws[f'C{row + 1}'] = f"({summary['yes_count']} / {checklist_aplicables})"
+            ws[f'B{row + 1}'] = f"{summary['compliance_rate']}%"
+            ws[f'C{row + 1}'] = f"({summary['yes_count']} / {summary['preguntas_aplicables']})"
+            ws[f'A{row + 2}'] = "Riesgo ponderado:"
+            ws[f'A{row + 2}'].font = Font(bold=True)
+            ws[f'B{row + 2}'] = _risk_label(checklist['risk'])
+
+        # ANEXO: DETALLE POR PREGUNTA
+        if details is not None:
+            ws = wb.create_sheet(title="Detalle")
+            ws.append(_DETAIL_HEADER)
+            for cell in ws[1]:
+                cell.fill = header_fill
+                cell.font = header_font
+            for row in details:
+                ws.append(_detail_values(row, sev_map))
+            ws.freeze_panes = 'A2'
+            for col, width in zip('ABCDEFGH', (25, 6, 60, 12, 14, 40, 20, 17)):
+                ws.column_dimensions[col].width = width
 
         wb.save(buffer)
         buffer.seek(0)
         return buffer
 
     @staticmethod
-    def generate_csv_report(audit, checklist_data):
-        """Genera reporte de auditoría en formato CSV"""
+    def generate_csv_report(report, details=None):
+        """Genera reporte de auditoría en formato CSV (con ``details``, detalle por pregunta al final)"""
+        audit = report['audit']
+        totals = report['totals']
         buffer = StringIO()
         writer = csv.writer(buffer)
 
         writer.writerow(['Reporte de Auditoría de Seguridad - CyberLynx'])
         writer.writerow([])
-        writer.writerow(['Nombre de la auditoría:', audit.name])
-        writer.writerow(['Estado:', audit.status])
-        writer.writerow(['Fecha de inicio:', audit.created_at.strftime('%d/%m/%Y %H:%M')])
-        writer.writerow(['Fecha de cierre:', audit.completed_at.strftime('%d/%m/%Y %H:%M') if audit.completed_at else 'En progreso'])
+        writer.writerow(['Nombre de la auditoría:', audit['name']])
+        writer.writerow(['Estado:', audit['status']])
+        writer.writerow(['Fecha de inicio:', _format_date(audit['created_at'])])
+        writer.writerow(['Fecha de cierre:', _format_date(audit['completed_at']) or 'En progreso'])
 
-        if audit.description:
-            writer.writerow(['Descripción:', audit.description])
+        if audit['description']:
+            writer.writerow(['Descripción:', audit['description']])
 
         writer.writerow([])
 
-        total_questions = 0
-        total_yes = 0
-        total_no = 0
-        total_na = 0
-
-        for checklist in checklist_data:
-            summary = checklist['summary']
-            total_questions += summary['total_questions']
-            total_yes += summary['yes_count']
-            total_no += summary['no_count']
-            total_na += summary['na_count']
-
-        preguntas_aplicables = total_yes + total_no
-        compliance_rate = round((total_yes / preguntas_aplicables * 100), 2) if preguntas_aplicables > 0 else 0
-
         writer.writerow(['RESUMEN EJECUTIVO'])
-        writer.writerow(['Preguntas evaluadas:', total_questions])
-        writer.writerow(['Preguntas aplicables:', preguntas_aplicables, '(excluye N/A)'])
-        writer.writerow(['Cumple (Sí):', total_yes])
-        writer.writerow(['No cumple (No):', total_no])
-        writer.writerow(['No aplica (N/A):', total_na])
-        writer.writerow(['Tasa de cumplimiento:', f"{compliance_rate}%", 'Sí / (Sí + No)'])
+        writer.writerow(['Preguntas evaluadas:', totals['total_questions']])
+        writer.writerow(['Preguntas aplicables:', totals['preguntas_aplicables'], '(excluye N/A)'])
+        writer.writerow(['Cumple (Sí):', totals['yes_count']])
+        writer.writerow(['No cumple (No):', totals['no_count']])
+        writer.writerow(['No aplica (N/A):', totals['na_count']])
+        writer.writerow(['Tasa de cumplimiento:', f"{totals['compliance_rate']}%", 'Sí / (Sí + No)'])
+        writer.writerow(['Riesgo ponderado:', _risk_label(report['risk']), 'Fallos ponderados por severidad y categoría'])
         writer.writerow([])
 
         writer.writerow(['DETALLE POR CHECKLIST'])
@@ -362,7 +473,7 @@ class ReportGenerator:
 
         sev_map = {'Critical': 'Crítica', 'High': 'Alta', 'Medium': 'Media', 'Low': 'Baja'}
 
-        for checklist in checklist_data:
+        for checklist in report['checklists']:
             writer.writerow([f"Checklist: {checklist['name']} ({checklist['category']})"])
             writer.writerow(['Severidad', 'Total', 'Sí', 'No', 'N/A', 'Sin responder'])
 
@@ -379,9 +490,16 @@ class ReportGenerator:
                         stats['unanswered']
                     ])
 
-            checklist_aplicables = summary['yes_count'] + summary['no_count']
-            checklist_compliance = round((summary['yes_count'] / checklist_aplicables * 100), 2) if checklist_aplicables > 0 else 0
-            writer.writerow(['Tasa de cumplimiento:', f"{checklist_compliance}%", f"({summary['yes_count']} / {checklist_aplicables})"])
+            writer.writerow(['Tasa de cumplimiento:', f"{summary['compliance_rate']}%",
+                             f"({summary['yes_count']} / {summary['preguntas_aplicables']})"])
+            writer.writerow(['Riesgo ponderado:', _risk_label(checklist['risk'])])
+            writer.writerow([])
+
+        if details is not None:
+            writer.writerow(['DETALLE POR PREGUNTA'])
+            writer.writerow(_DETAIL_HEADER)
+            for row in details:
+                writer.writerow(_detail_values(row, sev_map))
             writer.writerow([])
 
         writer.writerow([f'Reporte generado por CyberLynx el {datetime.now().strftime("%d/%m/%Y %H:%M")}'])
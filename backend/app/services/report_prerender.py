@@ -0,0 +1,188 @@
+"""
+Pre-renderizado de reportes al completar una auditoría.
+
+Cuando una auditoría pasa a 'Completed' se encolan, tras el commit, los formatos
+de ``REPORTS_PRERENDER_FORMATS`` en un pool de hilos (``REPORT_WORKERS``) que los
+guarda en el almacén de reportes; la primera descarga ya no paga el render. Si la
+auditoría se reabre (se inicia o elimina un checklist) sus reportes se invalidan.
+
+``get_report`` es el punto de entrada de las rutas de descarga: sirve el fichero
+(ya abierto) del almacén si existe para la versión actual de los datos, espera al render en
+curso si lo hay y, si no, renderiza en la propia petición y lo guarda.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from io import BytesIO
+
+from flask import current_app
+
+from app import db
+from app import signals
+from app.services import report_data, report_registry, report_store
+from app.utils import tracing
+from app.utils.transaction import on_commit
+
+_executor = None
+_executor_pid = None
+_inflight = {}  # (audit_id, formato, versión) -> Future
+_lock = threading.Lock()
+
+
+def get_executor(app):
+    # Los hilos no sobreviven al fork de gunicorn: un pool por proceso
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=app.config['REPORT_WORKERS'],
+                                           thread_name_prefix='report-render')
+            _executor_pid = os.getpid()
+            _inflight.clear()
+        return _executor
+
+
+def render(audit, report_format, version=None, detail=False):
+    """
+    Renderiza el reporte en memoria (desde la instantánea de datos) y devuelve sus
+    bytes; con ``detail`` el anexo por pregunta se lee en streaming durante el render.
+    """
+    report = report_data.get_report_data(audit, version)
+    with tracing.span('report.render', **{'report.format': report_format, 'report.detail': detail}) as rendering:
+        details = report_data.iter_detail_rows(audit.id) if detail else None
+        content = report_registry.get_renderer(report_format)(report, details).getvalue()
+        rendering.set_attributes(**{'report.bytes': len(content)})
+    return content
+
+
+def _render_job(app, audit_id, report_format, version, trace_context=None):
+    from app.models.audit import Audit
+
+    # La traza continúa la de la petición que completó la auditoría
+    with app.app_context(), tracing.use_context(trace_context), \
+            tracing.span('report.prerender', **{'report.format': report_format, 'audit.id': audit_id}):
+        try:
+            audit = db.session.get(Audit, audit_id)
+            # Los datos pudieron cambiar entre el commit y la ejecución del trabajo
+            if audit is None or audit.status != 'Completed' or report_data.data_version(audit_id) != version:
+                return None
+            path = report_store.get_store().put(audit_id, report_format, version,
+                                                render(audit, report_format, version))
+            print(f"✅ Reporte {report_format.upper()} pre-renderizado para auditoría {audit_id}")
+            return path
+        finally:
+            db.session.remove()
+
+
+def submit(app, audit_id, report_format, version):
+    """Encola un render (o devuelve el que ya está en curso para la misma versión)"""
+    key = (audit_id, report_format, version)
+    executor = get_executor(app)
+    with _lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+        future = executor.submit(_render_job, app, audit_id, report_format, version, tracing.current_context())
+        _inflight[key] = future
+    future.add_done_callback(lambda f: _forget(key, f))
+    return future
+
+
+def wait_inflight(audit_id, report_format, version):
+    """
+    Si hay un pre-renderizado en curso de esa versión espera a que termine (como mucho
+    ``REPORTS_RENDER_WAIT_SECONDS``) y devuelve su fichero abierto; si no, None.
+    """
+    with _lock:
+        future = _inflight.get((audit_id, report_format, version))
+    if future is None:
+        return None
+    with tracing.span('report.wait', **{'report.format': report_format}):
+        try:
+            path = future.result(timeout=current_app.config['REPORTS_RENDER_WAIT_SECONDS'])
+        except FutureTimeoutError:
+            path = None
+    return report_store.get_store().open(audit_id, report_format, version) if path else None
+
+
+def _forget(key, future):
+    with _lock:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+
+def pending_jobs():
+    with _lock:
+        return len(_inflight)
+
+
+def pool_status(app):
+    """Estado del pool de este proceso (sin crearlo): hilos vivos y trabajos en curso"""
+    with _lock:
+        executor = _executor if _executor_pid == os.getpid() else None
+        pending = len(_inflight) if executor is not None else 0
+    threads = getattr(executor, '_threads', ()) if executor is not None else ()
+    return {
+        'max_workers': app.config['REPORT_WORKERS'],
+        'started': executor is not None,
+        'shutdown': bool(getattr(executor, '_shutdown', False)),
+        'alive_threads': sum(1 for thread in threads if thread.is_alive()),
+        'pending_jobs': pending
+    }
+
+
+def get_report(audit, report_format, detail=False):
+    """
+    Devuelve ``(origen, estado)``: origen es un fichero abierto del almacén o un
+    BytesIO y estado indica de dónde salió ('hit', 'wait' o 'miss').
+    """
+    store = report_store.get_store()
+    version = report_data.data_version(audit.id)
+
+    stored = store.open(audit.id, report_format, version, detail)
+    if stored is not None:
+        return stored, 'hit'
+
+    # El pre-renderizado solo genera la versión sin anexo
+    if audit.status == 'Completed' and not detail:
+        stored = wait_inflight(audit.id, report_format, version)
+        if stored is not None:
+            return stored, 'wait'
+
+    content = render(audit, report_format, version, detail)
+    # Solo se guardan los reportes definitivos (auditoría completada)
+    if audit.status == 'Completed':
+        store.put(audit.id, report_format, version, content, detail)
+    return BytesIO(content), 'miss'
+
+
+# ========== RECEPTORES DE SEÑALES ==========
+
+def _on_audit_status_changed(sender, audit, previous_status, **extra):
+    app = current_app._get_current_object()
+    audit_id = audit.id
+
+    if audit.status == 'Completed':
+        formats = [fmt for fmt in app.config['REPORTS_PRERENDER_FORMATS']
+                   if fmt in report_registry.get_valid_formats()]
+        if not formats:
+            return
+
+        def enqueue():
+            # La versión se calcula con los datos ya confirmados
+            with app.app_context():
+                try:
+                    version = report_data.data_version(audit_id)
+                finally:
+                    db.session.remove()
+            for report_format in formats:
+                submit(app, audit_id, report_format, version)
+
+        on_commit(enqueue)
+
+    elif previous_status == 'Completed':
+        on_commit(lambda: report_store.get_store().invalidate(audit_id))
+
+
+def init_app(app):
+    report_store.init_app(app)
+    signals.audit_status_changed.connect(_on_audit_status_changed)
@@ -0,0 +1,77 @@
+"""
+Registro de renderizadores de reportes con carga perezosa.
+
+Los motores (ReportLab para PDF, openpyxl para XLSX) se importan la primera vez
+que se pide su formato, no al crear la app. ``warm_up()`` permite precargarlos
+(p. ej. en el proceso maestro antes del fork, con ``REPORTS_PRELOAD=pdf,xlsx``).
+"""
+import importlib
+import threading
+
+_FORMATS = {
+    'pdf': {
+        'method': 'generate_pdf_report',
+        'engines': ('reportlab.platypus', 'reportlab.lib.styles'),
+        'mimetype': 'application/pdf',
+        'extension': 'pdf'
+    },
+    'xlsx': {
+        'method': 'generate_excel_report',
+        'engines': ('openpyxl', 'openpyxl.styles'),
+        'mimetype': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'extension': 'xlsx'
+    },
+    'csv': {
+        'method': 'generate_csv_report',
+        'engines': (),
+        'mimetype': 'text/csv',
+        'extension': 'csv'
+    }
+}
+
+_renderers = {}
+_lock = threading.Lock()
+
+
+def get_valid_formats():
+    return list(_FORMATS)
+
+
+def get_format_info(report_format):
+    """Mimetype y extensión de un formato (sin cargar su motor)"""
+    info = _FORMATS[report_format]
+    return {'mimetype': info['mimetype'], 'extension': info['extension']}
+
+
+def get_renderer(report_format):
+    """Devuelve ``fn(report_data, details=None) -> BytesIO``, cargando el motor si hace falta"""
+    renderer = _renderers.get(report_format)
+    if renderer is not None:
+        return renderer
+
+    info = _FORMATS[report_format]
+    with _lock:
+        renderer = _renderers.get(report_format)
+        if renderer is None:
+            for module_name in info['engines']:
+                importlib.import_module(module_name)
+            from app.services.report_generator import ReportGenerator
+            renderer = getattr(ReportGenerator, info['method'])
+            _renderers[report_format] = renderer
+    return renderer
+
+
+def is_loaded(report_format):
+    return report_format in _renderers
+
+
+def warm_up(formats=None):
+    """Precarga los motores de los formatos indicados (todos por defecto)"""
+    for report_format in formats or get_valid_formats():
+        get_renderer(report_format)
+
+
+def init_app(app):
+    preload = app.config.get('REPORTS_PRELOAD') or []
+    if preload:
+        warm_up([fmt for fmt in preload if fmt in _FORMATS])
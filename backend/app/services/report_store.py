@@ -0,0 +1,93 @@
+"""
+Almacén de reportes ya renderizados, en disco.
+
+Cada fichero se guarda como ``<raíz>/<audit_id>/<tipo>-<versión>.<ext>`` (el tipo
+es el formato, con sufijo ``_detail`` si incluye el anexo por pregunta),
+donde la versión es ``report_data.data_version`` (estado de la auditoría,
+checklists, respuestas y plantillas). Si cualquiera de ellos cambia la versión
+es otra y el fichero antiguo deja de servirse aunque siga en disco. La escritura es atómica
+(fichero temporal + ``os.replace``), así que varios workers pueden compartir
+el directorio.
+
+Los reportes se sirven desde un fichero ya abierto (``open``): ``put`` puede
+eliminar la versión anterior mientras otra petición o un ZIP todavía la está
+enviando sin cortar esa transferencia.
+"""
+import os
+import shutil
+import tempfile
+
+from flask import current_app
+
+from app.utils import tracing
+
+
+class FileReportStore:
+    def __init__(self, root):
+        self.root = root
+
+    def _audit_dir(self, audit_id):
+        return os.path.join(self.root, str(int(audit_id)))
+
+    @staticmethod
+    def _kind(report_format, detail):
+        return f'{report_format}_detail' if detail else report_format
+
+    def _path(self, audit_id, report_format, version, detail=False):
+        from app.services import report_registry
+        extension = report_registry.get_format_info(report_format)['extension']
+        kind = self._kind(report_format, detail)
+        return os.path.join(self._audit_dir(audit_id), f'{kind}-{version}.{extension}')
+
+    def open(self, audit_id, report_format, version, detail=False):
+        """Fichero abierto (binario) del reporte de esa versión o None si no está renderizado"""
+        try:
+            return open(self._path(audit_id, report_format, version, detail), 'rb')
+        except FileNotFoundError:
+            return None
+
+    def put(self, audit_id, report_format, version, content, detail=False):
+        """Guarda el reporte y elimina las versiones anteriores del mismo tipo"""
+        with tracing.span('report.store', **{'report.format': report_format, 'report.bytes': len(content)}):
+            path = self._path(audit_id, report_format, version, detail)
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(content)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+            prefix = f'{self._kind(report_format, detail)}-'
+            for name in os.listdir(directory):
+                if name.startswith(prefix) and os.path.join(directory, name) != path:
+                    try:
+                        os.remove(os.path.join(directory, name))
+                    except OSError:
+                        # Ya eliminado, o en uso en un sistema que no lo permite: se reintenta en el próximo put
+                        pass
+            return path
+
+    def invalidate(self, audit_id):
+        """Elimina todos los reportes guardados de la auditoría"""
+        shutil.rmtree(self._audit_dir(audit_id), ignore_errors=True)
+
+    def files(self, audit_id):
+        directory = self._audit_dir(audit_id)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory) if not name.startswith('.tmp-'))
+
+
+def get_store():
+    return current_app.extensions['report_store']
+
+
+def init_app(app):
+    root = app.config.get('REPORTS_STORE_DIR') or os.path.join(app.instance_path, 'reports')
+    app.extensions['report_store'] = FileReportStore(root)
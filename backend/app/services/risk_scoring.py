@@ -0,0 +1,266 @@
+"""
+Puntuación de riesgo ponderada de checklists, auditorías y activos.
+
+El riesgo es la tasa de fallo ponderada: la suma de los pesos de las respuestas
+'No' entre la suma de los pesos de las respuestas aplicables (Sí + No), de 0 a
+100. El peso de cada pregunta es ``peso de su severidad × peso de su categoría``;
+los valores por defecto vienen de ``RISK_SEVERITY_WEIGHTS`` /
+``RISK_CATEGORY_WEIGHTS`` y un administrador puede cambiarlos (se guardan en
+``app_meta``).
+
+La cartera completa se puntúa de una vez con NumPy sobre el dataset columnar de
+``question_analytics`` (``bincount`` por checklist y auditoría); el riesgo de un
+activo es el de su auditoría más reciente con respuestas aplicables. El
+resultado se conserva en memoria mientras no cambien los datos, las
+asignaciones de activos, las plantillas ni los pesos.
+"""
+import hashlib
+import json
+import threading
+import time
+
+import numpy as np
+from flask import current_app
+
+from app import db
+from app.services import question_analytics
+
+WEIGHTS_KEY = 'risk_weights'
+SCOPES = ('checklists', 'audits', 'assets')
+
+# Umbrales inferiores de cada nivel (puntuación 0-100)
+LEVELS = ((0, 'Low'), (25, 'Medium'), (50, 'High'), (75, 'Critical'))
+_LEVEL_BOUNDS = np.array([bound for bound, _ in LEVELS[1:]], dtype=np.float64)
+_LEVEL_NAMES = [name for _, name in LEVELS]
+
+_scores = None
+_scores_lock = threading.Lock()
+
+
+# ========== PESOS ==========
+
+def _default_weights():
+    return {
+        'severity': dict(current_app.config['RISK_SEVERITY_WEIGHTS']),
+        'category': dict(current_app.config['RISK_CATEGORY_WEIGHTS'])
+    }
+
+
+def load_weights(stored=None):
+    """
+    Pesos efectivos: los de configuración con los guardados en ``app_meta`` encima.
+    ``stored`` es el JSON ya leído de ``app_meta`` (evita otra consulta).
+    """
+    from app.models.meta import AppMeta
+
+    if stored is None:
+        stored = AppMeta.get_values([WEIGHTS_KEY]).get(WEIGHTS_KEY)
+    weights = _default_weights()
+    if stored:
+        saved = json.loads(stored)
+        for group in ('severity', 'category'):
+            weights[group].update(saved.get(group) or {})
+    return weights
+
+
+def weights_fingerprint(weights):
+    raw = json.dumps(weights, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+
+def validate_weights(data):
+    """Normaliza ``{'severity': {...}, 'category': {...}}``; ValueError si no es válido"""
+    from app.models.checklist import ChecklistTemplate
+
+    if not isinstance(data, dict) or not set(data) <= {'severity', 'category'}:
+        raise ValueError("weights must be an object with 'severity' and/or 'category'")
+    valid_keys = {
+        'severity': ['Critical', 'High', 'Medium', 'Low'],
+        'category': ChecklistTemplate.get_valid_categories()
+    }
+    weights = {}
+    for group, values in data.items():
+        if not isinstance(values, dict):
+            raise ValueError(f'{group} weights must be an object')
+        invalid = [key for key in values if key not in valid_keys[group]]
+        if invalid:
+            raise ValueError(f'Invalid {group} keys: {invalid}')
+        for key, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1000:
+                raise ValueError(f'{group} weight for {key} must be a number between 0 and 1000')
+        weights[group] = {key: float(value) for key, value in values.items()}
+    return weights
+
+
+def save_weights(weights):
+    """Guarda los pesos; cada grupo enviado sustituye al guardado antes. No hace commit"""
+    from app.models.meta import AppMeta
+
+    stored = AppMeta.get_values([WEIGHTS_KEY]).get(WEIGHTS_KEY)
+    saved = json.loads(stored) if stored else {}
+    saved.update(weights)
+    AppMeta.set_value(WEIGHTS_KEY, json.dumps(saved, sort_keys=True))
+
+
+def _question_weight(weights, severity, category):
+    return weights['severity'].get(severity, 1.0) * weights['category'].get(category, 1.0)
+
+
+# ========== PUNTUACIÓN ESCALAR (REPORTES) ==========
+
+def level_for(score):
+    name = LEVELS[0][1]
+    for bound, level in LEVELS:
+        if score >= bound:
+            name = level
+    return name
+
+
+def entry(weighted_failures, weighted_applicable):
+    """Puntuación, nivel y sumas ponderadas de un elemento"""
+    score = round(weighted_failures / weighted_applicable * 100, 2) if weighted_applicable > 0 else 0
+    return {
+        'score': score,
+        'level': level_for(score) if weighted_applicable > 0 else None,
+        'weighted_failures': round(weighted_failures, 4),
+        'weighted_applicable': round(weighted_applicable, 4)
+    }
+
+
+def weighted_counts(severity_stats, category, weights):
+    """Sumas ponderadas (fallos, aplicables) a partir de recuentos por severidad"""
+    failures = applicable = 0.0
+    for severity, stats in severity_stats.items():
+        weight = _question_weight(weights, severity, category)
+        failures += stats['no'] * weight
+        applicable += (stats['yes'] + stats['no']) * weight
+    return failures, applicable
+
+
+# ========== PUNTUACIÓN DE LA CARTERA (NUMPY) ==========
+
+class RiskScores:
+    """Sumas ponderadas por checklist, auditoría y activo (ids ordenados para buscar)"""
+
+    def __init__(self, key, weights, elapsed_ms, **scopes):
+        self.key = key
+        self.weights = weights
+        self.elapsed_ms = elapsed_ms
+        self._scopes = scopes  # scope -> (ids, fallos, aplicables)
+
+    def _items(self, scope, positions):
+        ids, failures, applicable = self._scopes[scope]
+        scores = _scores_for(failures[positions], applicable[positions])
+        levels = np.searchsorted(_LEVEL_BOUNDS, scores, side='right')
+        return [{
+            'id': int(ids[p]),
+            'score': round(float(score), 2),
+            'level': _LEVEL_NAMES[level],
+            'weighted_failures': round(float(failures[p]), 4),
+            'weighted_applicable': round(float(applicable[p]), 4)
+        } for p, score, level in zip(positions, scores, levels)]
+
+    def lookup(self, scope, ids):
+        """Puntuaciones de los ids pedidos que tienen respuestas aplicables"""
+        scope_ids, _, applicable = self._scopes[scope]
+        wanted = np.asarray(list(ids), dtype=np.int64)
+        positions = np.searchsorted(scope_ids, wanted)
+        positions = positions[positions < len(scope_ids)]
+        positions = positions[np.isin(scope_ids[positions], wanted) & (applicable[positions] > 0)]
+        return self._items(scope, np.unique(positions))
+
+    def ranking(self, scope, top=50, min_score=0):
+        """Los ``top`` con mayor riesgo (empate: más fallos ponderados)"""
+        _, failures, applicable = self._scopes[scope]
+        scores = _scores_for(failures, applicable)
+        eligible = np.flatnonzero((applicable > 0) & (scores >= min_score))
+        ranked = eligible[np.lexsort((-failures[eligible], -scores[eligible]))]
+        return self._items(scope, ranked[:top]), len(eligible)
+
+
+def _scores_for(failures, applicable):
+    return np.divide(failures * 100, applicable, out=np.zeros_like(failures), where=applicable > 0)
+
+
+def _assets_marker():
+    from app.models.audit import audit_assets
+
+    row = db.session.query(
+        db.func.count(),
+        db.func.sum(audit_assets.c.asset_id),
+        db.func.sum(audit_assets.c.audit_id)
+    ).select_from(audit_assets).one()
+    return ':'.join('' if value is None else str(value) for value in row)
+
+
+def _question_weights(dataset, weights):
+    """Peso de cada pregunta del dataset con su severidad y categoría actuales"""
+    from app.models.checklist import ChecklistTemplate, ChecklistQuestion
+
+    rows = db.session.query(ChecklistQuestion.id, ChecklistQuestion.severity, ChecklistTemplate.category)\
+        .join(ChecklistTemplate, ChecklistTemplate.id == ChecklistQuestion.template_id).all()
+    by_id = {question_id: _question_weight(weights, severity, category)
+             for question_id, severity, category in rows}
+    return np.fromiter((by_id.get(int(q), 0.0) for q in dataset.question_ids),
+                       dtype=np.float64, count=len(dataset.question_ids))
+
+
+def compute_scores(dataset, weights, key=None):
+    """Puntúa toda la cartera con operaciones vectorizadas"""
+    from app.models.audit import audit_assets
+
+    started = time.perf_counter()
+
+    response_weights = _question_weights(dataset, weights)[dataset.question_idx]
+    failed = np.where(dataset.answers == question_analytics.NO, response_weights, 0.0)
+    applicable = np.where(dataset.answers != question_analytics.NA, response_weights, 0.0)
+
+    checklist_count = len(dataset.checklist_ids)
+    checklist_failures = np.bincount(dataset.checklist_idx, weights=failed, minlength=checklist_count)
+    checklist_applicable = np.bincount(dataset.checklist_idx, weights=applicable, minlength=checklist_count)
+
+    audit_count = len(dataset.audit_ids)
+    audit_failures = np.bincount(dataset.checklist_audit_idx, weights=checklist_failures, minlength=audit_count)
+    audit_applicable = np.bincount(dataset.checklist_audit_idx, weights=checklist_applicable, minlength=audit_count)
+
+    # Activos: la auditoría puntuada más reciente (ids de auditoría crecientes)
+    pairs = db.session.execute(db.select(audit_assets.c.asset_id, audit_assets.c.audit_id)).all()
+    raw_assets = np.fromiter((row[0] for row in pairs), dtype=np.int64, count=len(pairs))
+    raw_audits = np.fromiter((row[1] for row in pairs), dtype=np.int64, count=len(pairs))
+    positions = np.searchsorted(dataset.audit_ids, raw_audits)
+    found = positions < audit_count
+    found[found] = dataset.audit_ids[positions[found]] == raw_audits[found]
+    found[found] = audit_applicable[positions[found]] > 0
+
+    asset_ids, asset_idx = np.unique(raw_assets[found], return_inverse=True)
+    latest = np.full(len(asset_ids), -1, dtype=np.int64)
+    np.maximum.at(latest, asset_idx, positions[found])
+
+    return RiskScores(
+        key=key,
+        weights=weights,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+        checklists=(dataset.checklist_ids, checklist_failures, checklist_applicable),
+        audits=(dataset.audit_ids, audit_failures, audit_applicable),
+        assets=(asset_ids, audit_failures[latest], audit_applicable[latest])
+    )
+
+
+def get_scores():
+    """Puntuaciones en memoria, recalculadas solo si cambió la versión de los datos o los pesos"""
+    from app.models.meta import AppMeta
+    global _scores
+
+    dataset = question_analytics.get_dataset()
+    meta = AppMeta.get_values(['templates_version', WEIGHTS_KEY])
+    weights = load_weights(meta.get(WEIGHTS_KEY) or '')
+    key = (dataset.marker, _assets_marker(), meta.get('templates_version'), weights_fingerprint(weights))
+
+    current = _scores
+    if current is not None and current.key == key:
+        return current
+
+    with _scores_lock:
+        if _scores is None or _scores.key != key:
+            _scores = compute_scores(dataset, weights, key)
+        return _scores
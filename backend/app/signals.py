@@ -0,0 +1,28 @@
+"""
+Señales de dominio (blinker) emitidas por las rutas de auditorías.
+
+Se envían dentro de la transacción, antes del commit, para que los receptores
+(rollups, índices...) escriban en la misma transacción que el cambio que los
+origina. El emisor es la app actual; los datos van como argumentos con nombre.
+"""
+from blinker import Namespace
+
+_signals = Namespace()
+
+# checklist=AuditChecklist recién creado (In_Progress)
+checklist_started = _signals.signal('checklist-started')
+
+# checklist=AuditChecklist recién marcado como Completed
+checklist_completed = _signals.signal('checklist-completed')
+
+# checklist=AuditChecklist a punto de eliminarse (sus respuestas aún existen)
+checklist_deleting = _signals.signal('checklist-deleting')
+
+# response=ChecklistResponse creada o modificada
+response_saved = _signals.signal('response-saved')
+
+# question_ids=[...] cuya severidad o plantilla (categoría) ha cambiado
+questions_changed = _signals.signal('questions-changed')
+
+# audit=Audit cuyo estado acaba de cambiar, previous_status=estado anterior
+audit_status_changed = _signals.signal('audit-status-changed')
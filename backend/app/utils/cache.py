@@ -0,0 +1,117 @@
+"""
+Caché en memoria con TTL e invalidación por tablas.
+
+Cada entrada declara las tablas de las que depende. Al hacer commit de una
+sesión que escribió en alguna de ellas (flush del ORM o INSERT/UPDATE/DELETE
+masivos vía ``db.session.execute``) la entrada se descarta en este proceso; el
+TTL acota lo que puede tardar en enterarse el resto de workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from app import db
+
+_CHANGED_TABLES_KEY = 'cache_changed_tables'
+
+
+class TTLCache:
+    """Caché acotada (LRU) con caducidad por entrada y etiquetas de tabla"""
+
+    def __init__(self, default_ttl=30, max_entries=256):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, tables, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, value, ttl=None, tables=()):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key, factory, ttl=None, tables=()):
+        """Devuelve ``(valor, hit)``; en un fallo calcula el valor con ``factory()``"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value, True
+        value = factory()
+        self.set(key, value, ttl=ttl, tables=tables)
+        return value, False
+
+    def invalidate_tables(self, tables):
+        tables = set(tables)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[1] & tables]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def get_cache():
+    return current_app.extensions['ttl_cache']
+
+
+def _track(session, tables):
+    session.info.setdefault(_CHANGED_TABLES_KEY, set()).update(tables)
+
+
+def _after_flush(session, flush_context):
+    _track(session, {
+        obj.__table__.name
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(obj, '__table__')
+    })
+
+
+def _do_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and getattr(table, 'name', None):
+            _track(orm_execute_state.session, {table.name})
+
+
+def _after_commit(session):
+    tables = session.info.pop(_CHANGED_TABLES_KEY, None)
+    if tables and has_app_context():
+        cache = current_app.extensions.get('ttl_cache')
+        if cache is not None:
+            cache.invalidate_tables(tables)
+
+
+def _after_rollback(session):
+    session.info.pop(_CHANGED_TABLES_KEY, None)
+
+
+def init_app(app):
+    app.extensions['ttl_cache'] = TTLCache(
+        default_ttl=app.config['CACHE_DEFAULT_TTL'],
+        max_entries=app.config['CACHE_MAX_ENTRIES']
+    )
+
+    # db.session es compartida entre apps: registrar los eventos una sola vez
+    for name, listener in (('after_flush', _after_flush), ('do_orm_execute', _do_orm_execute),
+                           ('after_commit', _after_commit), ('after_rollback', _after_rollback)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
@@ -0,0 +1,130 @@
+"""
+Compresión negociada (brotli / gzip) de las respuestas de la API.
+
+Se aplica en ``after_request`` a los tipos de contenido de ``COMPRESS_MIMETYPES``
+(JSON, CSV...) a partir de ``COMPRESS_MIN_SIZE`` bytes. Los PDF, XLSX y ZIP ya van
+comprimidos y nunca se recomprimen. Las respuestas en streaming se comprimen
+trozo a trozo, sin acumular el cuerpo completo en memoria.
+"""
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# Formatos que ya están comprimidos: recomprimirlos solo gasta CPU
+_ALREADY_COMPRESSED = {
+    'application/pdf',
+    'application/zip',
+    'application/gzip',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _negotiate_encoding():
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(supported)
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BR_LEVEL'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'])
+
+
+# Bytes de entrada acumulados antes de forzar un flush en streaming
+_STREAM_FLUSH_BYTES = 16 * 1024
+
+
+def _compress_stream(chunks, encoding, config):
+    """Comprime un iterable de bytes, vaciando el compresor cada ~16 KiB de entrada"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=config['COMPRESS_BR_LEVEL'])
+        compress_chunk = compressor.process
+        flush = compressor.flush
+        finish = compressor.finish
+    else:
+        compressor = zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)
+        compress_chunk = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+
+    try:
+        pending = 0
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            data = compress_chunk(chunk)
+            pending += len(chunk)
+            if pending >= _STREAM_FLUSH_BYTES:
+                data += flush()
+                pending = 0
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def _is_compressible(response, config):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if 'no-transform' in response.headers.get('Cache-Control', ''):
+        return False
+    mimetype = response.mimetype
+    return mimetype not in _ALREADY_COMPRESSED and mimetype in config['COMPRESS_MIMETYPES']
+
+
+def compress_response(response, config):
+    if not _is_compressible(response, config):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    encoding = _negotiate_encoding()
+    if not encoding:
+        return response
+
+    if response.is_streamed:
+        length = response.content_length
+        if length is not None and length < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.direct_passthrough = False
+        response.response = _compress_stream(response.response, encoding, config)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(_compress(data, encoding, config))
+
+    response.headers['Content-Encoding'] = encoding
+
+    # Un ETag fuerte deja de ser válido al cambiar los bytes del cuerpo
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    return response
+
+
+def init_app(app):
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+
+    @app.after_request
+    def _compress_after_request(response):
+        return compress_response(response, app.config)
@@ -0,0 +1,57 @@
+"""
+GET condicional con ETags débiles.
+
+Cada vista decorada declara una función de versión que obtiene marcadores
+baratos (contadores, max(answered_at), completed_at...) con consultas agregadas.
+Si coinciden con If-None-Match se responde 304 sin ejecutar la consulta completa
+ni la serialización.
+
+No se emite Last-Modified: tiene resolución de un segundo y varias respuestas
+guardadas en el mismo segundo darían la misma fecha, así que un cliente que
+revalidase solo con If-Modified-Since recibiría un 304 con progreso obsoleto.
+"""
+import hashlib
+from functools import wraps
+
+from flask import request, make_response, current_app
+from werkzeug.http import is_resource_modified
+
+
+def _make_etag(markers):
+    raw = repr((request.endpoint, request.query_string, markers)).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()[:24]
+
+
+def _set_validators(response, etag):
+    response.set_etag(etag, weak=True)
+    # Obliga al cliente a revalidar en cada petición (las respuestas dependen del token)
+    response.headers['Cache-Control'] = 'private, no-cache'
+
+
+def conditional_get(version_fn):
+    """
+    Decorador para vistas GET. ``version_fn`` recibe los mismos argumentos que la
+    vista y devuelve los marcadores de versión, o ``None`` si el recurso no existe
+    (la vista se ejecuta entonces con normalidad y devuelve su error).
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            markers = version_fn(*args, **kwargs)
+            if markers is None:
+                return fn(*args, **kwargs)
+
+            etag = _make_etag(markers)
+
+            # Sin last_modified, If-Modified-Since por sí solo nunca produce un 304
+            if not is_resource_modified(request.environ, etag=etag):
+                response = current_app.response_class(status=304)
+                _set_validators(response, etag)
+                return response
+
+            response = make_response(fn(*args, **kwargs))
+            if 200 <= response.status_code < 300:
+                _set_validators(response, etag)
+            return response
+        return decorator
+    return wrapper
@@ -0,0 +1,195 @@
+"""
+Soporte de la cabecera ``Idempotency-Key`` en endpoints POST.
+
+La primera petición con una clave se ejecuta y su respuesta (estado, cuerpo y
+cabeceras relevantes) se guarda junto a la huella de la petición (método, ruta,
+query string y cuerpo). Los reintentos con la misma clave reciben la respuesta
+guardada sin volver a ejecutar la vista ni escribir en la BD:
+
+- misma clave y otra huella  -> 422 (la clave se reutilizó para otra operación)
+- misma clave aún en curso   -> 409 (el cliente debe reintentar más tarde)
+- respuesta 5xx o excepción  -> no se guarda, el reintento vuelve a ejecutarse
+
+Las claves se aíslan por usuario y se guardan en la tabla ``idempotency_records``
+con una restricción única, así que un reintento que llega a otro worker ve la
+reserva o la respuesta del primero. Cada operación usa su propia conexión y
+transacción, independiente de la sesión de la petición. Caducan a los
+``IDEMPOTENCY_TTL_SECONDS``; una reserva sin respuesta más antigua que
+``IDEMPOTENCY_LOCK_SECONDS`` (worker caído) se puede volver a tomar.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import request, jsonify, current_app, make_response
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.idempotency import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Cabeceras de la respuesta original que se reproducen en los reintentos
+_REPLAYED_HEADERS = ('Content-Type', 'Location')
+
+# Frecuencia (por proceso) de la limpieza de registros caducados
+_PURGE_INTERVAL_SECONDS = 300
+
+
+class IdempotencyStore:
+    """Registros por (usuario, clave) en la BD: en curso (sin respuesta) o completados"""
+
+    def __init__(self, ttl=86400, lock_timeout=120):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self._last_purge = 0.0
+
+    def begin(self, key, fingerprint):
+        """
+        Reserva la clave. Devuelve ``('new', None)`` si la petición debe ejecutarse,
+        ``('replay', respuesta)``, ``('in_flight', None)`` o ``('mismatch', None)``.
+        """
+        self._purge()
+        for _ in range(2):
+            try:
+                with db.engine.begin() as conn:
+                    return self._begin(conn, key, fingerprint)
+            except IntegrityError:
+                # Otro worker reservó la misma clave a la vez: volver a leer
+                continue
+        return 'in_flight', None
+
+    def _begin(self, conn, key, fingerprint):
+        table = IdempotencyRecord.__table__
+        scope, client_key = key
+        now = datetime.utcnow()
+        row = conn.execute(
+            select(table.c.id, table.c.fingerprint, table.c.status_code, table.c.body,
+                   table.c.headers, table.c.created_at, table.c.expires_at)
+            .where(table.c.scope == scope, table.c.key == client_key)
+        ).first()
+
+        abandoned = row is not None and row.status_code is None \
+            and row.created_at <= now - timedelta(seconds=self.lock_timeout)
+        if row is not None and (row.expires_at <= now or abandoned):
+            conn.execute(delete(table).where(table.c.id == row.id))
+            row = None
+
+        if row is None:
+            conn.execute(insert(table).values(
+                scope=scope, key=client_key, fingerprint=fingerprint,
+                created_at=now, expires_at=now + timedelta(seconds=self.ttl)
+            ))
+            return 'new', None
+        if row.fingerprint != fingerprint:
+            return 'mismatch', None
+        if row.status_code is None:
+            return 'in_flight', None
+        return 'replay', (row.status_code, row.body, json.loads(row.headers or '[]'))
+
+    def complete(self, key, response):
+        status_code, body, headers = response
+        table = IdempotencyRecord.__table__
+        scope, client_key = key
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(table)
+                .where(table.c.scope == scope, table.c.key == client_key, table.c.status_code.is_(None))
+                .values(status_code=status_code, body=body, headers=json.dumps(headers),
+                        expires_at=datetime.utcnow() + timedelta(seconds=self.ttl))
+            )
+
+    def release(self, key):
+        """Libera una clave sin respuesta guardada (fallo del servidor)"""
+        table = IdempotencyRecord.__table__
+        scope, client_key = key
+        with db.engine.begin() as conn:
+            conn.execute(delete(table).where(
+                table.c.scope == scope, table.c.key == client_key, table.c.status_code.is_(None)
+            ))
+
+    def _purge(self):
+        if time.monotonic() - self._last_purge < _PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        table = IdempotencyRecord.__table__
+        with db.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.expires_at <= datetime.utcnow()))
+
+
+def get_store():
+    return current_app.extensions['idempotency_store']
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(request.path.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(request.query_string)
+    digest.update(b'\0')
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _replay(saved):
+    status, body, headers = saved
+    response = make_response(body, status)
+    for name, value in headers:
+        response.headers[name] = value
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(fn):
+    """
+    Decorador para vistas POST (debajo de ``@jwt_required()``). Sin cabecera
+    ``Idempotency-Key`` la vista se ejecuta con normalidad.
+    """
+    @wraps(fn)
+    def decorator(*args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if not client_key:
+            return fn(*args, **kwargs)
+        if len(client_key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        store = get_store()
+        key = (str(get_jwt_identity()), client_key)
+        state, saved = store.begin(key, _fingerprint())
+
+        if state == 'replay':
+            return _replay(saved)
+        if state == 'mismatch':
+            return jsonify({'error': f'{HEADER} was already used with a different request'}), 422
+        if state == 'in_flight':
+            response = jsonify({'error': f'A request with this {HEADER} is still in progress'})
+            response.headers['Retry-After'] = '1'
+            return response, 409
+
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except BaseException:
+            store.release(key)
+            raise
+
+        if response.status_code >= 500 or response.is_streamed:
+            store.release(key)
+        else:
+            headers = [(name, response.headers[name]) for name in _REPLAYED_HEADERS if name in response.headers]
+            store.complete(key, (response.status_code, response.get_data(), headers))
+        return response
+    return decorator
+
+
+def init_app(app):
+    app.extensions['idempotency_store'] = IdempotencyStore(
+        ttl=app.config['IDEMPOTENCY_TTL_SECONDS'],
+        lock_timeout=app.config['IDEMPOTENCY_LOCK_SECONDS']
+    )
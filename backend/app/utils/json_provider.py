@@ -0,0 +1,132 @@
+"""
+Proveedor JSON de alto rendimiento para las respuestas de la API.
+
+Usa orjson si está instalado y, si no, el módulo json de la librería estándar.
+En ambos casos los ``datetime`` se serializan en ISO 8601 (el mismo formato que
+``to_dict()``) y los modelos que exponen ``__json__`` se serializan sin pasar
+por ``to_dict()`` ni por ``isoformat()`` en Python.
+
+orjson siempre escribe UTF-8; con ``ensure_ascii`` (por defecto en Flask) los
+caracteres no ASCII se escapan después como ``\\uXXXX``, igual que el módulo json.
+"""
+import json
+import re
+import uuid
+import decimal
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+_NON_ASCII_RE = re.compile(rb'[\x80-\xff]+')
+
+
+def _escape_char(char):
+    code = ord(char)
+    if code > 0xFFFF:
+        # Fuera del plano básico: par sustituto, como json.dumps
+        code -= 0x10000
+        return '\\u%04x\\u%04x' % (0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+    return '\\u%04x' % code
+
+
+def _ascii_escape(data):
+    """Escapa los caracteres no ASCII de un JSON en UTF-8 (solo pueden estar dentro de cadenas)"""
+    if data.isascii():
+        return data
+    return _NON_ASCII_RE.sub(
+        lambda match: ''.join(map(_escape_char, match.group().decode('utf-8'))).encode('ascii'),
+        data
+    )
+
+
+def _default(o):
+    json_fn = getattr(o, '__json__', None)
+    if json_fn is not None:
+        return json_fn()
+
+    if isinstance(o, date):
+        return o.isoformat()
+
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON intercambiable (``JSON_PROVIDER``: auto, orjson, stdlib).
+    Mantiene la semántica de Flask para ``sort_keys`` y ``compact``.
+    """
+
+    default = staticmethod(_default)
+
+    def __init__(self, app, backend='auto'):
+        super().__init__(app)
+
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_PROVIDER=orjson but orjson is not installed')
+
+        self.backend = 'orjson' if orjson is not None and backend in ('auto', 'orjson') else 'stdlib'
+
+    def _orjson_option(self, sort_keys, indent):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=False):
+        """Serializa directamente a bytes UTF-8 (sin decodificar a str)"""
+        if self.backend == 'orjson':
+            data = orjson.dumps(obj, default=_default, option=self._orjson_option(self.sort_keys, indent))
+            return _ascii_escape(data) if self.ensure_ascii else data
+
+        separators = None if indent else (',', ':')
+        return json.dumps(
+            obj,
+            default=_default,
+            ensure_ascii=self.ensure_ascii,
+            sort_keys=self.sort_keys,
+            indent=2 if indent else None,
+            separators=separators
+        ).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self.backend == 'orjson':
+            option = self._orjson_option(kwargs.get('sort_keys', self.sort_keys), kwargs.get('indent'))
+            data = orjson.dumps(obj, default=kwargs.get('default', _default), option=option)
+            if kwargs.get('ensure_ascii', self.ensure_ascii):
+                data = _ascii_escape(data)
+            return data.decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=indent) + b'\n',
+            mimetype=self.mimetype
+        )
+
+
+def init_app(app):
+    provider = FastJSONProvider(app, backend=app.config.get('JSON_PROVIDER', 'auto'))
+    provider.sort_keys = app.config.get('JSON_SORT_KEYS', True)
+    app.json = provider
+    return provider
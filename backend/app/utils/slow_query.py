@@ -0,0 +1,220 @@
+"""
+Registro opt-in de consultas lentas con captura automática de EXPLAIN.
+
+Se engancha a los eventos de cursor del engine de ``app.db``. Cada sentencia que
+supera ``SLOW_QUERY_THRESHOLD_MS`` se registra en el log con sus parámetros y el
+endpoint que la originó, y se agrega por huella normalizada (literales y listas
+IN reemplazadas por ``?``) para que consultas equivalentes compartan entrada.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict, Counter
+from datetime import datetime
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAM_RE = re.compile(r'%\(\w+\)s|%s|:\w+|\$\d+')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_EXPLAIN_PREFIX = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+    'mariadb': 'EXPLAIN ',
+}
+
+_MAX_PARAMS_LENGTH = 500
+
+
+def fingerprint(statement):
+    """Normaliza una sentencia SQL para agrupar ejecuciones equivalentes"""
+    normalized = _STRING_RE.sub('?', statement)
+    normalized = _PARAM_RE.sub('?', normalized)
+    normalized = _NUMBER_RE.sub('?', normalized)
+    normalized = _IN_LIST_RE.sub('IN (...)', normalized)
+    return _WHITESPACE_RE.sub(' ', normalized).strip()
+
+
+class SlowQueryLog:
+    """Agregado en memoria de consultas lentas, acotado por número de huellas"""
+
+    def __init__(self, threshold_ms=200, explain=True, max_fingerprints=200, logger=None):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.max_fingerprints = max_fingerprints
+        self.logger = logger
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, statement, parameters, duration_ms, endpoint, plan_fn=None):
+        key = fingerprint(statement)
+        params_repr = repr(parameters)
+        if len(params_repr) > _MAX_PARAMS_LENGTH:
+            params_repr = params_repr[:_MAX_PARAMS_LENGTH] + '...'
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    'fingerprint': key,
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'endpoints': Counter(),
+                    'first_seen': datetime.utcnow(),
+                    'sample': None,
+                    'plan': None
+                }
+                self._entries[key] = entry
+                while len(self._entries) > self.max_fingerprints:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['last_seen'] = datetime.utcnow()
+            entry['endpoints'][endpoint or '<no request>'] += 1
+            is_new_max = duration_ms > entry['max_ms']
+            if is_new_max:
+                entry['max_ms'] = duration_ms
+                entry['sample'] = {
+                    'statement': statement,
+                    'parameters': params_repr,
+                    'duration_ms': round(duration_ms, 2),
+                    'endpoint': endpoint
+                }
+
+        # El plan se captura fuera del lock y solo cuando cambia la muestra más lenta
+        plan = None
+        if is_new_max and self.explain and plan_fn is not None:
+            plan = plan_fn()
+            with self._lock:
+                if key in self._entries:
+                    self._entries[key]['plan'] = plan
+
+        if self.logger is not None:
+            self.logger.warning(
+                'Slow query (%.1f ms) [%s] %s | params=%s%s',
+                duration_ms, endpoint or '<no request>', statement, params_repr,
+                f'\n  plan: {" | ".join(plan)}' if plan else ''
+            )
+
+    def snapshot(self, sort='total_ms', limit=50):
+        with self._lock:
+            entries = [dict(entry, endpoints=dict(entry['endpoints'])) for entry in self._entries.values()]
+
+        for entry in entries:
+            entry['avg_ms'] = round(entry['total_ms'] / entry['count'], 2)
+            entry['total_ms'] = round(entry['total_ms'], 2)
+            entry['max_ms'] = round(entry['max_ms'], 2)
+            entry['first_seen'] = entry['first_seen'].isoformat()
+            entry['last_seen'] = entry['last_seen'].isoformat()
+
+        if sort not in ('total_ms', 'max_ms', 'avg_ms', 'count'):
+            sort = 'total_ms'
+        entries.sort(key=lambda e: e[sort], reverse=True)
+        return entries[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _current_endpoint():
+    if has_request_context():
+        return request.endpoint or request.path
+    return None
+
+
+def _explain(conn, statement, parameters):
+    """
+    Ejecuta EXPLAIN fuera de la transacción de la petición. En PostgreSQL un EXPLAIN
+    fallido abortaría esa transacción, así que se usa otra conexión del pool. En SQLite
+    un error no aborta la transacción y una base en memoria no se ve desde otra
+    conexión, así que se reutiliza la misma con un cursor nuevo.
+    """
+    dialect_name = conn.dialect.name
+    prefix = _EXPLAIN_PREFIX.get(dialect_name)
+    if prefix is None:
+        return None
+
+    own_connection = dialect_name != 'sqlite'
+    try:
+        dbapi_connection = conn.engine.raw_connection() if own_connection else conn.connection
+    except Exception as e:
+        return [f'EXPLAIN failed: {str(e)}']
+    try:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception as e:
+            return [f'EXPLAIN failed: {str(e)}']
+        finally:
+            cursor.close()
+    finally:
+        if own_connection:
+            try:
+                dbapi_connection.rollback()
+            finally:
+                dbapi_connection.close()
+
+    if dialect_name == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [' '.join(str(col) for col in row) for row in rows]
+
+
+def init_app(app):
+    """Registra los listeners en el engine de la app si el log está habilitado"""
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED'):
+        return None
+
+    from app import db
+
+    slow_log = SlowQueryLog(
+        threshold_ms=app.config.get('SLOW_QUERY_THRESHOLD_MS', 200),
+        explain=app.config.get('SLOW_QUERY_EXPLAIN', True),
+        max_fingerprints=app.config.get('SLOW_QUERY_MAX_FINGERPRINTS', 200),
+        logger=app.logger
+    )
+    app.extensions['slow_query_log'] = slow_log
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        duration_ms = (time.perf_counter() - starts.pop()) * 1000
+        if duration_ms < slow_log.threshold_ms:
+            return
+
+        plan_fn = None
+        if not executemany and statement.lstrip()[:6].upper().startswith(('SELECT', 'WITH')):
+            plan_fn = lambda: _explain(conn, statement, parameters)
+
+        slow_log.record(statement, parameters, duration_ms, _current_endpoint(), plan_fn)
+
+    @event.listens_for(engine, 'handle_error')
+    def _handle_error(context):
+        # Una sentencia fallida no llega a after_cursor_execute: se descarta su inicio
+        if context.connection is None or context.statement is None:
+            return
+        starts = context.connection.info.get('slow_query_start')
+        if starts:
+            starts.pop()
+
+    return slow_log
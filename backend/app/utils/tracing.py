@@ -0,0 +1,466 @@
+"""
+Trazas ligeras (spans anidados) opt-in con ``TRACING_ENABLED``.
+
+Cada petición abre un span raíz que termina al cerrarse la respuesta (incluye la
+transferencia del cuerpo). ``span(nombre, **atributos)`` abre spans hijos del
+actual, guardado en un ``ContextVar``; cada sentencia SQL ejecutada dentro de un
+span se registra como hijo ``db.query`` con su huella normalizada.
+
+El contexto de traza se propaga:
+
+- desde el cliente con la cabecera W3C ``traceparent`` (y se devuelve en la respuesta);
+- a los hilos de render de reportes con ``current_context()`` / ``use_context()``.
+
+Los spans terminados se encolan y un hilo en segundo plano los exporta por
+lotes a un fichero JSONL (``TRACING_EXPORTER=jsonl``) o a un colector OTLP/HTTP
+en JSON (``TRACING_EXPORTER=otlp``). Con el trazado desactivado ``span()``
+devuelve un span vacío y no se registra ningún listener.
+"""
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from werkzeug.wsgi import ClosingIterator
+
+_TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current_span = ContextVar('cyberlynx_current_span', default=None)
+_tracer = None
+
+
+class _TraceState:
+    """Estado compartido por los spans de una traza en este proceso"""
+
+    def __init__(self):
+        self.spans = 0
+        self.lock = threading.Lock()
+
+
+class Span:
+    def __init__(self, tracer, name, trace_id, parent_id, state, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.state = state
+        self.attributes = dict(attributes or {})
+        self.status = 'ok'
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.sampled = True
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_exception(self, exc):
+        self.status = 'error'
+        self.error = f'{type(exc).__name__}: {exc}'[:500]
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.export(self)
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes
+        }
+
+
+class _NoopSpan:
+    """Span de una traza no muestreada (o sin trazado): no registra nada"""
+
+    sampled = False
+    trace_id = None
+    span_id = None
+    state = None
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+# ========== EXPORTADORES ==========
+
+class JsonlExporter:
+    """Un span por línea en un fichero local"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def __call__(self, spans, service_name):
+        lines = ''.join(json.dumps(dict(span, service=service_name), ensure_ascii=False) + '\n' for span in spans)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class OtlpHttpExporter:
+    """POST del lote en formato OTLP/HTTP JSON (``/v1/traces``)"""
+
+    def __init__(self, endpoint, timeout=5):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def __call__(self, spans, service_name):
+        payload = {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+            'scopeSpans': [{
+                'scope': {'name': 'cyberlynx.tracing'},
+                'spans': [{
+                    'traceId': span['trace_id'],
+                    'spanId': span['span_id'],
+                    'parentSpanId': span['parent_id'] or '',
+                    'name': span['name'],
+                    'kind': 2 if span['parent_id'] is None else 1,
+                    'startTimeUnixNano': str(span['start_ns']),
+                    'endTimeUnixNano': str(span['end_ns']),
+                    'attributes': [{'key': key, 'value': _otlp_value(value)}
+                                   for key, value in span['attributes'].items() if value is not None],
+                    'status': {'code': 2, 'message': span['error'] or ''} if span['status'] == 'error' else {'code': 1}
+                } for span in spans]
+            }]
+        }]}
+        req = urllib.request.Request(self.endpoint, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            response.read()
+
+
+class Tracer:
+    """Crea spans y los exporta por lotes desde un hilo en segundo plano"""
+
+    BATCH_SIZE = 256
+
+    def __init__(self, exporter, service_name, sample_rate=1.0, max_spans_per_trace=1000,
+                 queue_size=10000, flush_interval=1.0):
+        self.exporter = exporter
+        self.service_name = service_name
+        self.sample_rate = sample_rate
+        self.max_spans_per_trace = max_spans_per_trace
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.export_errors = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._worker = None
+        self._worker_pid = None
+        self._lock = threading.Lock()
+
+    def start_span(self, name, parent=None, attributes=None):
+        parent = parent if parent is not None else _current_span.get()
+        if parent is None:
+            if random.random() >= self.sample_rate:
+                return NOOP_SPAN
+            return Span(self, name, '%032x' % random.getrandbits(128), None, _TraceState(), attributes)
+        if not parent.sampled:
+            return NOOP_SPAN
+
+        state = parent.state or _TraceState()
+        with state.lock:
+            state.spans += 1
+            if state.spans > self.max_spans_per_trace:
+                return NOOP_SPAN
+        return Span(self, name, parent.trace_id, parent.span_id, state, attributes)
+
+    def export(self, span):
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_worker(self):
+        # El hilo no sobrevive al fork de gunicorn: uno por proceso
+        if self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                self._worker = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+                self._worker.start()
+                self._worker_pid = os.getpid()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            self.exporter(batch, self.service_name)
+        except Exception as e:
+            self.export_errors += 1
+            if self.export_errors == 1 or self.export_errors % 100 == 0:
+                print(f"⚠️  Error exportando trazas ({self.export_errors}): {str(e)}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout=5):
+        """Espera a que se exporte lo encolado (tests y cierre ordenado)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+# ========== API ==========
+
+def get_tracer():
+    return _tracer
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+def set_attributes(**attributes):
+    """Añade atributos al span actual (si lo hay)"""
+    current_span().set_attributes(**attributes)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Span hijo del actual mientras dura el bloque; registra la excepción si la hay"""
+    tracer = _tracer
+    if tracer is None:
+        yield NOOP_SPAN
+        return
+
+    current = tracer.start_span(name, attributes=attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def current_context():
+    """Contexto de la traza actual para continuarla en otro hilo (o None)"""
+    return _current_span.get()
+
+
+@contextmanager
+def use_context(context):
+    """Continúa en este hilo la traza capturada con ``current_context()``"""
+    token = _current_span.set(context)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+
+
+def _on_close(response, callback):
+    """
+    ``call_on_close`` que también funciona con ``direct_passthrough`` (``send_file``):
+    Werkzeug entrega ese cuerpo tal cual y no llama a los callbacks de la respuesta,
+    así que se encadena al ``close()`` del propio cuerpo sin envolverlo (el servidor
+    sigue pudiendo usar ``sendfile`` con su ``wsgi.file_wrapper``).
+    """
+    body = response.response
+    if not response.direct_passthrough or isinstance(body, (list, tuple)):
+        response.call_on_close(callback)
+        return
+    body_close = getattr(body, 'close', None)
+
+    def close():
+        try:
+            if body_close is not None:
+                body_close()
+        finally:
+            callback()
+
+    try:
+        body.close = close
+    except AttributeError:
+        response.response = ClosingIterator(body, [callback])
+
+
+def span_until_closed(response, name, **attributes):
+    """Span que termina cuando el servidor cierra la respuesta (p. ej. la transferencia de un fichero)"""
+    tracer = _tracer
+    if tracer is None:
+        return response
+    transfer = tracer.start_span(name, attributes=attributes)
+    if response.content_length is not None:
+        transfer.set_attributes(**{'http.response_content_length': response.content_length})
+    _on_close(response, transfer.end)
+    return response
+
+
+# ========== PETICIONES ==========
+
+def _parse_traceparent(header):
+    match = _TRACEPARENT_RE.match((header or '').strip().lower())
+    if not match or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    remote = Span.__new__(Span)
+    remote.trace_id, remote.span_id = match.group(1), match.group(2)
+    remote.sampled = bool(int(match.group(3), 16) & 1)
+    remote.state = _TraceState()
+    return remote if remote.sampled else NOOP_SPAN
+
+
+def _before_request():
+    remote = _parse_traceparent(request.headers.get('traceparent'))
+    route = request.url_rule.rule if request.url_rule else request.path
+    root = _tracer.start_span(f'{request.method} {route}', parent=remote, attributes={
+        'http.method': request.method,
+        'http.route': route,
+        # Sin query string: puede llevar tokens u otros datos sensibles
+        'http.target': request.path,
+        'http.client_ip': request.remote_addr
+    })
+    g.trace_root = root
+    g.trace_token = _current_span.set(root)
+
+
+def _after_request(response):
+    root = g.get('trace_root')
+    if root is None or not root.sampled:
+        return response
+    root.set_attributes(**{'http.status_code': response.status_code})
+    if response.status_code >= 500:
+        root.status = 'error'
+    response.headers['traceparent'] = f'00-{root.trace_id}-{root.span_id}-01'
+    response.headers['X-Trace-Id'] = root.trace_id
+    # Termina al cerrarse la respuesta: incluye la transferencia del cuerpo
+    _on_close(response, root.end)
+    g.trace_closing = True
+    return response
+
+
+def _teardown_request(exc):
+    root = g.pop('trace_root', None)
+    token = g.pop('trace_token', None)
+    if token is not None:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Respuesta en streaming cerrada desde otro contexto
+            _current_span.set(None)
+    if root is not None and not g.pop('trace_closing', False):
+        # Sin after_request (excepción no controlada): terminar aquí
+        if exc is not None:
+            root.record_exception(exc)
+        root.end()
+
+
+# ========== SQL ==========
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    if parent is None or not parent.sampled:
+        return
+    from app.utils.slow_query import fingerprint
+
+    query_span = _tracer.start_span('db.query', parent=parent, attributes={
+        'db.system': conn.dialect.name,
+        'db.statement': fingerprint(statement)[:1000],
+        'db.executemany': executemany
+    })
+    conn.info.setdefault('trace_spans', []).append(query_span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get('trace_spans')
+    if spans:
+        query_span = spans.pop()
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            query_span.set_attributes(**{'db.rowcount': cursor.rowcount})
+        query_span.end()
+
+
+def _handle_error(exception_context):
+    spans = exception_context.connection.info.get('trace_spans') if exception_context.connection else None
+    if spans:
+        query_span = spans.pop()
+        query_span.record_exception(exception_context.original_exception)
+        query_span.end()
+
+
+def init_app(app):
+    """Activa el trazado si ``TRACING_ENABLED`` (peticiones, SQL y exportador)"""
+    global _tracer
+
+    if not app.config.get('TRACING_ENABLED'):
+        return None
+
+    if app.config['TRACING_EXPORTER'] == 'otlp':
+        exporter = OtlpHttpExporter(app.config['TRACING_OTLP_ENDPOINT'])
+    else:
+        exporter = JsonlExporter(app.config['TRACING_FILE'] or os.path.join(app.instance_path, 'traces.jsonl'))
+
+    _tracer = Tracer(
+        exporter,
+        service_name=app.config['TRACING_SERVICE_NAME'],
+        sample_rate=app.config['TRACING_SAMPLE_RATE'],
+        max_spans_per_trace=app.config['TRACING_MAX_SPANS_PER_TRACE']
+    )
+    app.extensions['tracer'] = _tracer
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+    if app.config.get('TRACING_SQL', True):
+        from app import db
+
+        with app.app_context():
+            engine = db.engine
+        for name, listener in (('before_cursor_execute', _before_cursor_execute),
+                               ('after_cursor_execute', _after_cursor_execute),
+                               ('handle_error', _handle_error)):
+            if not event.contains(engine, name, listener):
+                event.listen(engine, name, listener)
+
+    return _tracer
@@ -0,0 +1,39 @@
+"""
+Acciones diferidas hasta el commit de la sesión.
+
+``on_commit(fn)`` guarda la función en la sesión actual y la ejecuta justo
+después del commit; si la transacción hace rollback se descarta. Sirve para
+lanzar trabajo en segundo plano (p. ej. renderizar reportes) solo cuando los
+datos ya son visibles para otras conexiones.
+"""
+import traceback
+
+from sqlalchemy import event
+
+from app import db
+
+_CALLBACKS_KEY = 'on_commit_callbacks'
+
+
+def on_commit(callback):
+    db.session.info.setdefault(_CALLBACKS_KEY, []).append(callback)
+
+
+def _after_commit(session):
+    for callback in session.info.pop(_CALLBACKS_KEY, None) or ():
+        try:
+            callback()
+        except Exception:
+            # El commit ya se hizo: un fallo aquí no debe romper la petición
+            print("🚨 Error en acción tras commit:")
+            traceback.print_exc()
+
+
+def _after_rollback(session):
+    session.info.pop(_CALLBACKS_KEY, None)
+
+
+def init_app(app):
+    for name, listener in (('after_commit', _after_commit), ('after_rollback', _after_rollback)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
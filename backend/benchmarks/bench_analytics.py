@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la analítica de fallos por pregunta sobre un dataset sintético.
+
+Mide solo el cálculo vectorizado (compute_heatmap) con el dataset ya cargado en
+memoria, que es el coste de cada petición tras el calentamiento.
+
+Uso:
+    python benchmarks/bench_analytics.py [--responses 2000000] [--questions 400] [--audits 50000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.question_analytics import QuestionDataset, compute_heatmap
+
+CATEGORIES = ['Access_Control', 'Data_Protection', 'Incident_Response', 'Network_Security', 'Physical_Security']
+
+
+def build_dataset(responses, questions, audits, seed=42):
+    rng = np.random.default_rng(seed)
+    # Cada pregunta tiene su propia probabilidad de fallo
+    failure_p = rng.uniform(0.05, 0.6, size=questions)
+    question_idx = rng.integers(0, questions, size=responses, dtype=np.int32)
+    draws = rng.random(responses)
+    answers = np.where(draws < failure_p[question_idx], 1, np.where(draws > 0.95, 2, 0)).astype(np.int8)
+    months = (np.datetime64('2020-01', 'M') + rng.integers(0, 72, size=responses)).astype('datetime64[M]')
+
+    return QuestionDataset(
+        marker='bench',
+        question_idx=question_idx,
+        audit_idx=rng.integers(0, audits, size=responses, dtype=np.int32),
+        answers=answers,
+        months=months,
+        question_ids=np.arange(1, questions + 1, dtype=np.int64),
+        question_texts=[f'Pregunta {i}' for i in range(questions)],
+        question_severities=[('Low', 'Medium', 'High', 'Critical')[i % 4] for i in range(questions)],
+        question_category_idx=np.arange(questions, dtype=np.int32) % len(CATEGORIES),
+        categories=CATEGORIES,
+        audit_ids=np.arange(1, audits + 1, dtype=np.int64)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--responses', type=int, default=2_000_000)
+    parser.add_argument('--questions', type=int, default=400)
+    parser.add_argument('--audits', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    dataset = build_dataset(args.responses, args.questions, args.audits)
+    print(f'Dataset: {args.responses:,} respuestas, {args.questions} preguntas, {args.audits:,} auditorías')
+
+    scenarios = {
+        'todas las categorías': {},
+        'Network_Security desde 2023': {'categories': ['Network_Security'], 'since': '2023-01-01'},
+        'top 100': {'top': 100},
+    }
+    for name, kwargs in scenarios.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            compute_heatmap(dataset, **kwargs)
+            timings.append(time.perf_counter() - start)
+        print(f'{name:<32} mejor {min(timings) * 1000:8.1f} ms   media {sum(timings) / len(timings) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialización JSON sobre payloads de 10k filas.
+
+Compara la ruta original (to_dict() + proveedor por defecto de Flask) con
+FastJSONProvider en sus dos backends (orjson / stdlib), tanto con to_dict()
+como con la ruta ligera __json__ de los modelos.
+
+Uso:
+    python benchmarks/bench_json.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from app.utils.json_provider import FastJSONProvider, orjson
+
+
+def build_assets(rows):
+    from app.models.asset import Asset
+
+    now = datetime.utcnow()
+    return [
+        Asset(
+            id=i,
+            name=f'server-{i:05d}',
+            type=('Hardware', 'Software', 'Network')[i % 3],
+            location=f'Rack {i % 40}',
+            status='Active',
+            description='Servidor de aplicaciones ' * 3,
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+            created_by=1
+        )
+        for i in range(rows)
+    ]
+
+
+def measure(label, fn, rows, repeat, baseline=None):
+    fn()  # calentamiento
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn())
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    speedup = f'x{baseline / best:.2f}' if baseline else 'base'
+    print(f'{label:<28} {best * 1000:9.1f} ms  {rows / best:12,.0f} rows/s  {size / 1024:7.0f} KiB  {speedup}')
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app('production')
+    with app.app_context():
+        assets = build_assets(args.rows)
+        default_provider = DefaultJSONProvider(app)
+        stdlib_provider = FastJSONProvider(app, backend='stdlib')
+
+        print(f'Serializando {args.rows} activos (mejor de {args.repeat})\n')
+
+        baseline = measure(
+            'flask default + to_dict()',
+            lambda: default_provider.response({'assets': [a.to_dict() for a in assets]}).get_data(),
+            args.rows, args.repeat
+        )
+        results = {
+            'stdlib + to_dict()': lambda: stdlib_provider.response({'assets': [a.to_dict() for a in assets]}).get_data(),
+            'stdlib + __json__': lambda: stdlib_provider.response({'assets': assets}).get_data(),
+        }
+
+        if orjson is not None:
+            orjson_provider = FastJSONProvider(app, backend='orjson')
+            results['orjson + to_dict()'] = lambda: orjson_provider.response({'assets': [a.to_dict() for a in assets]}).get_data()
+            results['orjson + __json__'] = lambda: orjson_provider.response({'assets': assets}).get_data()
+        else:
+            print('(orjson no instalado: se omiten los casos orjson)')
+
+        for label, fn in results.items():
+            measure(label, fn, args.rows, args.repeat, baseline)
+
+
+if __name__ == '__main__':
+    main()
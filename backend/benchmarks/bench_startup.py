@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque: tiempo de import (-X importtime) y RSS tras create_app().
+
+Arranca un intérprete limpio que ejecuta ``create_app()`` y comprueba:
+  * que los motores de reportes (reportlab, openpyxl) y numpy no se importan al arrancar
+  * que el tiempo acumulado de import y la RSS no superan los umbrales
+  * opcionalmente, que no empeoran más de --tolerance respecto a una línea base
+
+Sale con código 1 si se detecta una regresión, para poder usarlo en CI.
+
+Uso:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --save-baseline benchmarks/startup_baseline.json
+    python benchmarks/bench_startup.py --baseline benchmarks/startup_baseline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos pesados que solo deben cargarse al generar el primer reporte o análisis
+LAZY_MODULES = ('reportlab', 'openpyxl', 'numpy')
+
+_PROBE = """
+import sys
+from app import create_app
+app = create_app('production')
+rss_kb = 0
+try:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb //= 1024
+print(rss_kb)
+"""
+
+
+def run_probe():
+    env = dict(os.environ)
+    env.pop('REPORTS_PRELOAD', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+    total_us = 0
+    modules = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        modules[name.strip()] = int(self_us)
+
+    return {
+        'import_ms': total_us / 1000,
+        'rss_mb': int(result.stdout.strip().splitlines()[-1]) / 1024,
+        'modules': modules
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float, default=1500)
+    parser.add_argument('--max-rss-mb', type=float, default=120)
+    parser.add_argument('--baseline', help='JSON con una medición previa para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='empeoramiento máximo respecto a la línea base')
+    parser.add_argument('--save-baseline', help='guardar la medición actual como línea base')
+    args = parser.parse_args()
+
+    samples = [run_probe() for _ in range(args.runs)]
+    import_ms = statistics.median(s['import_ms'] for s in samples)
+    rss_mb = statistics.median(s['rss_mb'] for s in samples)
+    modules = samples[-1]['modules']
+
+    print(f'Import time (mediana de {args.runs}): {import_ms:8.1f} ms')
+    print(f'RSS tras create_app():        {rss_mb:8.1f} MiB')
+    print('\nMódulos más lentos (tiempo propio):')
+    for name, self_us in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:8]:
+        print(f'  {self_us / 1000:8.1f} ms  {name}')
+
+    failures = []
+    eager = [module for module in LAZY_MODULES if module in modules]
+    if eager:
+        failures.append(f'módulos que deberían cargarse de forma perezosa: {", ".join(eager)}')
+    if import_ms > args.max_import_ms:
+        failures.append(f'import time {import_ms:.1f} ms > {args.max_import_ms} ms')
+    if rss_mb > args.max_rss_mb:
+        failures.append(f'RSS {rss_mb:.1f} MiB > {args.max_rss_mb} MiB')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for key, current in (('import_ms', import_ms), ('rss_mb', rss_mb)):
+            limit = baseline[key] * (1 + args.tolerance)
+            if current > limit:
+                failures.append(f'{key} {current:.1f} > línea base {baseline[key]:.1f} (+{args.tolerance:.0%})')
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'import_ms': round(import_ms, 1), 'rss_mb': round(rss_mb, 1)}, f, indent=2)
+        print(f'\nLínea base guardada en {args.save_baseline}')
+
+    if failures:
+        print('\n❌ Regresión de arranque:')
+        for failure in failures:
+            print(f'  - {failure}')
+        sys.exit(1)
+
+    print('\n✅ Arranque dentro de los límites')
+
+
+if __name__ == '__main__':
+    main()
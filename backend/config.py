@@ -1,6 +1,19 @@
 import os
 from datetime import timedelta
 
+def _env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def _env_weights(name, default=''):
+    """Pesos 'Clave:valor,Clave:valor' de una variable de entorno"""
+    raw = os.environ.get(name)
+    raw = default if raw is None else raw
+    return {key.strip(): float(value) for key, value in
+            (item.split(':', 1) for item in raw.split(',') if ':' in item)}
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-2024'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///cyberlynx.db'
@@ -14,6 +27,84 @@ class Config:
     JWT_ACCESS_CSRF_HEADER_NAME = None
     JWT_REFRESH_CSRF_HEADER_NAME = None
 
+    # REGISTRO DE CONSULTAS LENTAS (opt-in)
+    SLOW_QUERY_LOG_ENABLED = _env_bool('SLOW_QUERY_LOG_ENABLED')
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS') or 200)
+    SLOW_QUERY_EXPLAIN = _env_bool('SLOW_QUERY_EXPLAIN', True)
+    SLOW_QUERY_MAX_FINGERPRINTS = int(os.environ.get('SLOW_QUERY_MAX_FINGERPRINTS') or 200)
+
+    # TRAZAS (opt-in): spans por petición, etapa de reporte y sentencia SQL
+    TRACING_ENABLED = _env_bool('TRACING_ENABLED')
+    TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER') or 'jsonl'  # jsonl | otlp
+    TRACING_FILE = os.environ.get('TRACING_FILE')  # vacío = <instance>/traces.jsonl
+    TRACING_OTLP_ENDPOINT = os.environ.get('TRACING_OTLP_ENDPOINT') or 'http://localhost:4318/v1/traces'
+    TRACING_SERVICE_NAME = os.environ.get('TRACING_SERVICE_NAME') or 'cyberlynx-backend'
+    TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE') or 1.0)
+    TRACING_SQL = _env_bool('TRACING_SQL', True)
+    TRACING_MAX_SPANS_PER_TRACE = int(os.environ.get('TRACING_MAX_SPANS_PER_TRACE') or 1000)
+
+    # SERIALIZACIÓN JSON (auto: orjson si está instalado, si no stdlib)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER') or 'auto'
+    JSON_SORT_KEYS = _env_bool('JSON_SORT_KEYS', True)
+
+    # COMPRESIÓN DE RESPUESTAS (brotli si está instalado, si no gzip)
+    COMPRESS_ENABLED = _env_bool('COMPRESS_ENABLED', True)
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 1024)
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL') or 6)
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL') or 4)
+    COMPRESS_MIMETYPES = [
+        'application/json',
+        'text/csv',
+        'text/plain',
+        'text/html'
+    ]
+
+    # SERVIDOR DE PRODUCCIÓN (flask serve, ver app/server.py)
+    SERVER_BIND = os.environ.get('SERVER_BIND') or '127.0.0.1:5000'
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS') or os.environ.get('WEB_CONCURRENCY') or 0)
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS') or 4)
+    SERVER_TIMEOUT = int(os.environ.get('SERVER_TIMEOUT') or 60)
+    SERVER_GRACEFUL_TIMEOUT = int(os.environ.get('SERVER_GRACEFUL_TIMEOUT') or 30)
+    SERVER_KEEPALIVE = int(os.environ.get('SERVER_KEEPALIVE') or 5)
+    SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS') or 0)
+
+    # MOTORES DE REPORTES A PRECARGAR AL ARRANCAR (p. ej. "pdf,xlsx"; vacío = carga perezosa)
+    REPORTS_PRELOAD = [fmt.strip() for fmt in (os.environ.get('REPORTS_PRELOAD') or '').split(',') if fmt.strip()]
+    # REPORTES PRE-RENDERIZADOS (se generan en segundo plano al completar una auditoría)
+    REPORTS_STORE_DIR = os.environ.get('REPORTS_STORE_DIR')  # vacío = <instance>/reports
+    REPORTS_PRERENDER_FORMATS = [fmt.strip() for fmt in (os.environ.get('REPORTS_PRERENDER_FORMATS') or 'pdf').split(',') if fmt.strip()]
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS') or 2)
+    # Tiempo máximo que una descarga espera a un render en curso antes de renderizar ella misma
+    REPORTS_RENDER_WAIT_SECONDS = float(os.environ.get('REPORTS_RENDER_WAIT_SECONDS') or 30)
+
+    # CACHÉ EN MEMORIA (TTL en segundos; se invalida también al escribir en las tablas implicadas)
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL') or 30)
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES') or 256)
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL') or 30)
+    # Resultados de analítica: la clave incluye el marcador de datos, así que el TTL solo limita memoria
+    ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL') or 600)
+
+    # PUNTUACIÓN DE RIESGO: peso de una respuesta 'No' = severidad × categoría (sin valor = 1)
+    RISK_SEVERITY_WEIGHTS = _env_weights('RISK_SEVERITY_WEIGHTS', 'Critical:10,High:5,Medium:2,Low:1')
+    RISK_CATEGORY_WEIGHTS = _env_weights('RISK_CATEGORY_WEIGHTS')
+
+    # EVENTOS DE PROGRESO (/api/audits/<id>/events): intervalo de sondeo sugerido al cliente
+    EVENTS_POLL_SECONDS = int(os.environ.get('EVENTS_POLL_SECONDS') or 3)
+
+    # IDEMPOTENCIA DE POST (cabecera Idempotency-Key; respuestas guardadas en la BD)
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS') or 86400)
+    # Una petición en curso más antigua que esto se da por abandonada (worker caído)
+    IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS') or 120)
+
+    # SONDAS DE SALUD: /readyz guarda su resultado unos segundos para no cargar la BD
+    READINESS_CACHE_SECONDS = float(os.environ.get('READINESS_CACHE_SECONDS') or 2)
+
+    # SINCRONIZACIÓN INCREMENTAL (/api/audits/<id>/changes)
+    SYNC_MAX_CHANGES = int(os.environ.get('SYNC_MAX_CHANGES') or 500)
+    # Retención del registro de cambios; se poda como mucho una vez por intervalo y worker
+    SYNC_RETENTION_DAYS = int(os.environ.get('SYNC_RETENTION_DAYS') or 30)
+    SYNC_PRUNE_INTERVAL_SECONDS = int(os.environ.get('SYNC_PRUNE_INTERVAL_SECONDS') or 3600)
+
 class DevelopmentConfig(Config):
     DEBUG = True
     # ASEGURAR CSRF DESACTIVADO EN DESARROLLO
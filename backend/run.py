@@ -1,5 +1,7 @@
 import os
-from app import create_app, db
+import click
+from app import create_app
+from app.bootstrap import initialize_database
 from dotenv import load_dotenv
 from werkzeug.serving import is_running_from_reloader
 
@@ -9,51 +11,81 @@ app = create_app(os.getenv('FLASK_CONFIG') or 'development')
 
 @app.cli.command()
 def init_db():
-    db.create_all()
+    initialize_database(force=True)
     print('✅ BBDD inicializada')
 
-def create_default_user():
-    """Crear usuario admin por defecto"""
-    from app.models.user import User
-    
-    existing_admin = User.query.filter_by(email='admin@cyberlynx.com').first()
-    
-    if not existing_admin:
-        admin = User(
-            name='Administrator',
-            email='admin@cyberlynx.com',
-            role='admin'
-        )
-        admin.set_password('admin123')
-        
-        db.session.add(admin)
-        db.session.commit()
-        print('👤 Usuario admin creado: admin@cyberlynx.com / admin123')
-    else:
-        print('👤 Usuario admin ya existe')
-
-def seed_checklists():
-    """Sembrar plantillas de checklist"""
-    from app.seeds.seed_checklists import seed_checklist_templates
-    seed_checklist_templates()
+@app.cli.command()
+def serve():
+    """Servidor de producción multi-proceso (ver app/server.py)"""
+    from app.server import serve as run_server
+    run_server(app)
+
+@app.cli.command('import-templates')
+@click.argument('path')
+@click.option('--prune', is_flag=True, help='Eliminar preguntas que ya no están en el paquete (si no tienen respuestas)')
+@click.option('--dry-run', is_flag=True, help='Mostrar los cambios sin aplicarlos')
+def import_templates(path, prune, dry_run):
+    """Importa un paquete de plantillas JSON/YAML aplicando solo las diferencias"""
+    from app.seeds.template_packs import load_pack, apply_pack
+    try:
+        stats = apply_pack(load_pack(path), prune=prune, dry_run=dry_run)
+    except (ValueError, OSError) as e:
+        raise click.ClickException(str(e))
+
+    print(f'{"🔍 Dry run" if dry_run else "✅ Paquete importado"}: {path}')
+    for key, value in stats.items():
+        print(f'  - {key}: {value}')
+
+@app.cli.command('export-templates')
+@click.argument('path')
+@click.option('--category', default=None, help='Exportar solo una categoría')
+@click.option('--name', default='cyberlynx_export', help='Nombre del paquete')
+def export_templates(path, category, name):
+    """Exporta las plantillas a un paquete JSON/YAML (según la extensión)"""
+    from app.seeds.template_packs import export_pack, dump_pack
+    try:
+        pack = export_pack(name=name, category=category)
+        dump_pack(pack, path)
+    except (ValueError, OSError) as e:
+        raise click.ClickException(str(e))
+    print(f'✅ {len(pack["templates"])} plantillas exportadas a {path}')
+
+@app.cli.command('backfill-compliance')
+def backfill_compliance():
+    """Reconstruye el rollup diario de cumplimiento desde los checklists completados"""
+    from app import db
+    from app.services import compliance_rollup
+    initialize_database()
+    rows = compliance_rollup.backfill()
+    db.session.commit()
+    print(f'✅ Rollup de cumplimiento reconstruido: {rows} filas (día, categoría)')
+
+@app.cli.command('rebuild-findings')
+def rebuild_findings():
+    """Reconstruye el índice de hallazgos a partir de todas las respuestas 'No'"""
+    from app import db
+    from app.services import findings_index
+    initialize_database()
+    total = findings_index.rebuild()
+    db.session.commit()
+    print(f'✅ Índice de hallazgos reconstruido: {total} hallazgos')
+
+@app.cli.command('prune-changes')
+@click.option('--days', type=int, default=None, help='Retención en días (por defecto SYNC_RETENTION_DAYS)')
+def prune_changes(days):
+    """Elimina del registro de cambios las entradas anteriores a la retención"""
+    from app import db
+    from app.services import change_log
+    initialize_database()
+    deleted = change_log.prune(days if days is not None else app.config['SYNC_RETENTION_DAYS'])
+    db.session.commit()
+    print(f'✅ Registro de cambios podado: {deleted} entradas eliminadas')
 
 if __name__ == '__main__':
     # Solo ejecutar la inicialización si NO es el proceso de recarga
     if not is_running_from_reloader():
         with app.app_context():
-            # 1. Crear todas las tablas
-            db.create_all()
-            print('✅ Database tables created')
-            
-            # 2. Crear usuario admin
-            create_default_user()
-            
-            # 3. Cargar templates de checklist
-            try:
-                seed_checklists()
-            except Exception as e:
-                print(f'⚠️  Error seeding checklists: {str(e)}')
-            
+            initialize_database()
             print('🚀 Servidor inicializado en: http://127.0.0.1:5000')
-    
-    app.run(host='127.0.0.1', port=5000, debug=True)
\ No newline at end of file
+
+    app.run(host='127.0.0.1', port=5000, debug=True)
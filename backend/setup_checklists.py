@@ -5,36 +5,33 @@ Script para configurar tablas de checklist y sembrar plantillas predefinidas par
 import os
 import sys
 from app import create_app, db
+from app.bootstrap import initialize_database
 from app.models.checklist import ChecklistTemplate, ChecklistQuestion
-from app.seeds.seed_checklists import seed_checklist_templates
 
 def main():
     app = create_app(os.getenv('FLASK_CONFIG') or 'development')
+    force = '--force' in sys.argv
 
     with app.app_context():
         print('🔍 Checking database tables...')
 
-        # Crear todas las tablas si no existen
-        db.create_all()
+        # Crea tablas y siembra plantillas solo si cambió el esquema o la versión de seeds
+        # (con --force se repite todo; los paquetes solo escriben las diferencias)
+        initialize_database(force=force)
         print('✅ Database tables created/verified')
 
-        # Verificar si las plantillas ya existen
-        template_count = ChecklistTemplate.query.count()
-        print(f'📊 Current checklist templates: {template_count}')
-
-        if template_count == 0:
-            print('🌱 Seeding checklist templates...')
-            seed_checklist_templates()
-        else:
-            print('ℹ️  Templates already exist. Skipping seed.')
-            print('   To re-seed, delete templates from database first.')
-
-        # Mostrar resumen
+        # Mostrar resumen (una sola consulta agrupada)
         print('\n📋 Summary:')
-        templates = ChecklistTemplate.query.all()
-        for template in templates:
-            question_count = template.questions.count()
-            print(f'  - {template.name}: {question_count} questions')
+        summary = db.session.query(
+            ChecklistTemplate.name,
+            db.func.count(ChecklistQuestion.id)
+        ).outerjoin(ChecklistQuestion, ChecklistQuestion.template_id == ChecklistTemplate.id)\
+            .group_by(ChecklistTemplate.id, ChecklistTemplate.name)\
+            .order_by(ChecklistTemplate.id).all()
+
+        print(f'📊 Current checklist templates: {len(summary)}')
+        for name, question_count in summary:
+            print(f'  - {name}: {question_count} questions')
 
         print('\n✅ Setup complete!')
 
@@ -0,0 +1,39 @@
+from app.services import audit_compare
+
+
+def _compare(monkeypatch, base_counts, target_counts):
+    monkeypatch.setattr(audit_compare, '_shared_answers', lambda base_id, target_id: [])
+    monkeypatch.setattr(audit_compare, '_severity_counts',
+                        lambda audit_ids: {1: base_counts, 2: target_counts})
+    return audit_compare.compare_audits(1, 2)['compliance_by_severity']
+
+
+def test_severity_without_applicable_answers_has_no_rate_or_delta(monkeypatch):
+    compliance = _compare(
+        monkeypatch,
+        {'Critical': {'N/A': 3}, 'High': {'Yes': 1, 'No': 1}},
+        {'Critical': {'Yes': 2}, 'High': {'Yes': 2}}
+    )
+
+    assert compliance['Critical'] == {
+        'base_rate': None, 'target_rate': 100.0, 'delta': None,
+        'base_findings': 0, 'target_findings': 0
+    }
+    assert compliance['High']['delta'] == 50.0
+    # Severidad sin preguntas en ninguno de los dos lados
+    assert compliance['Low']['base_rate'] is None
+    assert compliance['Low']['delta'] is None
+    assert compliance['overall']['base_rate'] == 50.0
+    assert compliance['overall']['delta'] == 50.0
+
+
+def test_target_losing_all_applicable_answers_has_no_delta(monkeypatch):
+    compliance = _compare(
+        monkeypatch,
+        {'Medium': {'Yes': 4}},
+        {'Medium': {'N/A': 4}}
+    )
+
+    assert compliance['Medium']['base_rate'] == 100.0
+    assert compliance['Medium']['target_rate'] is None
+    assert compliance['Medium']['delta'] is None
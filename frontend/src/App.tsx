@@ -119,33 +119,26 @@ const DashboardContent: React.FC = () => {
     try {
       setLoading(true);
 
-      const [assetsRes, auditsRes] = await Promise.all([
-        fetch('http://127.0.0.1:5000/api/assets', {
-          headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
-        }),
-        fetch('http://127.0.0.1:5000/api/audits', {
-          headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
-        })
-      ]);
-
-      const assetsData = await assetsRes.json();
-      const auditsData = await auditsRes.json();
-
-      const assets = assetsData.assets || [];
-      const audits = auditsData.audits || [];
+      // Un solo endpoint agregado en lugar de descargar todos los activos y auditorías
+      const res = await fetch('http://127.0.0.1:5000/api/stats', {
+        headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
+      });
+      const data = await res.json();
 
       setStats({
-        totalAssets: assets.length,
-        activeAssets: assets.filter((a: any) => a.status === 'Active').length,
-        inactiveAssets: assets.filter((a: any) => a.status === 'Inactive').length,
-        maintenanceAssets: assets.filter((a: any) => a.status === 'Maintenance').length,
-        hardwareAssets: assets.filter((a: any) => a.type === 'Hardware').length,
-        softwareAssets: assets.filter((a: any) => a.type === 'Software').length,
-        networkAssets: assets.filter((a: any) => a.type === 'Network').length,
-        totalAudits: audits.length,
-        createdAudits: audits.filter((a: any) => a.status === 'Created').length,
-        inProgressAudits: audits.filter((a: any) => a.status === 'In_Progress').length,
-        completedAudits: audits.filter((a: any) => a.status === 'Completed').length,
+        totalAssets: data.assets.total,
+        activeAssets: data.assets.by_status.Active || 0,
+        inactiveAssets: data.assets.by_status.Inactive || 0,
+        maintenanceAssets: data.assets.by_status.Maintenance || 0,
+        hardwareAssets: data.assets.by_type.Hardware || 0,
+        softwareAssets: data.assets.by_type.Software || 0,
+        networkAssets: data.assets.by_type.Network || 0,
+        totalAudits: data.audits.total,
+        createdAudits: data.audits.by_status.Created || 0,
+        inProgressAudits: data.audits.by_status.In_Progress || 0,
+        completedAudits: data.audits.by_status.Completed || 0,
+        complianceRate: data.compliance.compliance_rate,
+        openFindings: data.open_findings,
       });
     } catch (error) {
       console.error('Error cargando estadísticas:', error);
@@ -224,6 +217,30 @@ const DashboardContent: React.FC = () => {
             Operativos y disponibles
           </Typography>
         </Paper>
+
+        <Paper sx={{ p: 3, bgcolor: '#e0f2f1', border: '2px solid #009688' }}>
+          <Typography variant="h6" sx={{ color: '#009688' }} gutterBottom>
+            Cumplimiento Global
+          </Typography>
+          <Typography variant="h3" fontWeight="bold">
+            {stats.complianceRate}%
+          </Typography>
+          <Typography variant="body2" color="text.secondary" sx={{ mt: 1 }}>
+            Respuestas Sí sobre las aplicables (Sí + No)
+          </Typography>
+        </Paper>
+
+        <Paper sx={{ p: 3, bgcolor: '#ffebee', border: '2px solid #f44336' }}>
+          <Typography variant="h6" sx={{ color: '#f44336' }} gutterBottom>
+            Hallazgos Abiertos
+          </Typography>
+          <Typography variant="h3" fontWeight="bold">
+            {stats.openFindings.total}
+          </Typography>
+          <Typography variant="body2" color="text.secondary" sx={{ mt: 1 }}>
+            {stats.openFindings.Critical} críticos, {stats.openFindings.High} altos
+          </Typography>
+        </Paper>
       </Box>
 
       <Box sx={{ display: 'grid', gridTemplateColumns: { xs: '1fr', md: '1fr 1fr' }, gap: 3 }}>
@@ -845,20 +862,23 @@ const AuditsContent: React.FC = () => {
       status: audit.status
     });
 
-    // Cargar los activos asignados a esta auditoría
+    // Cargar los ids de activos asignados (paginados por cursor)
     try {
-      const response = await fetch(`http://127.0.0.1:5000/api/audits/${audit.id}/assets`, {
-        headers: {
-          'Authorization': `Bearer ${localStorage.getItem('token')}`
-        }
-      });
-      const data = await response.json();
-
-      if (response.ok && data.assets) {
-        const assignedAssetIds = data.assets.map((asset: any) => asset.id);
-        setSelectedAssets(assignedAssetIds);
-        console.log('Activos asignados cargados:', assignedAssetIds);
+      const assignedAssetIds: number[] = [];
+      let afterId: number | null = 0;
+      while (afterId !== null) {
+        const response = await fetch(`http://127.0.0.1:5000/api/audits/${audit.id}/assets?ids_only=true&limit=5000&after_id=${afterId}`, {
+          headers: {
+            'Authorization': `Bearer ${localStorage.getItem('token')}`
+          }
+        });
+        const data = await response.json();
+        if (!response.ok) break;
+        assignedAssetIds.push(...data.asset_ids);
+        afterId = data.next_after_id;
       }
+      setSelectedAssets(assignedAssetIds);
+      console.log('Activos asignados cargados:', assignedAssetIds.length);
     } catch (error) {
       console.error('Error cargando activos de la auditoría:', error);
     }
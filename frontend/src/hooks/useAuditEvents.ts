@@ -0,0 +1,80 @@
+import { useEffect, useRef } from 'react';
+import api from '../services/api';
+
+export type AuditEventType =
+    | 'snapshot'
+    | 'progress'
+    | 'checklist_started'
+    | 'checklist_completed'
+    | 'checklist_deleted'
+    | 'audit_status';
+
+export interface AuditEvent {
+    audit_id: number;
+    type: AuditEventType;
+    data: any;
+}
+
+interface AuditEventsPage {
+    cursor: number;
+    has_more: boolean;
+    events: AuditEvent[];
+    poll_interval: number;
+}
+
+const DEFAULT_POLL_SECONDS = 3;
+const ERROR_RETRY_SECONDS = 10;
+
+/**
+ * Hook para recibir el progreso de los checklists de una auditoría por sondeo corto
+ * Cada petición devuelve solo los eventos posteriores al cursor; el token va en la
+ * cabecera Authorization (interceptor de api) y no se sondea con la pestaña oculta.
+ */
+export const useAuditEvents = (auditId: number | null, onEvent: (event: AuditEvent) => void) => {
+    const handlerRef = useRef(onEvent);
+    handlerRef.current = onEvent;
+
+    useEffect(() => {
+        if (!auditId) {
+            return;
+        }
+
+        let cursor: number | null = null;
+        let timer: ReturnType<typeof setTimeout> | undefined;
+        let stopped = false;
+
+        const schedule = (seconds: number) => {
+            if (!stopped) {
+                timer = setTimeout(poll, seconds * 1000);
+            }
+        };
+
+        const poll = async () => {
+            if (document.hidden) {
+                schedule(DEFAULT_POLL_SECONDS);
+                return;
+            }
+            try {
+                const params = cursor === null ? {} : { since: cursor };
+                const response = await api.get<AuditEventsPage>(`/audits/${auditId}/events`, { params });
+                if (stopped) {
+                    return;
+                }
+                const page = response.data;
+                cursor = page.cursor;
+                page.events.forEach((event) => handlerRef.current(event));
+                schedule(page.has_more ? 0 : page.poll_interval || DEFAULT_POLL_SECONDS);
+            } catch (error) {
+                console.error('Error obteniendo eventos de la auditoría:', error);
+                schedule(ERROR_RETRY_SECONDS);
+            }
+        };
+
+        poll();
+
+        return () => {
+            stopped = true;
+            clearTimeout(timer);
+        };
+    }, [auditId]);
+};
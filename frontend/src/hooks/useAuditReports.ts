@@ -69,7 +69,8 @@ export const useAuditReports = () => {
      */
     const generateReport = async (
         auditId: number,
-        format: 'pdf' | 'xlsx' | 'csv'
+        format: 'pdf' | 'xlsx' | 'csv' | 'bundle',
+        detail: boolean = false
     ): Promise<boolean> => {
         setLoading(true);
 
@@ -95,7 +96,7 @@ export const useAuditReports = () => {
 
             // 2. Generar reporte
             const response = await fetch(
-                `http://127.0.0.1:5000/api/audits/${auditId}/report?format=${format}`,
+                `http://127.0.0.1:5000/api/audits/${auditId}/report?format=${format}${detail ? '&detail=true' : ''}`,
                 {
                     headers: {
                         'Authorization': `Bearer ${localStorage.getItem('token')}`
@@ -109,7 +110,7 @@ export const useAuditReports = () => {
                 const url = window.URL.createObjectURL(blob);
                 const a = document.createElement('a');
                 a.href = url;
-                a.download = `audit_${auditId}_report_${new Date().toISOString().split('T')[0]}.${format}`;
+                a.download = `audit_${auditId}_report_${new Date().toISOString().split('T')[0]}.${format === 'bundle' ? 'zip' : format}`;
                 document.body.appendChild(a);
                 a.click();
                 window.URL.revokeObjectURL(url);
@@ -27,7 +27,9 @@ import ChecklistSummary from '../components/ChecklistSummary';
 import { checklistService } from '../services/checklistService';
 import { auditService } from '../services/auditService';
 import { AuditChecklist, QuestionWithResponse } from '../types/Checklist';
+import { Audit } from '../types/Audit';
 import { useAuditReports } from '../hooks/useAuditReports';
+import { useAuditEvents, AuditEvent } from '../hooks/useAuditEvents';
 
 const AuditChecklistPage: React.FC = () => {
     const { auditId } = useParams<{ auditId: string }>();
@@ -35,6 +37,7 @@ const AuditChecklistPage: React.FC = () => {
     const { generateReport, loading: reportLoading } = useAuditReports();
 
     const [auditName, setAuditName] = useState('');
+    const [auditStatus, setAuditStatus] = useState<Audit['status'] | null>(null);
     const [checklists, setChecklists] = useState<AuditChecklist[]>([]);
     const [selectedChecklist, setSelectedChecklist] = useState<AuditChecklist | null>(null);
     const [questionsWithResponses, setQuestionsWithResponses] = useState<QuestionWithResponse[]>([]);
@@ -49,6 +52,70 @@ const AuditChecklistPage: React.FC = () => {
         }
     }, [auditId]);
 
+    // Progreso en vivo: se aplican los deltas en lugar de volver a pedir la lista
+    useAuditEvents(auditId ? parseInt(auditId) : null, (event: AuditEvent) => {
+        switch (event.type) {
+            case 'progress':
+            case 'checklist_completed':
+                setChecklists(prev => prev.map(c =>
+                    c.id === event.data.checklist_id ? { ...c, ...pickProgress(event.data) } : c
+                ));
+                setSelectedChecklist(prev =>
+                    prev && prev.id === event.data.checklist_id ? { ...prev, ...pickProgress(event.data) } : prev
+                );
+                break;
+            case 'checklist_started':
+                // Otro usuario añadió un checklist: recargar solo la lista
+                if (!checklists.some(c => c.id === event.data.checklist_id)) {
+                    refreshChecklists();
+                }
+                break;
+            case 'checklist_deleted':
+                if (checklists.some(c => c.id === event.data.checklist_id)) {
+                    refreshChecklists();
+                }
+                break;
+            case 'snapshot':
+            case 'audit_status':
+                // La auditoría pasa a En Progreso / Completada al responder o completar checklists
+                setAuditStatus(event.data.status);
+                break;
+            default:
+                break;
+        }
+    });
+
+    const getAuditStatusChip = (status: Audit['status']) => {
+        switch (status) {
+            case 'Created': return { label: 'Creada', color: 'info' as const };
+            case 'In_Progress': return { label: 'En Progreso', color: 'warning' as const };
+            case 'Completed': return { label: 'Completada', color: 'success' as const };
+            default: return { label: status, color: 'default' as const };
+        }
+    };
+
+    const pickProgress = (data: any): Partial<AuditChecklist> => {
+        const update: Partial<AuditChecklist> = { status: data.status };
+        if (data.answered_questions !== undefined) {
+            update.answered_questions = data.answered_questions;
+            update.total_questions = data.total_questions;
+            update.progress = data.progress;
+        }
+        if (data.completed_at !== undefined) {
+            update.completed_at = data.completed_at;
+        }
+        return update;
+    };
+
+    const refreshChecklists = async () => {
+        try {
+            const response = await checklistService.getAuditChecklists(parseInt(auditId!));
+            setChecklists(response.checklists);
+        } catch (err: any) {
+            setError(err.response?.data?.error || 'Error loading audit checklists');
+        }
+    };
+
     const loadAuditAndChecklists = async (selectLatest: boolean = false) => {
         try {
             setLoading(true);
@@ -58,6 +125,7 @@ const AuditChecklistPage: React.FC = () => {
             const audit = auditResponse.audits.find(a => a.id === parseInt(auditId!));
             if (audit) {
                 setAuditName(audit.name);
+                setAuditStatus(audit.status);
             }
 
             const response = await checklistService.getAuditChecklists(parseInt(auditId!));
@@ -110,9 +178,9 @@ const AuditChecklistPage: React.FC = () => {
     };
 
     const handleAnswerSubmitted = async () => {
+        // El progreso de la lista y el estado de la auditoría llegan por eventos (useAuditEvents)
         if (selectedChecklist) {
             await loadChecklistDetail(selectedChecklist);
-            await loadAuditAndChecklists();
         }
     };
 
@@ -176,16 +244,20 @@ const AuditChecklistPage: React.FC = () => {
 
     const handleGenerateReport = async () => {
         const format = window.prompt(
-            '¿En qué formato desea el reporte?\n\nOpciones: pdf, xlsx, csv',
+            '¿En qué formato desea el reporte?\n\nOpciones: pdf, xlsx, csv, bundle (ZIP con los tres)',
             'pdf'
         )?.toLowerCase();
 
-        if (!format || !['pdf', 'xlsx', 'csv'].includes(format)) {
-            if (format) alert('Formato inválido. Use: pdf, xlsx, o csv');
+        if (!format || !['pdf', 'xlsx', 'csv', 'bundle'].includes(format)) {
+            if (format) alert('Formato inválido. Use: pdf, xlsx, csv o bundle');
             return;
         }
 
-        await generateReport(parseInt(auditId!), format as 'pdf' | 'xlsx' | 'csv');
+        const detail = window.confirm(
+            '¿Incluir el anexo con el detalle de cada pregunta (respuesta, notas y responsable)?'
+        );
+
+        await generateReport(parseInt(auditId!), format as 'pdf' | 'xlsx' | 'csv' | 'bundle', detail);
     };
 
     if (loading) {
@@ -212,9 +284,18 @@ const AuditChecklistPage: React.FC = () => {
                     <Typography variant="h4">
                         Checklists de Auditoría
                     </Typography>
-                    <Typography variant="body2" color="text.secondary">
-                        {auditName}
-                    </Typography>
+                    <Box sx={{ display: 'flex', alignItems: 'center', gap: 1 }}>
+                        <Typography variant="body2" color="text.secondary">
+                            {auditName}
+                        </Typography>
+                        {auditStatus && (
+                            <Chip
+                                size="small"
+                                label={getAuditStatusChip(auditStatus).label}
+                                color={getAuditStatusChip(auditStatus).color}
+                            />
+                        )}
+                    </Box>
                 </Box>
 
                 <Box sx={{ display: 'flex', gap: 1 }}>
@@ -1,5 +1,5 @@
 import api from './api';
-import { Asset, CreateAssetRequest } from '../types/Asset';
+import { Asset, AssetAuditHistoryEntry, CreateAssetRequest } from '../types/Asset';
 
 interface AssetListResponse {
     assets: Asset[];
@@ -37,4 +37,16 @@ export const assetService = {
         const response = await api.delete(`/assets/${id}`);
         return response.data;
     },
+
+    // Historial de auditorías de un activo (con cumplimiento por auditoría)
+    getAssetAudits: async (id: number, status?: string): Promise<{ asset_id: number; audits: AssetAuditHistoryEntry[]; total: number }> => {
+        const response = await api.get(`/assets/${id}/audits`, { params: status ? { status } : undefined });
+        return response.data;
+    },
+
+    // Historial de varios activos en una sola llamada
+    getAssetsAudits: async (ids: number[], status?: string): Promise<{ assets: { asset_id: number; audits: AssetAuditHistoryEntry[]; total: number }[]; not_found: number[] }> => {
+        const response = await api.get('/assets/audits', { params: { asset_ids: ids.join(','), ...(status ? { status } : {}) } });
+        return response.data;
+    },
 };
\ No newline at end of file
@@ -7,6 +7,22 @@ interface AuditListResponse {
     total: number;
 }
 
+interface AuditAssetsResponse {
+    audit: Audit;
+    assets: Asset[];
+    total_assets: number;
+    total: number;
+    pages: number;
+    current_page: number;
+}
+
+export interface AssetFilters {
+    name?: string;
+    type?: string;
+    status?: string;
+    location?: string;
+}
+
 export const auditService = {
     // US-004: Crear auditorías
     createAudit: async (audit: CreateAuditRequest): Promise<{ message: string; audit: Audit }> => {
@@ -27,15 +43,28 @@ export const auditService = {
         return response.data;
     },
 
-    // US-004: Asignar activos a auditoría
-    assignAssets: async (auditId: number, assetIds: number[]): Promise<{ message: string; assigned_assets: Asset[] }> => {
-        const response = await api.post(`/audits/${auditId}/assets`, { asset_ids: assetIds });
+    // US-004: Asignar activos a auditoría (por ids y/o por filtros de activo)
+    // Los filtros no pueden ir vacíos; para asignar todos los activos usar assignAllAssets
+    assignAssets: async (auditId: number, assetIds: number[], filters?: AssetFilters): Promise<{ message: string; added: number; total_assets: number }> => {
+        const response = await api.post(`/audits/${auditId}/assets`, { asset_ids: assetIds, filters });
+        return response.data;
+    },
+
+    // Asignar todos los activos existentes (requiere all=true explícito)
+    assignAllAssets: async (auditId: number): Promise<{ message: string; added: number; total_assets: number }> => {
+        const response = await api.post(`/audits/${auditId}/assets`, { all: true });
+        return response.data;
+    },
+
+    // Quitar activos de auditoría
+    removeAssets: async (auditId: number, assetIds: number[]): Promise<{ message: string; removed: number; total_assets: number }> => {
+        const response = await api.delete(`/audits/${auditId}/assets`, { data: { asset_ids: assetIds } });
         return response.data;
     },
 
-    // US-004: Obtener activos de auditoría
-    getAuditAssets: async (auditId: number): Promise<{ audit: Audit; assets: Asset[]; total_assets: number }> => {
-        const response = await api.get(`/audits/${auditId}/assets`);
+    // US-004: Obtener activos de auditoría (paginados)
+    getAuditAssets: async (auditId: number, page: number = 1, perPage: number = 50): Promise<AuditAssetsResponse> => {
+        const response = await api.get(`/audits/${auditId}/assets`, { params: { page, per_page: perPage } });
         return response.data;
     },
 };
\ No newline at end of file
@@ -16,4 +16,22 @@ export interface CreateAssetRequest {
     location?: string;
     status?: 'Active' | 'Inactive' | 'Maintenance';
     description?: string;
-}
\ No newline at end of file
+}
+export interface AssetAuditHistoryEntry {
+    id: number;
+    name: string;
+    status: 'Created' | 'In_Progress' | 'Completed';
+    created_at: string;
+    started_at: string | null;
+    completed_at: string | null;
+    summary: {
+        checklists_total: number;
+        checklists_completed: number;
+        yes_count: number;
+        no_count: number;
+        na_count: number;
+        compliance_rate: number;
+        critical_findings: number;
+        high_findings: number;
+    };
+}